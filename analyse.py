@@ -0,0 +1,126 @@
+# analyse.py
+# Analyse statique en temps linéaire : profondeur logique de chaque gate,
+# chemin critique (le plus long d'une entrée à une sortie), sortance de chaque
+# pin de sortie et nombre de gates par type.
+# Entrées, sorties et séparation / regroupement de bus ne comptent pas comme
+# un étage logique ; un bloc compte pour la profondeur de son propre circuit.
+
+from collections import Counter, deque
+
+
+WIRING = {"SRC", "OUT", "SPLIT", "MERGE"}
+
+_block_depths = {}     # empreinte du fichier -> profondeur du sous-circuit
+
+
+class Analysis:
+    __slots__ = ('depth', 'critical_path', 'max_depth', 'fanout', 'counts', 'cyclic')
+
+    def __init__(self):
+        self.depth = {}           # gid -> nombre d'étages logiques depuis les entrées
+        self.critical_path = []   # gids, de l'entrée à la sortie
+        self.max_depth = 0
+        self.fanout = {}          # (gid, index pin sortie) -> nombre de fils
+        self.counts = Counter()   # type -> nombre de gates
+        self.cyclic = set()       # gates prises dans une boucle (profondeur approchée)
+
+    def describe(self, labels=None):
+        label = lambda gid: (labels or {}).get(gid, str(gid))
+        lines = [f"Profondeur logique maximale : {self.max_depth}"]
+        if self.critical_path:
+            lines.append("Chemin critique : " + " → ".join(label(g) for g in self.critical_path))
+        lines.append("")
+        lines.append("Gates par type : " + ", ".join(f"{t} × {n}" for t, n in sorted(self.counts.items())))
+        top = sorted(self.fanout.items(), key=lambda kv: -kv[1])[:5]
+        if top:
+            lines.append("Plus grandes sortances : " + ", ".join(f"{label(g)} ({n})" for (g, _), n in top))
+        if self.cyclic:
+            lines.append(f"Attention : {len(self.cyclic)} gate(s) dans une boucle.")
+        return "\n".join(lines)
+
+
+def program_depth(compiled):
+    """Profondeur d'un circuit compilé (netlist.CompiledCircuit), les BUF ne comptant pas."""
+    depth = {n: 0 for n in compiled.input_nets}
+    for op, dst, srcs in compiled.program:
+        depth[dst] = max((depth.get(s, 0) for s in srcs), default=0) + (op != "BUF")
+    return max((depth.get(n, 0) for n in compiled.output_nets), default=0)
+
+
+def block_depth(block):
+    if block.digest not in _block_depths:
+        _block_depths[block.digest] = program_depth(block.compiled)
+    return _block_depths[block.digest]
+
+
+def _topological_order(types, preds, succs):
+    in_degree = {g: len(preds[g]) for g in types}
+    queue = deque(g for g, d in in_degree.items() if d == 0)
+    order = []
+    while queue:
+        g = queue.popleft()
+        order.append(g)
+        for s in succs[g]:
+            in_degree[s] -= 1
+            if in_degree[s] == 0:
+                queue.append(s)
+    if len(order) < len(types):
+        done = set(order)
+        order.extend(g for g in types if g not in done)
+    return order
+
+
+def analyze(types, edges, order=None, weights=None):
+    """types : {gid: type} ; edges : [(gid source, pin source, gid destination)].
+
+    `order` : ordre topologique déjà connu (sinon calculé) ;
+    `weights` : nombre d'étages d'une gate particulière (blocs).
+    """
+    a = Analysis()
+    preds = {g: [] for g in types}
+    succs = {g: [] for g in types}
+    for s, p, d in edges:
+        preds[d].append(s)
+        succs[s].append(d)
+        a.fanout[(s, p)] = a.fanout.get((s, p), 0) + 1
+    a.counts.update(types.values())
+
+    if order is None:
+        order = _topological_order(types, preds, succs)
+    pos = {g: i for i, g in enumerate(order)}
+    best = {}
+    for g in order:
+        d, arg = 0, None
+        for s in preds[g]:
+            if pos[s] >= pos[g]:
+                a.cyclic.add(g)         # arête de retour : ignorée
+                continue
+            if arg is None or a.depth[s] > d:
+                d, arg = a.depth[s], s
+        if weights and g in weights:
+            d += weights[g]
+        elif types[g] not in WIRING:
+            d += 1
+        a.depth[g] = d
+        best[g] = arg
+
+    ends = [g for g in order if types[g] == "OUT"] or order
+    if ends:
+        g = max(ends, key=a.depth.__getitem__)
+        a.max_depth = a.depth[g]
+        path = []
+        while g is not None:
+            path.append(g)
+            g = best[g]
+        a.critical_path = path[::-1]
+    return a
+
+
+if __name__ == "__main__":
+    # A, B -> ET -> NON -> S ; C -> OU(C, ET) -> T
+    types = {1: "SRC", 2: "SRC", 3: "SRC", 4: "AND", 5: "NOT", 6: "OUT", 7: "OR", 8: "OUT"}
+    edges = [(1, 0, 4), (2, 0, 4), (4, 0, 5), (5, 0, 6), (3, 0, 7), (4, 0, 7), (7, 0, 8)]
+    a = analyze(types, edges)
+    assert a.depth[5] == 2 and a.depth[6] == 2 and a.depth[7] == 2
+    assert a.max_depth == 2 and a.critical_path[-1] == 6 and a.critical_path[-3] == 4
+    assert a.fanout[(4, 0)] == 2 and a.counts["SRC"] == 3
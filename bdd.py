@@ -0,0 +1,256 @@
+# bdd.py
+# Diagrammes de décision binaires réduits et ordonnés (ROBDD) : chaque fonction
+# a une représentation unique, donc deux sorties sont équivalentes si et
+# seulement si elles ont le même nœud. Permet preuves d'équivalence, comptage
+# de solutions et tautologies au-delà de la table de vérité (40 à 100 entrées
+# pour les circuits usuels), tant que le nombre de nœuds reste raisonnable.
+
+import os
+import sys
+
+import netlist
+import saveAndLoad
+
+
+MAX_NODES = 1 << 18
+CACHE_BITS = 16
+
+FALSE, TRUE = 0, 1
+
+
+class NodeLimit(Exception):
+    """Le BDD dépasse le nombre de nœuds autorisé (mauvais ordre ou fonction trop complexe)."""
+
+
+class BDD:
+    """Gestionnaire : table unique (partage des nœuds) et cache des opérations.
+
+    Le cache est à correspondance directe : une entrée en remplace une autre
+    de même case, la mémoire reste bornée quel que soit le calcul.
+    """
+    __slots__ = ('n_vars', 'var', 'low', 'high', 'unique', 'cache', 'cache_mask', 'max_nodes')
+
+    def __init__(self, n_vars, max_nodes=MAX_NODES, cache_bits=CACHE_BITS):
+        self.n_vars = n_vars
+        # Nœuds 0 et 1 : feuilles, de niveau n_vars (sous toutes les variables)
+        self.var = [n_vars, n_vars]
+        self.low = [FALSE, TRUE]
+        self.high = [FALSE, TRUE]
+        self.unique = {}
+        self.cache = [None] * (1 << cache_bits)
+        self.cache_mask = (1 << cache_bits) - 1
+        self.max_nodes = max_nodes
+
+    def __len__(self):
+        return len(self.var)
+
+    def node(self, v, lo, hi):
+        if lo == hi:
+            return lo
+        key = (v, lo, hi)
+        u = self.unique.get(key)
+        if u is None:
+            u = len(self.var)
+            if u >= self.max_nodes:
+                raise NodeLimit(f"Plus de {self.max_nodes} nœuds")
+            self.var.append(v)
+            self.low.append(lo)
+            self.high.append(hi)
+            self.unique[key] = u
+        return u
+
+    def variable(self, v):
+        return self.node(v, FALSE, TRUE)
+
+    def apply(self, op, f, g):
+        """op : "AND", "OR" ou "XOR"."""
+        if op == "AND":
+            if f == FALSE or g == FALSE:
+                return FALSE
+            if f == TRUE or f == g:
+                return g
+            if g == TRUE:
+                return f
+        elif op == "OR":
+            if f == TRUE or g == TRUE:
+                return TRUE
+            if f == FALSE or f == g:
+                return g
+            if g == FALSE:
+                return f
+        else:
+            if f == g:
+                return FALSE
+            if f == FALSE:
+                return g
+            if g == FALSE:
+                return f
+        if f > g:
+            f, g = g, f             # opérations commutatives : une seule entrée de cache
+
+        slot = hash((op, f, g)) & self.cache_mask
+        hit = self.cache[slot]
+        if hit is not None and hit[0] == op and hit[1] == f and hit[2] == g:
+            return hit[3]
+
+        vf, vg = self.var[f], self.var[g]
+        v = min(vf, vg)
+        f0, f1 = (self.low[f], self.high[f]) if vf == v else (f, f)
+        g0, g1 = (self.low[g], self.high[g]) if vg == v else (g, g)
+        r = self.node(v, self.apply(op, f0, g0), self.apply(op, f1, g1))
+        self.cache[slot] = (op, f, g, r)
+        return r
+
+    def negate(self, f):
+        return self.apply("XOR", f, TRUE)
+
+    def gate(self, op, srcs):
+        """Porte de netlist.BIT_OPS appliquée à des nœuds."""
+        if op == "BUF":
+            return srcs[0]
+        if op == "NOT":
+            return self.negate(srcs[0])
+        base = op[1:] if op in ("NAND", "NOR") else ("XOR" if op == "XNOR" else op)
+        r = srcs[0]
+        for s in srcs[1:]:
+            r = self.apply(base, r, s)
+        return self.negate(r) if op in ("NAND", "NOR", "XNOR") else r
+
+    def sat_count(self, f):
+        """Nombre d'affectations des n_vars variables qui rendent f vraie."""
+        memo = {FALSE: 0, TRUE: 1}
+
+        def count(u):
+            if u not in memo:
+                lo, hi = self.low[u], self.high[u]
+                memo[u] = (count(lo) << (self.var[lo] - self.var[u] - 1)) + \
+                          (count(hi) << (self.var[hi] - self.var[u] - 1))
+            return memo[u]
+
+        return count(f) << self.var[f] if f != FALSE else 0
+
+    def any_sat(self, f):
+        """Une affectation {variable: bit} qui rend f vraie (variables absentes : 0), ou None."""
+        if f == FALSE:
+            return None
+        out = {}
+        while f > TRUE:
+            if self.high[f] != FALSE:
+                out[self.var[f]] = 1
+                f = self.high[f]
+            else:
+                out[self.var[f]] = 0
+                f = self.low[f]
+        return out
+
+    def size(self, roots):
+        """Nombre de nœuds internes atteignables depuis `roots`."""
+        seen = set()
+        stack = [r for r in roots if r > TRUE]
+        while stack:
+            u = stack.pop()
+            if u in seen:
+                continue
+            seen.add(u)
+            stack.extend(x for x in (self.low[u], self.high[u]) if x > TRUE)
+        return len(seen)
+
+
+def dfs_order(c: netlist.CompiledCircuit):
+    """Ordre des entrées (indices) : parcours en profondeur depuis les sorties.
+
+    Les entrées qui interviennent ensemble dans un même cône se retrouvent
+    voisines dans l'ordre, ce qui garde les BDD petits pour les circuits usuels.
+    """
+    driver = {dst: srcs for _, dst, srcs in c.program}
+    index = {net: i for i, net in enumerate(c.input_nets)}
+    order, seen = [], set()
+    for out in c.output_nets:
+        stack = [out]
+        while stack:
+            net = stack.pop()
+            if net in seen:
+                continue
+            seen.add(net)
+            if net in index:
+                order.append(index[net])
+            stack.extend(reversed(driver.get(net, ())))
+    placed = set(order)
+    order.extend(i for i in range(c.n_inputs) if i not in placed)
+    return order
+
+
+def build(c: netlist.CompiledCircuit, mgr: BDD, levels):
+    """(valeur, connu) de chaque sortie ; `levels[i]` : variable de l'entrée i.
+
+    Même logique à trois valeurs que netlist : une sortie est inconnue si un
+    fil non connecté la détermine.
+    """
+    val = {netlist.NET_UNDEF: FALSE}
+    known = {netlist.NET_UNDEF: FALSE}
+    for i, net in enumerate(c.input_nets):
+        val[net] = mgr.variable(levels[i])
+        known[net] = TRUE
+    for op, dst, srcs in c.program:
+        k = TRUE
+        for s in srcs:
+            k = mgr.apply("AND", k, known[s])
+        known[dst] = k
+        v = mgr.gate(op, [val[s] for s in srcs])
+        val[dst] = v if k == TRUE else mgr.apply("AND", v, k)
+    return [(val[n], known[n]) for n in c.output_nets]
+
+
+def build_circuit(c: netlist.CompiledCircuit, max_nodes=MAX_NODES):
+    """BDD des sorties avec l'ordre dfs_order : (gestionnaire, niveaux, sorties)."""
+    order = dfs_order(c)
+    levels = [0] * c.n_inputs
+    for level, i in enumerate(order):
+        levels[i] = level
+    mgr = BDD(c.n_inputs, max_nodes)
+    return mgr, levels, build(c, mgr, levels)
+
+
+def summary(c: netlist.CompiledCircuit, max_nodes=MAX_NODES):
+    """Résumé par sortie : nombre de combinaisons où elle vaut 1, tautologie, etc."""
+    try:
+        mgr, _, outs = build_circuit(c, max_nodes)
+    except NodeLimit as e:
+        return [f"BDD trop grand : {e}"]
+    total = 1 << c.n_inputs
+    lines = [f"{c.n_inputs} entrées, {mgr.size([v for v, _ in outs])} nœuds"]
+    for name, (v, k) in zip(c.output_names, outs):
+        if k != TRUE:
+            note = " (indéterminée pour certaines entrées)"
+        elif v == TRUE:
+            note = " (tautologie)"
+        elif v == FALSE:
+            note = " (toujours fausse)"
+        else:
+            note = ""
+        lines.append(f"{name} : vraie pour {mgr.sat_count(v)} / {total} combinaisons{note}")
+    return lines
+
+
+def main(argv):
+    if len(argv) != 1:
+        print("Usage : python bdd.py circuit.json")
+        return 2
+    lines = summary(netlist.compile_circuit(saveAndLoad.load(argv[0]), os.path.dirname(os.path.abspath(argv[0]))))
+    print("\n".join(lines))
+    return 1 if lines[0].startswith("BDD trop grand") else 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(main(sys.argv[1:]))
+    m = BDD(3)
+    a, b, c = m.variable(0), m.variable(1), m.variable(2)
+    f = m.apply("OR", m.apply("AND", a, b), c)
+    # Unicité : même fonction écrite autrement, même nœud
+    assert f == m.apply("OR", c, m.apply("AND", b, a))
+    assert m.sat_count(f) == 5 and m.sat_count(TRUE) == 8
+    assert m.apply("OR", a, m.negate(a)) == TRUE
+    assert m.gate("XNOR", [a, a]) == TRUE and m.gate("NAND", [a, b]) == m.negate(m.apply("AND", a, b))
+    s = m.any_sat(m.apply("AND", f, m.negate(c)))
+    assert s[0] == 1 and s[1] == 1 and s.get(2, 0) == 0
@@ -0,0 +1,84 @@
+# blocs.py
+# Sous-circuits réutilisables : une gate "BLOCK" référence un autre fichier
+# circuit, dont les SRC/OUT nommées deviennent les ports. Chaque définition est
+# compilée (et aplatie) une seule fois, mise en cache par empreinte du fichier :
+# toutes les instances partagent le même évaluateur.
+
+import hashlib
+import os
+
+import netlist
+import saveAndLoad
+
+
+CIRCUITS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "circuits")
+
+_by_hash = {}     # empreinte du fichier -> BlockDef
+_by_path = {}     # chemin absolu -> (mtime, empreinte)
+_loading = set()  # chemins en cours de chargement (détection des inclusions cycliques)
+
+
+class BlockDef:
+    __slots__ = ('digest', 'title', 'input_names', 'output_names', 'compiled')
+
+    def __init__(self, digest, title, compiled):
+        self.digest = digest
+        self.title = title
+        self.compiled = compiled
+        self.input_names = compiled.input_names
+        self.output_names = compiled.output_names
+
+    def evaluate_pins(self, values):
+        """Évaluation d'une instance : valeurs des ports d'entrée (None = indéfini)."""
+        words = [1 if v else 0 for v in values]
+        known = [0 if v is None else 1 for v in values]
+        val, kn = self.compiled.evaluate(words, 1, known)
+        return [bool(val[n]) if kn[n] else None for n in self.compiled.output_nets]
+
+
+def resolve(ref: str, base_dir: str | None = None) -> str:
+    if os.path.isabs(ref):
+        return ref
+    for d in (base_dir, CIRCUITS_DIR):
+        if d and os.path.exists(os.path.join(d, ref)):
+            return os.path.abspath(os.path.join(d, ref))
+    raise FileNotFoundError(f"Sous-circuit introuvable : {ref}")
+
+
+def ref_for(path: str) -> str:
+    """Référence à enregistrer : relative au dossier circuits/ si possible."""
+    path = os.path.abspath(path)
+    if os.path.dirname(path) == CIRCUITS_DIR:
+        return os.path.basename(path)
+    return path
+
+
+def _digest(path):
+    mtime = os.path.getmtime(path)
+    cached = _by_path.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with open(path, "rb") as f:
+        digest = hashlib.sha1(f.read()).hexdigest()
+    _by_path[path] = (mtime, digest)
+    return digest
+
+
+def load_block(ref: str, base_dir: str | None = None) -> BlockDef:
+    path = resolve(ref, base_dir)
+    digest = _digest(path)
+    if digest in _by_hash:
+        return _by_hash[digest]
+
+    if path in _loading:
+        raise ValueError(f"Inclusion cyclique du sous-circuit : {ref}")
+    _loading.add(path)
+    try:
+        data = saveAndLoad.load(path)
+        compiled = netlist.compile_circuit(data, base_dir=os.path.dirname(path))
+    finally:
+        _loading.discard(path)
+
+    block = BlockDef(digest, os.path.splitext(os.path.basename(path))[0], compiled)
+    _by_hash[digest] = block
+    return block
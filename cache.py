@@ -0,0 +1,103 @@
+# cache.py
+# Cache persistant des résultats de calcul (tables de vérité, expressions,
+# minimisations, analyses), indexé par l'empreinte structurelle du circuit
+# (empreinte.py) : rouvrir un circuit connu ne refait pas le calcul.
+# Un fichier JSON par entrée ; la date de modification sert de date de dernier
+# usage, et les entrées les plus anciennes sont supprimées au-delà de MAX_ENTRIES.
+
+import json
+import os
+
+
+VERSION = 1            # à incrémenter si le format d'un résultat change
+MAX_ENTRIES = 500
+MAX_MEMORY = 64        # entrées gardées en mémoire pendant la session
+
+
+def default_dir() -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "circuitsFaciles")
+
+
+class ResultCache:
+    __slots__ = ('path', 'max_entries', 'memory')
+
+    def __init__(self, path: str | None = None, max_entries=MAX_ENTRIES):
+        self.path = path or default_dir()
+        self.max_entries = max_entries
+        self.memory = {}     # (type, clé) -> résultat, du moins au plus récemment utilisé
+
+    def _file(self, kind, key):
+        return os.path.join(self.path, f"{kind}-{key}.json")
+
+    def _remember(self, k, value):
+        self.memory.pop(k, None)
+        self.memory[k] = value
+        if len(self.memory) > MAX_MEMORY:
+            del self.memory[next(iter(self.memory))]
+
+    def get(self, kind: str, key: str | None):
+        """Résultat enregistré, ou None (clé absente, fichier illisible, autre version)."""
+        if key is None:
+            return None
+        k = (kind, key)
+        if k in self.memory:
+            value = self.memory[k]
+        else:
+            path = self._file(kind, key)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+                os.utime(path)       # dernier usage
+            except (OSError, ValueError):
+                return None
+            if entry.get("version") != VERSION:
+                return None
+            value = entry["value"]
+        self._remember(k, value)
+        return value
+
+    def put(self, kind: str, key: str | None, value) -> None:
+        if key is None:
+            return
+        self._remember((kind, key), value)
+        path = self._file(kind, key)
+        tmp = path + ".tmp"
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"version": VERSION, "value": value}, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp, path)
+            self._evict()
+        except OSError:
+            pass             # cache facultatif : dossier en lecture seule, disque plein…
+
+    def _evict(self):
+        entries = [e for e in os.scandir(self.path) if e.name.endswith(".json")]
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort(key=lambda e: e.stat().st_mtime)
+        for e in entries[:len(entries) - self.max_entries]:
+            try:
+                os.remove(e.path)
+            except OSError:
+                pass
+
+    def clear(self):
+        self.memory.clear()
+        if os.path.isdir(self.path):
+            for e in os.scandir(self.path):
+                if e.name.endswith(".json"):
+                    os.remove(e.path)
+
+
+if __name__ == "__main__":
+    import tempfile
+    c = ResultCache(tempfile.mkdtemp(), max_entries=2)
+    c.put("table", "a", {"x": 1})
+    assert ResultCache(c.path).get("table", "a") == {"x": 1}      # relu depuis le disque
+    c.put("table", "b", [1, 2])
+    os.utime(c._file("table", "a"), (0, 0))                       # "a" : le plus ancien
+    c.put("table", "c", "z")
+    assert ResultCache(c.path).get("table", "a") is None and c.get("table", "c") == "z"
+    assert c.get("table", None) is None
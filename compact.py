@@ -0,0 +1,355 @@
+# compact.py
+# Netlist compacte pour les très grands circuits, sans interface. Au lieu d'un
+# objet par gate, par pin et par fil (Gate / Pin / Wire de l'éditeur), une
+# structure de tableaux typés (module array) : type, largeur, position et
+# valeur de chaque gate, et source de chaque pin d'entrée au format CSR (pins
+# d'entrée de la gate i : fanin_start[i] … fanin_start[i + 1] - 1). Les noms et
+# références de blocs, rares, restent dans des dictionnaires.
+# Le format JSON de saveAndLoad (et donc les objets de l'éditeur) n'est produit
+# que pour la partie à afficher : to_data(indices), window(…).
+#
+#   python compact.py gros_circuit.blif [sortie.json]
+
+import json
+import sys
+import time
+from array import array
+
+import blocs
+import echange
+import netlist
+import portes
+
+
+TYPES = ("SRC", "OUT", "NOT", "AND", "OR", "XOR", "NAND", "NOR", "XNOR", "SPLIT", "MERGE", "BLOCK")
+CODE = {t: i for i, t in enumerate(TYPES)}
+UNKNOWN = -1             # valeur indéfinie dans le tableau value
+MAX_WIDTH = 32           # largeur de bus maximale (comme l'éditeur) : une valeur tient dans value
+
+NARY = ('AND', 'OR', 'XOR', 'NAND', 'NOR', 'XNOR')
+
+
+class CompactNetlist:
+    __slots__ = ('gid', 'gtype', 'width', 'x', 'y', 'placed', 'fanin_start', 'src', 'src_pin', 'value',
+                 'names', 'refs', 'meta', 'next_gid', '_index')
+
+    def __init__(self):
+        self.gid = array('q')
+        self.gtype = array('B')          # indice dans TYPES
+        self.width = array('H')
+        self.x = array('i')
+        self.y = array('i')
+        self.placed = array('B')         # 0 : sans coordonnées (netlist importée)
+        self.value = array('q')          # valeur de la sortie (bus : entier), UNKNOWN si indéfinie
+        self.fanin_start = array('q', [0])
+        self.src = array('q')            # par pin d'entrée : indice de la gate source, -1 si non branchée
+        self.src_pin = array('H')        # par pin d'entrée : pin de sortie de la source
+        self.names = {}                  # indice -> nom
+        self.refs = {}                   # indice -> référence de bloc
+        self.meta = None
+        self.next_gid = 1
+        self._index = None               # gid -> indice, construit à la demande
+
+    def __len__(self):
+        return len(self.gtype)
+
+    def add_gate(self, gid, gtype, n_inputs, width=1, name=None, value=None, xy=None, ref=None):
+        """Ajoute une gate (pins d'entrée non branchées) ; renvoie son indice."""
+        if not 1 <= width <= MAX_WIDTH:
+            raise ValueError(f"Gate {gid} : largeur de bus {width} (de 1 à {MAX_WIDTH} bits)")
+        i = len(self.gtype)
+        self.gid.append(gid)
+        self.gtype.append(CODE[gtype])
+        self.width.append(width)
+        self.x.append(xy[0] if xy else 0)
+        self.y.append(xy[1] if xy else 0)
+        self.placed.append(1 if xy else 0)
+        self.value.append(UNKNOWN if value is None else int(value))
+        self.src.extend([-1] * n_inputs)
+        self.src_pin.extend([0] * n_inputs)
+        self.fanin_start.append(len(self.src))
+        if name:
+            self.names[i] = name
+        if ref:
+            self.refs[i] = ref
+        self.next_gid = max(self.next_gid, gid + 1)
+        self._index = None
+        return i
+
+    def index(self, gid):
+        if self._index is None:
+            self._index = {g: i for i, g in enumerate(self.gid)}
+        return self._index[gid]
+
+    def type_of(self, i):
+        return TYPES[self.gtype[i]]
+
+    def memory(self):
+        """Octets occupés par les tableaux."""
+        arrays = (self.gid, self.gtype, self.width, self.x, self.y, self.placed, self.value,
+                  self.fanin_start, self.src, self.src_pin)
+        return sum(a.itemsize * len(a) for a in arrays)
+
+    # --- Conversion vers le format JSON (partie affichée) ---
+    def gate_dict(self, i):
+        t = TYPES[self.gtype[i]]
+        w = self.width[i]
+        gd = {"gid": self.gid[i], "type": t}
+        if self.placed[i]:
+            gd["x"], gd["y"] = self.x[i], self.y[i]
+        v = self.value[i]
+        gd["value"] = (bool(v) if w == 1 else v) if t == "SRC" and v != UNKNOWN else None
+        gd["name"] = self.names.get(i) if t in ("SRC", "OUT") else None
+        if t == "BLOCK":
+            gd["ref"] = self.refs[i]
+        if t in NARY:
+            gd["inputs"] = self.fanin_start[i + 1] - self.fanin_start[i]
+        if w > 1:
+            gd["width"] = w
+        return gd
+
+    def to_data(self, indices=None):
+        """Circuit au format JSON : tout, ou seulement les gates `indices` et les fils entre elles."""
+        if indices is None:
+            chosen = range(len(self))
+            keep = None
+        else:
+            chosen = sorted(set(indices))
+            keep = set(chosen)
+        gates = [self.gate_dict(i) for i in chosen]
+        wires = []
+        for i in chosen:
+            for pin, j in enumerate(range(self.fanin_start[i], self.fanin_start[i + 1])):
+                s = self.src[j]
+                if s >= 0 and (keep is None or s in keep):
+                    wires.append({"src_gate": self.gid[s], "src_pin": self.src_pin[j],
+                                  "dst_gate": self.gid[i], "dst_pin": pin})
+        data = {"gates": gates, "wires": wires, "next_gid": self.next_gid}
+        if self.meta:
+            data["meta"] = self.meta
+        return data
+
+    def window(self, x0, y0, x1, y1):
+        """Indices des gates placées dans le rectangle (coordonnées monde)."""
+        return [i for i in range(len(self))
+                if self.placed[i] and x0 <= self.x[i] <= x1 and y0 <= self.y[i] <= y1]
+
+    def save(self, path):
+        """Enregistre au format de saveAndLoad, gate par gate (sans tout construire en mémoire)."""
+        with open(path, "w", encoding="utf-8") as f:
+            f.write('{\n  "gates": [')
+            for i in range(len(self)):
+                f.write(("," if i else "") + "\n    " + json.dumps(self.gate_dict(i), ensure_ascii=False))
+            f.write('\n  ],\n  "wires": [')
+            first = True
+            for i in range(len(self)):
+                for pin, j in enumerate(range(self.fanin_start[i], self.fanin_start[i + 1])):
+                    s = self.src[j]
+                    if s >= 0:
+                        wd = {"src_gate": self.gid[s], "src_pin": self.src_pin[j], "dst_gate": self.gid[i], "dst_pin": pin}
+                        f.write(("" if first else ",") + "\n    " + json.dumps(wd))
+                        first = False
+            f.write(f'\n  ],\n  "next_gid": {self.next_gid}')
+            if self.meta:
+                f.write(',\n  "meta": ' + json.dumps(self.meta, ensure_ascii=False))
+            f.write("\n}\n")
+
+    # --- Simulation ---
+    def order(self):
+        """Indices en ordre topologique (Kahn) ; les gates d'une boucle n'y figurent pas."""
+        n = len(self)
+        fs, src = self.fanin_start, self.src
+        # Lecteurs de chaque gate, au format CSR comme les sources
+        count = array('q', bytes(8 * (n + 1)))
+        for s in src:
+            if s >= 0:
+                count[s + 1] += 1
+        for i in range(n):
+            count[i + 1] += count[i]
+        users = array('q', bytes(8 * count[n]))
+        fill = array('q', count)
+        in_degree = array('q', bytes(8 * n))
+        for i in range(n):
+            for j in range(fs[i], fs[i + 1]):
+                s = src[j]
+                if s >= 0:
+                    users[fill[s]] = i
+                    fill[s] += 1
+                    in_degree[i] += 1
+        order = array('q', (i for i in range(n) if in_degree[i] == 0))
+        k = 0
+        while k < len(order):
+            i = order[k]
+            k += 1
+            for j in range(count[i], count[i + 1]):
+                u = users[j]
+                in_degree[u] -= 1
+                if in_degree[u] == 0:
+                    order.append(u)
+        return order
+
+    def simulate(self):
+        """Propage les valeurs des entrées (SRC) ; indéfini si une entrée l'est (comme netlist)."""
+        if self.refs:
+            raise ValueError("Blocs non pris en charge ici : utiliser netlist.compile_circuit")
+        fs, src, src_pin, value, gtype, width = self.fanin_start, self.src, self.src_pin, self.value, self.gtype, self.width
+        split, merge, out, srcs_type = CODE["SPLIT"], CODE["MERGE"], CODE["OUT"], CODE["SRC"]
+        order = self.order()
+        done = set(order)
+        for i in range(len(self)):
+            if i not in done:
+                value[i] = UNKNOWN       # boucle
+        luts = {}
+        for i in order:
+            t = gtype[i]
+            if t == srcs_type:
+                continue
+            ins = []
+            for j in range(fs[i], fs[i + 1]):
+                s = src[j]
+                v = UNKNOWN if s < 0 else value[s]
+                if v == UNKNOWN:
+                    break
+                ins.append((v >> src_pin[j]) & 1 if gtype[s] == split else v)
+            else:
+                if t == out or t == split:
+                    value[i] = ins[0]
+                elif t == merge:
+                    value[i] = sum(b << k for k, b in enumerate(ins))
+                elif width[i] == 1:
+                    key = (t, len(ins))
+                    if key not in luts:
+                        luts[key] = portes.table(TYPES[t], len(ins))
+                    index = 0
+                    for k, b in enumerate(ins):
+                        index |= b << k
+                    value[i] = (luts[key] >> index) & 1
+                else:
+                    value[i] = portes.evaluer_mot(TYPES[t], ins, width[i])
+                continue
+            value[i] = UNKNOWN
+
+
+def from_data(data: dict, base_dir: str | None = None) -> CompactNetlist:
+    """Netlist compacte d'un circuit au format JSON (gates et fils de l'éditeur)."""
+    c = CompactNetlist()
+    n_out = []                           # nombre de sorties de chaque gate, pour vérifier les fils
+    for gd in data.get("gates", []):
+        block = blocs.load_block(gd["ref"], base_dir) if gd["type"] == "BLOCK" else None
+        ins, outs = netlist.pin_widths(gd, block)
+        xy = (gd["x"], gd["y"]) if "x" in gd and "y" in gd else None
+        c.add_gate(gd["gid"], gd["type"], len(ins), gd.get("width") or 1,
+                   gd.get("name"), gd.get("value") if gd["type"] == "SRC" else None, xy, gd.get("ref"))
+        n_out.append(len(outs))
+    fs = c.fanin_start
+    for wd in data.get("wires", []):
+        sg, sp, dg, dp = wd["src_gate"], wd["src_pin"], wd["dst_gate"], wd["dst_pin"]
+        try:
+            s, d = c.index(sg), c.index(dg)
+        except KeyError as e:
+            raise ValueError(f"fil {sg}.{sp} → {dg}.{dp} : gate {e} inexistante") from None
+        if not (0 <= dp < fs[d + 1] - fs[d] and 0 <= sp < n_out[s]):
+            raise ValueError(f"fil {sg}.{sp} → {dg}.{dp} : pin inexistante")
+        c.src[fs[d] + dp] = s
+        c.src_pin[fs[d] + dp] = sp
+    c.next_gid = max(c.next_gid, data.get("next_gid", 1))
+    c.meta = data.get("meta")
+    return c
+
+
+class _ArrayBuilder(echange.Builder):
+    """Import BLIF directement dans les tableaux : aucun dictionnaire par gate ou par fil."""
+    __slots__ = ('net', 'w_src', 'w_src_pin', 'w_dst', 'w_dst_pin')
+
+    def __init__(self):
+        super().__init__()
+        self.net = CompactNetlist()
+        self.w_src = array('q')
+        self.w_src_pin = array('H')
+        self.w_dst = array('q')
+        self.w_dst_pin = array('H')
+
+    def gate(self, gtype, n_inputs=None, name=None, value=None):
+        n = {"SRC": 0, "OUT": 1, "NOT": 1}.get(gtype, n_inputs or 2)
+        return self.net.gid[self.net.add_gate(len(self.net) + 1, gtype, n, 1, name, value)]
+
+    def connect(self, src, gid, pin):
+        if isinstance(src, str):
+            self.pending.append((src, gid, pin))
+        else:
+            self.w_src.append(src[0] - 1)
+            self.w_src_pin.append(src[1])
+            self.w_dst.append(gid - 1)
+            self.w_dst_pin.append(pin)
+
+    def to_data(self, meta=None):
+        for net, gid, pin in self.pending:
+            self.connect(self.resolve(net), gid, pin)
+        self.pending = []
+        c = self.net
+        for s, sp, d, dp in zip(self.w_src, self.w_src_pin, self.w_dst, self.w_dst_pin):
+            c.src[c.fanin_start[d] + dp] = s
+            c.src_pin[c.fanin_start[d] + dp] = sp
+        c.meta = meta
+        return c
+
+
+def read_blif(path: str) -> CompactNetlist:
+    """Netlist compacte lue dans un fichier BLIF (même traduction qu'echange.read_blif)."""
+    return echange.read_blif(path, _ArrayBuilder())
+
+
+def main(argv):
+    if len(argv) not in (1, 2):
+        print("Usage : python compact.py circuit.blif|circuit.json [sortie.json]")
+        return 2
+    start = time.perf_counter()
+    if argv[0].lower().endswith(".blif"):
+        c = read_blif(argv[0])
+    else:
+        with open(argv[0], "r", encoding="utf-8") as f:
+            c = from_data(json.load(f))
+    loaded = time.perf_counter()
+    c.simulate()
+    simulated = time.perf_counter()
+    print(f"{len(c)} gates, {len(c.src)} pins d'entrée : {c.memory() / 1e6:.1f} Mo de tableaux")
+    print(f"Lecture {loaded - start:.2f} s, simulation {simulated - loaded:.2f} s")
+    if len(argv) == 2:
+        c.save(argv[1])
+    return 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(main(sys.argv[1:]))
+    data = {
+        "gates": [
+            {"gid": 1, "type": "SRC", "x": 0, "y": 0, "value": True, "name": "A"},
+            {"gid": 2, "type": "SRC", "x": 0, "y": 80, "value": False, "name": "B"},
+            {"gid": 5, "type": "AND", "x": 200, "y": 40, "value": None, "name": None, "inputs": 2},
+            {"gid": 7, "type": "OUT", "x": 400, "y": 40, "value": None, "name": "S"},
+        ],
+        "wires": [
+            {"src_gate": 1, "src_pin": 0, "dst_gate": 5, "dst_pin": 0},
+            {"src_gate": 2, "src_pin": 0, "dst_gate": 5, "dst_pin": 1},
+            {"src_gate": 5, "src_pin": 0, "dst_gate": 7, "dst_pin": 0},
+        ],
+        "next_gid": 8,
+    }
+    c = from_data(data)
+    assert c.to_data() == data
+    c.simulate()
+    assert c.value[c.index(7)] == 0
+    c.value[c.index(2)] = 1
+    c.simulate()
+    assert c.value[c.index(7)] == 1
+    # Partie affichée : seulement les fils internes à la sélection
+    part = c.to_data(c.window(0, 0, 250, 100))
+    assert [gd["gid"] for gd in part["gates"]] == [1, 2, 5] and len(part["wires"]) == 2
+    # Pin hors limites : refusée au lieu d'écraser le fanin de la gate suivante
+    bad = dict(data, wires=data["wires"] + [{"src_gate": 1, "src_pin": 0, "dst_gate": 5, "dst_pin": 2}])
+    try:
+        from_data(bad)
+        assert False
+    except ValueError as e:
+        assert "pin inexistante" in str(e)
@@ -0,0 +1,311 @@
+# construction.py
+# Construction de circuits par programme (scripts, Jupyter), sans Tk : les
+# gates sont ajoutées dans une netlist compacte (compact.py) et enregistrées au
+# format de saveAndLoad, comme « Sauvegarder… ». Une pin de sortie est désignée
+# par le couple (gid, pin), comme dans echange.Builder.
+#
+#   c = Circuit()
+#   a, b = c.input("A"), c.input("B")
+#   c.output("S", c.gate("XOR", a, b))
+#   c.simulate(A=1, B=0)                       -> {"S": 1}
+#   c.evaluate({"A": [0, 1], "B": [1, 1]})     -> {"S": [1, 0]}
+#   c.save("xor.json")
+#
+# Les sous-circuits s'utilisent comme blocs (gate BLOCK, comme dans l'éditeur)
+# ou recopiés gate par gate (inline). Sans coordonnées, les gates sont
+# disposées automatiquement à l'ouverture dans l'éditeur.
+
+import json
+import os
+
+import blocs
+import compact
+import netlist
+import portes
+import saveAndLoad
+
+
+BATCH_BITS = 12        # vecteurs évalués ensemble (un bit par vecteur dans chaque mot)
+
+_templates = {}        # chemin -> (date, modèle) des sous-circuits recopiés par inline
+
+
+def _template(path, base_dir):
+    """Sous-circuit prêt à recopier : entrées, sorties, gates logiques et fils (lus une fois par fichier)."""
+    mtime = os.path.getmtime(path)
+    cached = _templates.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    data = saveAndLoad.load(path)
+    gates = sorted(data.get("gates", []), key=lambda gd: gd["gid"])
+    ins = [gd["gid"] for gd in gates if gd["type"] == "SRC"]
+    outs = [gd["gid"] for gd in gates if gd["type"] == "OUT"]
+    logic = []
+    for gd in gates:
+        if gd["type"] not in ("SRC", "OUT"):
+            block = blocs.load_block(gd["ref"], base_dir) if gd["type"] == "BLOCK" else None
+            logic.append((gd["gid"], gd["type"], len(netlist.pin_widths(gd, block)[0]), gd.get("width") or 1, gd.get("ref")))
+    wires = [(wd["src_gate"], wd["src_pin"], wd["dst_gate"], wd["dst_pin"]) for wd in data.get("wires", [])]
+    template = (ins, outs, logic, wires)
+    _templates[path] = (mtime, template)
+    return template
+
+
+class Circuit:
+    __slots__ = ('net', 'base_dir', 'inputs', 'outputs', '_index', '_compiled')
+
+    def __init__(self, base_dir: str | None = None):
+        self.net = compact.CompactNetlist()
+        self.base_dir = base_dir     # dossier où chercher les sous-circuits
+        self.inputs = {}             # nom -> gid de la SRC
+        self.outputs = {}            # nom -> gid de l'OUT
+        self._index = {}             # gid -> indice dans la netlist
+        self._compiled = None        # netlist.CompiledCircuit, à refaire après une modification
+
+    @classmethod
+    def load(cls, path: str, base_dir: str | None = None):
+        """Circuit existant (fichier JSON), pour le compléter ou le tester."""
+        self = cls(base_dir)
+        self.net = compact.from_data(saveAndLoad.load(path), base_dir)
+        net = self.net
+        self._index = {gid: i for i, gid in enumerate(net.gid)}
+        for i in range(len(net)):
+            t = net.type_of(i)
+            if t in ("SRC", "OUT"):
+                (self.inputs if t == "SRC" else self.outputs)[net.names.get(i) or str(net.gid[i])] = net.gid[i]
+        return self
+
+    def __len__(self):
+        return len(self.net)
+
+    # --- Construction ---
+    def _add(self, gtype, n_inputs, width=1, name=None, value=None, ref=None):
+        net = self.net
+        gid = net.next_gid
+        self._index[gid] = net.add_gate(gid, gtype, n_inputs, width, name, value, None, ref)
+        self._compiled = None
+        return gid
+
+    def width_of(self, src):
+        """Largeur (bits) de la pin de sortie `src` = (gid, pin)."""
+        i = self._index[src[0]]
+        t = self.net.gtype[i]
+        return 1 if t in (compact.CODE["SPLIT"], compact.CODE["BLOCK"]) else self.net.width[i]
+
+    def connect(self, src, gid, pin):
+        """Relie la pin de sortie `src` = (gid, pin) à l'entrée `pin` de la gate `gid`."""
+        net = self.net
+        try:
+            s, i = self._index[src[0]], self._index[gid]
+        except KeyError as e:
+            raise ValueError(f"Gate inexistante : {e.args[0]}") from None
+        j = net.fanin_start[i] + pin
+        if not 0 <= pin < net.fanin_start[i + 1] - net.fanin_start[i]:
+            raise ValueError(f"Gate {gid} : pas d'entrée {pin}")
+        expected = 1 if net.type_of(i) in ("MERGE", "BLOCK") else net.width[i]
+        if self.width_of(src) != expected:
+            raise ValueError(f"Gate {gid} : largeurs incompatibles ({self.width_of(src)} → {expected} bits)")
+        net.src[j] = s
+        net.src_pin[j] = src[1]
+        self._compiled = None
+
+    def _check_value(self, name, value, width):
+        if not 0 <= value < 1 << width:
+            raise ValueError(f"{name} : valeur {value} hors de 0..{(1 << width) - 1}")
+
+    def input(self, name, width=1, value=0):
+        """Entrée de `width` bits (au plus compact.MAX_WIDTH) ; renvoie sa sortie (gid, 0)."""
+        if name in self.inputs:
+            raise ValueError(f"Entrée déjà définie : {name}")
+        self._check_value(name, int(value), width)
+        gid = self._add("SRC", 0, width, name, value)
+        self.inputs[name] = gid
+        return gid, 0
+
+    def output(self, name, src):
+        if name in self.outputs:
+            raise ValueError(f"Sortie déjà définie : {name}")
+        gid = self._add("OUT", 1, self.width_of(src), name)
+        self.connect(src, gid, 0)
+        self.outputs[name] = gid
+        return gid
+
+    def gate(self, gtype, *srcs, n_inputs=None):
+        """Porte logique (NOT, AND, OR…) sur les pins `srcs` ; renvoie sa sortie (gid, 0).
+
+        Sans `srcs`, les `n_inputs` entrées restent à relier avec connect.
+        """
+        if gtype not in portes.BASES:
+            raise ValueError(f"Type de porte inconnu : {gtype}")
+        n = 1 if gtype == "NOT" else n_inputs or len(srcs) or netlist.N_INPUTS[gtype]
+        if not 1 <= n <= portes.MAX_INPUTS or (srcs and len(srcs) != n):
+            raise ValueError(f"{gtype} : {len(srcs) or n} entrée(s) (max {portes.MAX_INPUTS})")
+        gid = self._add(gtype, n, self.width_of(srcs[0]) if srcs else 1)
+        for pin, s in enumerate(srcs):
+            self.connect(s, gid, pin)
+        return gid, 0
+
+    def split(self, src):
+        """Bits d'un bus, du poids faible au poids fort."""
+        w = self.width_of(src)
+        gid = self._add("SPLIT", 1, w)
+        self.connect(src, gid, 0)
+        return [(gid, b) for b in range(w)]
+
+    def merge(self, bits):
+        """Bus formé des pins d'un bit `bits`, du poids faible au poids fort."""
+        gid = self._add("MERGE", len(bits), len(bits))
+        for pin, s in enumerate(bits):
+            self.connect(s, gid, pin)
+        return gid, 0
+
+    def block(self, ref, *srcs):
+        """Sous-circuit `ref` (fichier JSON) comme une gate BLOCK ; renvoie ses sorties."""
+        sub = blocs.load_block(ref, self.base_dir)
+        n_in, n_out = len(sub.input_names), len(sub.output_names)
+        if len(srcs) != n_in:
+            raise ValueError(f"{sub.title} : {n_in} entrée(s) attendue(s)")
+        gid = self._add("BLOCK", n_in, 1, ref=ref)
+        for pin, s in enumerate(srcs):
+            self.connect(s, gid, pin)
+        return [(gid, j) for j in range(n_out)]
+
+    def inline(self, ref, *srcs):
+        """Recopie les gates du sous-circuit `ref` ; ses entrées (dans l'ordre des gids) sont reliées à `srcs`.
+
+        Renvoie les pins qui pilotent ses sorties, dans l'ordre des gids des OUT.
+        """
+        ins, outs, logic, wires = _template(blocs.resolve(ref, self.base_dir), self.base_dir)
+        if len(srcs) != len(ins):
+            raise ValueError(f"{ref} : {len(ins)} entrée(s) attendue(s)")
+        pins = {(gid, 0): s for gid, s in zip(ins, srcs)}
+        new = {gid: self._add(gtype, n_in, width, ref=r) for gid, gtype, n_in, width, r in logic}
+        driver = {}
+        for sg, sp, dg, dp in wires:
+            if (sg, sp) in pins:
+                s = pins[(sg, sp)]
+            elif sg in new:
+                s = (new[sg], sp)
+            else:
+                continue
+            if dg in new:
+                self.connect(s, new[dg], dp)
+            else:
+                driver[dg] = s
+        return [driver.get(gid) for gid in outs]
+
+    # --- Simulation ---
+    def to_data(self):
+        return self.net.to_data()
+
+    def compiled(self):
+        if self._compiled is None:
+            self._compiled = netlist.compile_circuit(self.to_data(), self.base_dir)
+        return self._compiled
+
+    def evaluate(self, vectors: dict):
+        """Sorties pour un lot de vecteurs : {entrée: [valeurs]} -> {sortie: [valeurs]}.
+
+        Une sortie indéfinie (entrée non reliée, boucle) vaut None. Les vecteurs
+        sont évalués en bit-parallèle, par paquets de 2^BATCH_BITS.
+        """
+        missing = set(self.inputs) - set(vectors)
+        if missing:
+            raise ValueError(f"Valeurs manquantes pour : {', '.join(sorted(missing))}")
+        c = self.compiled()
+        count = len(next(iter(vectors.values()), []))
+        # Bits d'entrée dans l'ordre du circuit compilé (bus : poids fort en premier)
+        by_gid = {gid: vectors[name] for name, gid in self.inputs.items()}
+        in_bits = []
+        k = 0
+        while k < len(c.input_gids):
+            gid = c.input_gids[k]
+            w = self.net.width[self._index[gid]]
+            in_bits += [(by_gid[gid], b) for b in reversed(range(w))]
+            k += w
+        out_gids = {}
+        for k, gid in enumerate(c.output_gids):
+            out_gids.setdefault(gid, []).append(k)
+        results = {name: [] for name in self.outputs}
+
+        step = 1 << BATCH_BITS
+        for start in range(0, count, step):
+            n = min(step, count - start)
+            # Mots écrits en binaire (vecteur 0 à droite) : linéaire en nombre de vecteurs
+            words = [int("".join("1" if v >> bit & 1 else "0" for v in reversed(column[start:start + n])), 2)
+                     for column, bit in in_bits]
+            outs = [(format(val, f"0{n}b")[::-1], format(known, f"0{n}b")[::-1])
+                    for val, known in c.evaluate_outputs(words, (1 << n) - 1)]
+            for name, gid in self.outputs.items():
+                bits = [outs[k] for k in out_gids[gid]]          # poids fort en premier
+                res = results[name]
+                if len(bits) == 1:
+                    res.extend(int(v) if k == "1" else None for v, k in zip(*bits[0]))
+                    continue
+                for r in range(n):
+                    if all(k[r] == "1" for _, k in bits):
+                        res.append(int("".join(v[r] for v, _ in bits), 2))
+                    else:
+                        res.append(None)
+        return results
+
+    def simulate(self, **values):
+        """Un seul vecteur : {sortie: valeur}. Les entrées non données gardent leur valeur."""
+        net = self.net
+        for name, v in values.items():
+            if name not in self.inputs:
+                raise ValueError(f"Entrée inconnue : {name}")
+            i = self._index[self.inputs[name]]
+            self._check_value(name, int(v), net.width[i])
+            net.value[i] = int(v)
+        current = {name: [max(net.value[self._index[gid]], 0)] for name, gid in self.inputs.items()}
+        return {name: col[0] for name, col in self.evaluate(current).items()}
+
+    def save(self, path):
+        """Enregistre au format de saveAndLoad (ouvrable dans l'éditeur)."""
+        self.net.save(path)
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    # Additionneur 4 bits : cellules additionneur_complet recopiées ou en blocs
+    for use_blocks in (False, True):
+        c = Circuit()
+        a = [c.input(f"A{i}") for i in range(4)]
+        b = [c.input(f"B{i}") for i in range(4)]
+        carry = c.input("Cin")
+        for i in range(4):
+            cell = c.block if use_blocks else c.inline
+            s, carry = cell("additionneur_complet.json", a[i], b[i], carry)
+            c.output(f"S{i}", s)
+        c.output("Cout", carry)
+        out = c.simulate(**{"A0": 1, "A1": 1, "B0": 1, "B3": 1})      # 3 + 9 = 12
+        assert [out[f"S{i}"] for i in range(4)] + [out["Cout"]] == [0, 0, 1, 1, 0]
+
+    # Bus : S = A XOR B sur 8 bits, évalué par lot ; même circuit après sauvegarde
+    c = Circuit()
+    s = c.gate("XOR", c.input("A", 8), c.input("B", 8))
+    c.output("S", s)
+    c.output("S0", c.split(s)[0])
+    res = c.evaluate({"A": [0x0F, 0xFF, 3], "B": [0xF0, 0x0F, 1]})
+    assert res == {"S": [0xFF, 0xF0, 2], "S0": [1, 0, 0]}
+    path = os.path.join(tempfile.mkdtemp(), "xor8.json")
+    c.save(path)
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f) == c.to_data()
+    assert Circuit.load(path).evaluate({"A": [0x0F], "B": [0xF0]})["S"] == [0xFF]
+    # Entrée non reliée : indéfini
+    c = Circuit()
+    g, _ = c.gate("AND", n_inputs=2)
+    c.connect(c.input("A"), g, 0)
+    c.output("S", (g, 0))
+    assert c.simulate(A=1) == {"S": None}
+    # Bus limités à compact.MAX_WIDTH bits, valeurs bornées par la largeur
+    for build in (lambda c: c.input("A", 64), lambda c: c.merge([c.input(f"B{i}") for i in range(33)]),
+                  lambda c: c.simulate(A=2)):
+        try:
+            build(c)
+            assert False
+        except ValueError:
+            pass
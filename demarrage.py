@@ -0,0 +1,92 @@
+# demarrage.py
+# Mesure du temps de démarrage : import de main (python -X importtime) et,
+# si un affichage est disponible, délai jusqu'à la première fenêtre dessinée.
+# Chaque mesure se fait dans un nouveau processus, .pyc déjà compilés.
+#
+#   python demarrage.py                  (5 mesures)
+#   python demarrage.py --budget 40      (code de retour 1 si l'import dépasse 40 ms)
+
+import compileall
+import os
+import statistics
+import subprocess
+import sys
+
+
+RUNS = 5
+TOP = 8
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+FIRST_FRAME = """
+import time
+t = time.perf_counter()
+import tkinter
+import main
+root = tkinter.Tk()
+root.geometry("1000x650")
+main.App(root)
+root.update()
+print(time.perf_counter() - t)
+root.destroy()
+"""
+
+
+def import_times():
+    """(temps cumulé de main, {module importé directement par main: temps cumulé}), en µs."""
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                         cwd=HERE, capture_output=True, text=True, check=True).stderr
+    entries = []
+    for line in out.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line[len("import time:"):].split("|")
+            if cumulative.strip().isdigit():
+                entries.append((len(name) - len(name.lstrip()), name.strip(), int(cumulative)))
+    # Sortie en ordre postfixe : les sous-modules de main le précèdent, un cran plus indentés
+    i = next(i for i, (_, name, _) in enumerate(entries) if name == "main")
+    depth = entries[i][0]
+    children = {}
+    for d, name, us in reversed(entries[:i]):
+        if d <= depth:
+            break
+        if d == depth + 2:
+            children[name] = us
+    return entries[i][2], children
+
+
+def first_frame():
+    """Secondes jusqu'à la première fenêtre, ou None sans affichage."""
+    r = subprocess.run([sys.executable, "-c", FIRST_FRAME], cwd=HERE, capture_output=True, text=True)
+    return float(r.stdout) if r.returncode == 0 else None
+
+
+def main(argv):
+    budget = None
+    if "--budget" in argv:
+        budget = float(argv[argv.index("--budget") + 1])
+
+    compileall.compile_dir(HERE, quiet=1)     # .pyc à jour : on mesure l'import, pas la compilation
+    runs = [import_times() for _ in range(RUNS)]
+    total = statistics.median(t for t, _ in runs) / 1000
+    print(f"Import de main : {total:.1f} ms (médiane de {RUNS})")
+
+    # Modules importés par main, du plus coûteux au moins coûteux (temps cumulés médians)
+    names = set().union(*(c for _, c in runs))
+    costs = {n: statistics.median(c.get(n, 0) for _, c in runs) / 1000 for n in names}
+    for name, ms in sorted(costs.items(), key=lambda kv: -kv[1])[:TOP]:
+        print(f"  {name:<28} {ms:6.1f} ms")
+
+    frame = first_frame()
+    if frame is None:
+        print("Première fenêtre : pas d'affichage disponible")
+    else:
+        print(f"Première fenêtre : {1000 * frame:.1f} ms")
+
+    if budget is not None and total > budget:
+        print(f"Budget dépassé ({budget:.0f} ms)")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,385 @@
+# echange.py
+# Échange avec les outils de synthèse : export en Verilog structurel et en
+# BLIF (à partir du circuit compilé, donc aplati au niveau du bit), import
+# d'un fichier BLIF lu ligne à ligne vers le format JSON de saveAndLoad.
+# Le circuit importé n'a pas de coordonnées : il est disposé automatiquement.
+
+import re
+import sys
+from itertools import product
+
+import layout
+import netlist
+import portes
+import saveAndLoad
+
+
+VERILOG_PRIMITIVES = {'NOT': "not", 'AND': "and", 'OR': "or", 'XOR': "xor",
+                      'NAND': "nand", 'NOR': "nor", 'XNOR': "xnor", 'BUF': "buf"}
+
+_IDENT = re.compile(r"[A-Za-z_][A-Za-z0-9_$]*")
+_KEYWORDS = set(VERILOG_PRIMITIVES.values()) | {"module", "endmodule", "input", "output", "wire", "assign"}
+
+
+# --- Export ---
+
+def _ports(names, gids, nets):
+    """Regroupe les bits par gate : [(nom, nets du poids fort au poids faible)]."""
+    ports = []
+    for name, gid, net in zip(names, gids, nets):
+        if ports and ports[-1][0] == gid:
+            ports[-1][2].append(net)
+        else:
+            ports.append((gid, name.split("[")[0], [net]))
+    return [(name, bits) for _, name, bits in ports]
+
+
+def _identifier(name, used):
+    ident = re.sub(r"[^A-Za-z0-9_$]", "_", name.strip()) or "_"
+    if not _IDENT.fullmatch(ident) or ident in _KEYWORDS:
+        ident = "_" + ident
+    base, i = ident, 1
+    while ident in used:
+        ident = f"{base}_{i}"
+        i += 1
+    used.add(ident)
+    return ident
+
+
+class _Names:
+    """Noms des ports et des nets internes, communs aux deux formats."""
+    __slots__ = ('inputs', 'outputs', 'ref', 'used')
+
+    def __init__(self, c: netlist.CompiledCircuit, undef):
+        self.used = set()
+        self.inputs = [(self._port(n), bits) for n, bits in _ports(c.input_names, c.input_gids, c.input_nets)]
+        self.outputs = [(self._port(n), bits) for n, bits in _ports(c.output_names, c.output_gids, c.output_nets)]
+        self.ref = {netlist.NET_UNDEF: undef}
+        for name, bits in self.inputs:
+            for k, net in enumerate(bits):
+                self.ref[net] = self.bit(name, len(bits), k)
+
+    def _port(self, name):
+        return _identifier(name, self.used)
+
+    @staticmethod
+    def bit(name, width, k):
+        return name if width == 1 else f"{name}[{width - 1 - k}]"
+
+    def net(self, n):
+        if n not in self.ref:
+            self.ref[n] = _identifier(f"n{n}", self.used)
+        return self.ref[n]
+
+
+def verilog_lines(data: dict, module="circuit", base_dir=None):
+    """Module Verilog structurel (primitives and/or/… à n entrées), ligne par ligne."""
+    c = netlist.compile_circuit(data, base_dir)
+    names = _Names(c, "1'bx")
+    decl = lambda name, bits: f"[{len(bits) - 1}:0] {name}" if len(bits) > 1 else name
+    ports = ", ".join(name for name, _ in names.inputs + names.outputs)
+    yield f"module {_identifier(module, set())}({ports});"
+    for name, bits in names.inputs:
+        yield f"  input {decl(name, bits)};"
+    for name, bits in names.outputs:
+        yield f"  output {decl(name, bits)};"
+
+    for op, dst, srcs in c.program:
+        yield f"  wire {names.net(dst)};"
+    for op, dst, srcs in c.program:
+        yield f"  {VERILOG_PRIMITIVES[op]} ({names.net(dst)}, {', '.join(names.net(s) for s in srcs)});"
+    for name, bits in names.outputs:
+        for k, net in enumerate(bits):
+            yield f"  assign {names.bit(name, len(bits), k)} = {names.net(net)};"
+    yield "endmodule"
+
+
+def _cover(op, n):
+    """Lignes de couverture BLIF (ensemble des 1) d'une porte à n entrées."""
+    if op in ("BUF", "NOT"):
+        return ["1 1" if op == "BUF" else "0 1"]
+    if op == "AND":
+        return ["1" * n + " 1"]
+    if op == "NOR":
+        return ["0" * n + " 1"]
+    if op in ("OR", "NAND"):
+        lit = "1" if op == "OR" else "0"
+        return ["-" * i + lit + "-" * (n - 1 - i) + " 1" for i in range(n)]
+    parity = 1 if op == "XOR" else 0
+    return ["".join(map(str, bits)) + " 1" for bits in product((0, 1), repeat=n) if sum(bits) % 2 == parity]
+
+
+def blif_lines(data: dict, model="circuit", base_dir=None):
+    """Modèle BLIF combinatoire, ligne par ligne ; un fil non connecté vaut 0."""
+    c = netlist.compile_circuit(data, base_dir)
+    names = _Names(c, None)
+    names.ref[netlist.NET_UNDEF] = _identifier("non_connecte", names.used)
+    yield f".model {_identifier(model, set())}"
+    yield ".inputs " + " ".join(names.bit(n, len(b), k) for n, b in names.inputs for k in range(len(b)))
+    yield ".outputs " + " ".join(names.bit(n, len(b), k) for n, b in names.outputs for k in range(len(b)))
+
+    undef_used = False
+    for op, dst, srcs in c.program:
+        undef_used |= netlist.NET_UNDEF in srcs
+        yield ".names " + " ".join(names.net(s) for s in srcs + (dst,))
+        yield from _cover(op, len(srcs))
+    for name, bits in names.outputs:
+        for k, net in enumerate(bits):
+            undef_used |= net == netlist.NET_UNDEF
+            yield f".names {names.net(net)} {names.bit(name, len(bits), k)}"
+            yield "1 1"
+    if undef_used:
+        yield f".names {names.net(netlist.NET_UNDEF)}"
+    yield ".end"
+
+
+def save_verilog(path: str, data: dict, module="circuit", base_dir=None) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        for line in verilog_lines(data, module, base_dir):
+            f.write(line + "\n")
+
+
+def save_blif(path: str, data: dict, model="circuit", base_dir=None) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        for line in blif_lines(data, model, base_dir):
+            f.write(line + "\n")
+
+
+# --- Import ---
+
+def _statements(f):
+    """Instructions BLIF (listes de mots) : commentaires retirés, lignes "\\" recollées."""
+    pending = []
+    for line in f:
+        line = line.split("#", 1)[0].rstrip()
+        if line.endswith("\\"):
+            pending.extend(line[:-1].split())
+            continue
+        words = pending + line.split()
+        pending = []
+        if words:
+            yield words
+    if pending:
+        yield pending
+
+
+def _lut(rows, n):
+    """Table (au format portes.table) d'une couverture ; None si trop d'entrées."""
+    if n > portes.MAX_INPUTS:
+        return None
+    on = 0
+    for cube, _ in rows:
+        for i in range(1 << n):
+            if all(ch == "-" or int(ch) == (i >> k & 1) for k, ch in enumerate(cube)):
+                on |= 1 << i
+    if rows and rows[0][1] == "0":
+        on ^= (1 << (1 << n)) - 1
+    return on
+
+
+class Builder:
+    """Construit les gates au fil de la lecture ; les nets sont résolus à la fin.
+
+    Seules gate, connect et to_data touchent au format produit (redéfinies par
+    compact.py pour remplir des tableaux).
+    """
+    __slots__ = ('gates', 'wires', 'pending', 'driver', 'alias', 'inverted', 'consts')
+
+    def __init__(self):
+        self.gates = []
+        self.wires = []
+        self.pending = []     # (nom du net, gid destination, pin destination)
+        self.driver = {}      # nom du net -> (gid, pin de sortie)
+        self.alias = {}       # net recopié (tampon) -> net d'origine
+        self.inverted = {}    # net -> gid de son inverseur partagé
+        self.consts = {}
+
+    def gate(self, gtype, n_inputs=None, name=None, value=None):
+        gd = {"gid": len(self.gates) + 1, "type": gtype, "value": value, "name": name}
+        if n_inputs is not None:
+            gd["inputs"] = n_inputs
+        self.gates.append(gd)
+        return gd["gid"]
+
+    def connect(self, src, gid, pin):
+        if isinstance(src, str):
+            self.pending.append((src, gid, pin))
+        else:
+            self.wires.append({"src_gate": src[0], "src_pin": src[1], "dst_gate": gid, "dst_pin": pin})
+
+    def const(self, v):
+        # Pas de porte constante dans l'éditeur : entrée fixée, nommée comme un rail
+        if v not in self.consts:
+            self.consts[v] = (self.gate("SRC", name="VCC" if v else "GND", value=v), 0)
+        return self.consts[v]
+
+    def tree(self, gtype, srcs):
+        """Porte à n entrées, en arbre quand n dépasse portes.MAX_INPUTS."""
+        while len(srcs) > 1:
+            level = []
+            for i in range(0, len(srcs), portes.MAX_INPUTS):
+                group = srcs[i:i + portes.MAX_INPUTS]
+                if len(group) == 1:
+                    level.append(group[0])
+                    continue
+                gid = self.gate(gtype, len(group))
+                for pin, s in enumerate(group):
+                    self.connect(s, gid, pin)
+                level.append((gid, 0))
+            srcs = level
+        return srcs[0]
+
+    def invert(self, src):
+        key = src if isinstance(src, str) else tuple(src)
+        if key not in self.inverted:
+            gid = self.gate("NOT")
+            self.connect(src, gid, 0)
+            self.inverted[key] = (gid, 0)
+        return self.inverted[key]
+
+    def names(self, ins, out, rows):
+        n = len(ins)
+        if n == 0:
+            self.driver[out] = self.const(any(v == "1" for _, v in rows))
+            return
+        lut = _lut(rows, n)
+        if n == 1 and lut == 0b10:
+            self.alias[out] = ins[0]
+            return
+        if lut is not None:
+            for gtype in (("NOT",) if n == 1 else ("AND", "OR", "XOR", "NAND", "NOR", "XNOR")):
+                if lut == portes.table(gtype, n):
+                    gid = self.gate(gtype, None if n == 1 else n)
+                    for pin, net in enumerate(ins):
+                        self.connect(net, gid, pin)
+                    self.driver[out] = (gid, 0)
+                    return
+
+        # Cas général : somme de produits (ET par cube, OU des cubes)
+        terms = []
+        for cube, _ in rows:
+            lits = [net if ch == "1" else self.invert(net) for net, ch in zip(ins, cube) if ch != "-"]
+            if not lits:
+                terms = None     # cube toujours vrai
+                break
+            terms.append(self.tree("AND", lits))
+        if terms is None or not terms:
+            src = self.const(terms is None)
+        else:
+            src = self.tree("OR", terms)
+        if rows and rows[0][1] == "0":
+            src = self.invert(src)
+        self.driver[out] = src
+
+    def resolve(self, net):
+        seen = set()
+        while net in self.alias:
+            if net in seen:
+                raise ValueError(f"Boucle de tampons sur le net « {net} »")
+            seen.add(net)
+            net = self.alias[net]
+        if net not in self.driver:
+            raise ValueError(f"Net sans source : « {net} »")
+        src = self.driver[net]
+        return self.resolve(src) if isinstance(src, str) else src
+
+    def to_data(self, meta=None):
+        for net, gid, pin in self.pending:
+            self.connect(self.resolve(net), gid, pin)
+        self.pending = []
+        data = {"gates": self.gates, "wires": self.wires, "next_gid": len(self.gates) + 1}
+        if meta:
+            data["meta"] = meta
+        return data
+
+
+def read_blif(path: str, builder: Builder | None = None):
+    """Circuit (format JSON, sans coordonnées) lu dans le premier modèle d'un fichier BLIF.
+
+    Avec `builder`, renvoie ce que produit son to_data.
+    """
+    b = builder or Builder()
+    model = None
+    outputs = []
+    cover = None      # (entrées, sortie, lignes) du .names en cours
+
+    def flush():
+        if cover is not None:
+            b.names(*cover)
+
+    with open(path, "r", encoding="utf-8") as f:
+        for words in _statements(f):
+            key = words[0]
+            if not key.startswith("."):
+                if cover is None:
+                    raise ValueError(f"Ligne inattendue : {' '.join(words)}")
+                cube, value = (words if len(words) == 2 else ("", words[0]))
+                if len(cube) != len(cover[0]) or value not in ("0", "1"):
+                    raise ValueError(f"Ligne de couverture invalide pour « {cover[1]} » : {' '.join(words)}")
+                cover[2].append((cube, value))
+                continue
+            flush()
+            cover = None
+            if key == ".model":
+                if model is not None:
+                    break          # seul le premier modèle est importé
+                model = words[1] if len(words) > 1 else "circuit"
+            elif key == ".inputs":
+                for net in words[1:]:
+                    b.driver[net] = (b.gate("SRC", name=net, value=False), 0)
+            elif key == ".outputs":
+                outputs.extend(words[1:])
+            elif key == ".names":
+                cover = (words[1:-1], words[-1], [])
+            elif key == ".end":
+                break
+            elif key in (".latch", ".subckt", ".gate", ".mlatch"):
+                raise ValueError(f"{key} non pris en charge : seuls les circuits combinatoires à plat sont importés")
+        flush()
+
+    for net in outputs:
+        gid = b.gate("OUT", name=net)
+        b.connect(net, gid, 0)
+    return b.to_data({"title": model} if model else None)
+
+
+def main(argv):
+    usage = ("Usage : python echange.py circuit.json sortie.v|sortie.blif\n"
+             "        python echange.py entree.blif sortie.json")
+    if len(argv) != 2:
+        print(usage)
+        return 2
+    src, dst = argv
+    if src.endswith(".blif"):
+        saveAndLoad.save(dst, layout.layout_data(read_blif(src)))
+    elif dst.endswith(".v"):
+        save_verilog(dst, saveAndLoad.load(src))
+    elif dst.endswith(".blif"):
+        save_blif(dst, saveAndLoad.load(src))
+    else:
+        print(usage)
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(main(sys.argv[1:]))
+    import os
+    import tempfile
+    tmp = tempfile.mkdtemp()
+    # Aller-retour BLIF d'un additionneur complet : même table de vérité
+    d = saveAndLoad.load(os.path.join(os.path.dirname(os.path.abspath(__file__)), "circuits", "additionneur_complet.json"))
+    save_blif(os.path.join(tmp, "a.blif"), d)
+    back = read_blif(os.path.join(tmp, "a.blif"))
+    table = lambda data: netlist.truth_table(netlist.compile_circuit(data))[2]
+    assert table(back) == table(d)
+    assert "endmodule" in list(verilog_lines(d))
+    # Couverture quelconque (multiplexeur), ligne coupée et couverture de l'ensemble des 0
+    with open(os.path.join(tmp, "m.blif"), "w") as f:
+        f.write(".model mux\n.inputs s a b\n.outputs y z\n.names s a b y\n01- 1\n1-1 1\n"
+                ".names a b \\\n z\n11 0\n.end\n")
+    m = read_blif(os.path.join(tmp, "m.blif"))
+    words, mask, [(y, ky), (z, kz)] = netlist.truth_table(netlist.compile_circuit(m))
+    s, a, b = words
+    assert ky == kz == mask and y == (~s & a | s & b) & mask and z == ~(a & b) & mask
@@ -0,0 +1,105 @@
+# empreinte.py
+# Empreinte structurelle d'un circuit (format JSON de saveAndLoad) : hachage
+# de Merkle des gates en ordre topologique, à partir des types, des réglages
+# et du câblage seulement. Les positions et les numéros de gate n'y entrent
+# pas : deux copies d'un même circuit ont la même empreinte, et chaque pin de
+# sortie a la sienne (celle du cône qui la calcule).
+
+import hashlib
+from collections import deque
+
+import blocs
+import netlist
+
+
+def _digest(parts) -> str:
+    return hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def structural_hashes(data: dict, base_dir: str | None = None):
+    """(empreinte du circuit, {(gid, pin): empreinte}).
+
+    Clés du dictionnaire : pins de sortie de chaque gate, et (gid, 0) pour une
+    OUT (empreinte de la sortie elle-même). Empreinte du circuit à None si une
+    boucle empêche l'ordre topologique.
+    """
+    gates = data.get("gates", [])
+    by_gid = {gd["gid"]: gd for gd in gates}
+    driver = {(wd["dst_gate"], wd["dst_pin"]): (wd["src_gate"], wd["src_pin"]) for wd in data.get("wires", [])}
+
+    # Rang des entrées/sorties (ordre des colonnes de la table) plutôt que leur gid
+    srcs = sorted(gd["gid"] for gd in gates if gd["type"] == "SRC")
+    outs = sorted(gd["gid"] for gd in gates if gd["type"] == "OUT")
+    rank = {gid: i for i, gid in enumerate(srcs)}
+    rank.update((gid, i) for i, gid in enumerate(outs))
+
+    users = {gid: [] for gid in by_gid}
+    in_degree = {gid: 0 for gid in by_gid}
+    for (dst, _), (src, _) in driver.items():
+        if src in by_gid and dst in by_gid:
+            users[src].append(dst)
+            in_degree[dst] += 1
+
+    keys = {}
+    node_hashes = []
+    queue = deque(gid for gid, d in in_degree.items() if d == 0)
+    while queue:
+        gid = queue.popleft()
+        gd = by_gid[gid]
+        t = gd["type"]
+        block = blocs.load_block(gd["ref"], base_dir) if t == "BLOCK" else None
+        ins, outs_w = netlist.pin_widths(gd, block)
+        name = (gd.get("name") or "").strip()
+        parts = [t, gd.get("width") or 1, len(ins)]
+        if t == "SRC":
+            parts += [rank[gid], len(srcs), name]
+        elif t == "OUT":
+            # Sans nom, une sortie parmi plusieurs est désignée par son gid
+            parts += [rank[gid], name, gid if not name and len(outs) > 1 else None]
+        elif block is not None:
+            parts.append(block.digest)
+        parts += [keys.get(driver[(gid, i)]) if (gid, i) in driver else None for i in range(len(ins))]
+        h = _digest(parts)
+        node_hashes.append(h)
+        if t == "OUT":
+            keys[(gid, 0)] = h
+        for j in range(len(outs_w)):
+            keys[(gid, j)] = _digest([h, j])
+        for u in users[gid]:
+            in_degree[u] -= 1
+            if in_degree[u] == 0:
+                queue.append(u)
+
+    if len(node_hashes) < len(by_gid):
+        return None, keys
+    return _digest(sorted(node_hashes)), keys
+
+
+def circuit_hash(data: dict, base_dir: str | None = None):
+    return structural_hashes(data, base_dir)[0]
+
+
+if __name__ == "__main__":
+    data = {
+        "gates": [
+            {"gid": 1, "type": "SRC", "x": 0, "y": 0, "value": False, "name": "A"},
+            {"gid": 2, "type": "SRC", "x": 0, "y": 0, "value": False, "name": "B"},
+            {"gid": 3, "type": "AND", "x": 0, "y": 0, "value": None, "name": None, "inputs": 2},
+            {"gid": 4, "type": "OUT", "x": 0, "y": 0, "value": None, "name": "S"},
+        ],
+        "wires": [
+            {"src_gate": 1, "src_pin": 0, "dst_gate": 3, "dst_pin": 0},
+            {"src_gate": 2, "src_pin": 0, "dst_gate": 3, "dst_pin": 1},
+            {"src_gate": 3, "src_pin": 0, "dst_gate": 4, "dst_pin": 0},
+        ],
+    }
+    # Gates renumérotées et déplacées : même empreinte
+    moved = {"gates": [dict(gd, gid=gd["gid"] * 10, x=gd["gid"] * 7) for gd in data["gates"]],
+             "wires": [dict(wd, src_gate=wd["src_gate"] * 10, dst_gate=wd["dst_gate"] * 10) for wd in data["wires"]]}
+    assert circuit_hash(moved) == circuit_hash(data)
+    # Type ou câblage changé : empreinte différente
+    other = {"gates": [dict(gd, type="OR") if gd["gid"] == 3 else gd for gd in data["gates"]], "wires": data["wires"]}
+    assert circuit_hash(other) != circuit_hash(data)
+    # Boucle : pas d'empreinte
+    loop = {"gates": data["gates"], "wires": data["wires"] + [{"src_gate": 3, "src_pin": 0, "dst_gate": 3, "dst_pin": 0}]}
+    assert circuit_hash(loop) is None
@@ -0,0 +1,204 @@
+# equivalence.py
+# Vérification d'équivalence entre deux circuits (ex: copie d'élève / référence).
+# Entrées et sorties appariées par nom, évaluation bit-parallèle par blocs,
+# arrêt au premier contre-exemple. Au-delà de MAX_EXHAUSTIVE entrées : preuve par
+# BDD, puis échantillonnage aléatoire si le BDD devient trop grand.
+
+import os
+import random
+import sys
+
+import bdd
+import cache
+import empreinte
+import netlist
+import saveAndLoad
+
+
+MAX_EXHAUSTIVE = 20
+
+
+class EquivalenceResult:
+    __slots__ = ('equivalent', 'method', 'vectors', 'counterexample', 'message')
+
+    def __init__(self, equivalent, method, vectors=0, counterexample=None, message=""):
+        self.equivalent = equivalent
+        self.method = method                  # "structure", "exhaustif", "BDD", "aléatoire" ou "interface"
+        self.vectors = vectors                # nombre de vecteurs évalués
+        self.counterexample = counterexample  # (entrées, {sortie: (a, b)})
+        self.message = message
+
+    def __bool__(self):
+        return self.equivalent
+
+    def describe(self):
+        if self.counterexample is None:
+            return self.message
+        inputs, outputs = self.counterexample
+        fmt = lambda v: "?" if v is None else str(v)
+        ins = ", ".join(f"{k}={v}" for k, v in inputs.items())
+        outs = ", ".join(f"{k}: {fmt(a)} ≠ {fmt(b)}" for k, (a, b) in outputs.items())
+        return f"{self.message}\nContre-exemple : {ins}\nSorties : {outs}"
+
+
+def _as_compiled(circuit, base_dir=None):
+    """Circuit compilé ; `base_dir` : dossier des sous-circuits à chemin relatif (par défaut celui du fichier)."""
+    if isinstance(circuit, netlist.CompiledCircuit):
+        return circuit
+    if isinstance(circuit, str):
+        base_dir = base_dir or os.path.dirname(os.path.abspath(circuit))
+        circuit = saveAndLoad.load(circuit)
+    return netlist.compile_circuit(circuit, base_dir)
+
+
+def _interface_mismatch(a, b):
+    if len(set(a.input_names)) != len(a.input_names) or len(set(b.input_names)) != len(b.input_names):
+        return "Noms d'entrées en double."
+    if set(a.input_names) != set(b.input_names):
+        return f"Entrées différentes : {sorted(a.input_names)} / {sorted(b.input_names)}"
+    if set(a.output_names) != set(b.output_names):
+        return f"Sorties différentes : {sorted(a.output_names)} / {sorted(b.output_names)}"
+    return None
+
+
+def _first_difference(a, b, words, mask, b_order, b_outputs):
+    outs_a = a.evaluate_outputs(words, mask)
+    outs_b = b.evaluate_outputs([words[i] for i in b_order], mask)
+
+    diff = 0
+    for i, (va, ka) in enumerate(outs_a):
+        vb, kb = outs_b[b_outputs[i]]
+        diff |= (va ^ vb) | (ka ^ kb)
+    if not diff:
+        return None
+
+    r = (diff & -diff).bit_length() - 1
+    value = lambda v, k: (v >> r) & 1 if (k >> r) & 1 else None
+    inputs = dict(zip(a.input_names, netlist.bits_at(words, r)))
+    outputs = {}
+    for i, name in enumerate(a.output_names):
+        pa = value(*outs_a[i])
+        pb = value(*outs_b[b_outputs[i]])
+        if pa != pb:
+            outputs[name] = (pa, pb)
+    return inputs, outputs
+
+
+def _bdd_check(a, b, b_order, b_outputs, max_nodes):
+    """Preuve par BDD partagé : mêmes sorties = mêmes nœuds. Lève bdd.NodeLimit si trop grand."""
+    mgr, levels, outs_a = bdd.build_circuit(a, max_nodes)
+    outs_b = bdd.build(b, mgr, [levels[i] for i in b_order])
+    for i, (va, ka) in enumerate(outs_a):
+        vb, kb = outs_b[b_outputs[i]]
+        if (va, ka) == (vb, kb):
+            continue
+        diff = mgr.apply("OR", mgr.apply("XOR", va, vb), mgr.apply("XOR", ka, kb))
+        sat = mgr.any_sat(diff)
+        words = [sat.get(levels[j], 0) for j in range(a.n_inputs)]
+        cex = _first_difference(a, b, words, 1, b_order, b_outputs)
+        return EquivalenceResult(False, "BDD", 1, cex, "Circuits différents.")
+    nodes = mgr.size([v for v, _ in outs_a])
+    return EquivalenceResult(True, "BDD", 0,
+                             message=f"Circuits équivalents (preuve par BDD : {a.n_inputs} entrées, {nodes} nœuds).")
+
+
+def check_equivalence(circuit_a, circuit_b, max_exhaustive=MAX_EXHAUSTIVE,
+                      samples=1 << 16, seed=0, chunk_bits=12, max_nodes=bdd.MAX_NODES,
+                      base_dir_a=None, base_dir_b=None):
+    a = _as_compiled(circuit_a, base_dir_a)
+    b = _as_compiled(circuit_b, base_dir_b)
+
+    mismatch = _interface_mismatch(a, b)
+    if mismatch:
+        return EquivalenceResult(False, "interface", message=mismatch)
+
+    b_order = [a.input_names.index(name) for name in b.input_names]
+    b_outputs = [b.output_names.index(name) for name in a.output_names]
+    n = a.n_inputs
+
+    if n <= max_exhaustive:
+        done = 0
+        for start, count, mask, words in netlist.exhaustive_chunks(n, chunk_bits):
+            cex = _first_difference(a, b, words, mask, b_order, b_outputs)
+            if cex:
+                return EquivalenceResult(False, "exhaustif", done + count, cex, "Circuits différents.")
+            done += count
+        return EquivalenceResult(True, "exhaustif", done, message=f"Circuits équivalents ({done} combinaisons).")
+
+    try:
+        return _bdd_check(a, b, b_order, b_outputs, max_nodes)
+    except bdd.NodeLimit:
+        pass
+
+    rng = random.Random(seed)
+    width = 1 << chunk_bits
+    mask = (1 << width) - 1
+    done = 0
+    while done < samples:
+        words = [rng.getrandbits(width) for _ in range(n)]
+        cex = _first_difference(a, b, words, mask, b_order, b_outputs)
+        if cex:
+            return EquivalenceResult(False, "aléatoire", done + width, cex, "Circuits différents.")
+        done += width
+    return EquivalenceResult(True, "aléatoire", done,
+                             message=f"Aucune différence sur {done} vecteurs aléatoires ({n} entrées).")
+
+
+def cached_check(data_a: dict, data_b: dict, results: cache.ResultCache | None = None,
+                 compiled_a: netlist.CompiledCircuit | None = None, key_a: str | None = None,
+                 base_dir_a: str | None = None, base_dir_b: str | None = None):
+    """check_equivalence sur deux circuits JSON, en s'appuyant sur leurs empreintes.
+
+    Même structure : équivalents sans calcul. Sinon, le verdict d'une paire
+    déjà comparée (copie identique rendue deux fois) est relu dans le cache.
+    `compiled_a` et `key_a` : circuit A déjà compilé et son empreinte, quand il
+    est comparé à de nombreuses copies. `base_dir_a`, `base_dir_b` : dossiers
+    des fichiers, pour les sous-circuits à chemin relatif.
+    """
+    if key_a is None:
+        key_a = empreinte.circuit_hash(data_a, base_dir_a)
+    key_b = empreinte.circuit_hash(data_b, base_dir_b)
+    if key_a is not None and key_a == key_b:
+        return EquivalenceResult(True, "structure", message="Circuits de même structure.")
+    pair = f"{key_a}-{key_b}" if key_a and key_b else None
+    if results is not None:
+        hit = results.get("equivalence", pair)
+        if hit is not None:
+            return EquivalenceResult(*hit)
+    res = check_equivalence(data_a if compiled_a is None else compiled_a, data_b,
+                            base_dir_a=base_dir_a, base_dir_b=base_dir_b)
+    if results is not None:
+        results.put("equivalence", pair, [res.equivalent, res.method, res.vectors, res.counterexample, res.message])
+    return res
+
+
+def main(argv):
+    if len(argv) < 2:
+        print("Usage : python equivalence.py reference.json copie1.json [copie2.json ...]")
+        return 2
+
+    # Référence compilée et empreinte calculée une seule fois pour toutes les copies
+    reference = saveAndLoad.load(argv[0])
+    ref_dir = os.path.dirname(os.path.abspath(argv[0]))
+    compiled = netlist.compile_circuit(reference, ref_dir)
+    key = empreinte.circuit_hash(reference, ref_dir)
+    results = cache.ResultCache()
+    all_ok = True
+    for path in argv[1:]:
+        try:
+            res = cached_check(reference, saveAndLoad.load(path), results, compiled, key,
+                               ref_dir, os.path.dirname(os.path.abspath(path)))
+        except Exception as e:
+            all_ok = False
+            print(f"{path}: ERREUR ({e})")
+            continue
+        all_ok &= res.equivalent
+        verdict = "OK" if res.equivalent else "DIFFÉRENT"
+        print(f"{path}: {verdict} [{res.method}, {res.vectors} vecteurs]")
+        if not res.equivalent:
+            print("  " + res.describe().replace("\n", "\n  "))
+    return 0 if all_ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,347 @@
+# fautes.py
+# Simulation de fautes de collage (stuck-at 0 / 1) sur chaque pin du circuit,
+# en parallèle sur les fautes : un mot regroupe 64 copies du circuit portant
+# chacune sa faute, et chaque copie reçoit un bloc de 64 vecteurs (un entier
+# de 64 × 64 bits par net). Une faute est détectée quand une sortie diffère du
+# circuit sans faute ; les fautes détectées sont retirées avant le bloc de
+# vecteurs suivant. Le coût suit donc le nombre de fautes / 64.
+
+import heapq
+import os
+import sys
+import time
+
+import netlist
+import saveAndLoad
+import simulation
+
+
+WORD = 64              # circuits fautifs simulés ensemble
+BLOCK = 64             # vecteurs par passe (au-delà, les entiers trop larges ralentissent)
+MAX_EXHAUSTIVE = 12    # au-delà : vecteurs aléatoires
+RANDOM_VECTORS = 1024
+
+
+class FaultReport:
+    __slots__ = ('faults', 'detected', 'undetected', 'vectors', 'passes', 'seconds', 'labels')
+
+    def __init__(self):
+        self.faults = 0
+        self.detected = 0
+        self.undetected = []     # (gid, "in"/"out", pin, bit (None hors bus), valeur collée)
+        self.vectors = 0
+        self.passes = 0          # simulations d'un mot de fautes sur un bloc de vecteurs
+        self.seconds = 0.0
+        self.labels = {}
+
+    @property
+    def coverage(self):
+        return self.detected / self.faults if self.faults else 1.0
+
+    def fault_name(self, fault):
+        gid, kind, pin, bit, value = fault
+        side = "entrée" if kind == "in" else "sortie"
+        return f"{self.labels.get(gid, gid)} {side} {pin}{'' if bit is None else f'[{bit}]'} collée à {value}"
+
+    def describe(self):
+        lines = [f"Couverture de fautes : {self.detected}/{self.faults} ({100 * self.coverage:.1f} %) "
+                 f"avec {self.vectors} vecteurs",
+                 f"{self.passes} passes ({WORD} fautes × {BLOCK} vecteurs) en {self.seconds:.3f} s"]
+        if self.undetected:
+            lines.append("Fautes non détectées :")
+            lines.extend("  " + self.fault_name(f) for f in self.undetected[:30])
+            if len(self.undetected) > 30:
+                lines.append(f"  … et {len(self.undetected) - 30} autres")
+        return "\n".join(lines)
+
+
+def fault_sites(data: dict, c: netlist.CompiledCircuit):
+    """Fautes et points d'injection : [(faute, site)] avec site =
+    ("net", net) pour une sortie de gate, ("read", [(n° opération, position)])
+    pour une entrée de gate, ("out", n° de sortie) pour l'entrée d'une OUT.
+    """
+    types = {gd["gid"]: gd["type"] for gd in data.get("gates", [])}
+    first_op = {}
+    ops_of = {}
+    for k, gid in enumerate(c.op_gids):
+        first_op.setdefault(gid, k)
+        ops_of.setdefault(gid, []).append(k)
+    outputs_of = {}
+    for o, gid in enumerate(c.output_gids):
+        outputs_of.setdefault(gid, []).append(o)
+
+    sites = []
+    for (gid, pin), nets in c.net_of.items():
+        for b, net in enumerate(nets):
+            sites.append(((gid, "out", pin, b if len(nets) > 1 else None), ("net", net)))
+
+    for gid, pins in c.in_nets_of.items():
+        t = types[gid]
+        for i, nets in enumerate(pins):
+            for b, net in enumerate(nets):
+                if t == "OUT":
+                    site = ("out", outputs_of[gid][len(nets) - 1 - b])    # sorties : poids fort en premier
+                elif gid not in first_op:
+                    continue                                              # gate dans une boucle
+                elif t == "SPLIT":
+                    site = ("read", [(first_op[gid] + b, 0)])
+                elif t == "MERGE":
+                    site = ("read", [(first_op[gid] + i, 0)])
+                elif t == "BLOCK":
+                    # Toutes les lectures du port à l'intérieur du bloc
+                    site = ("read", [(k, p) for k in ops_of[gid] for p, s in enumerate(c.program[k][2]) if s == net])
+                else:
+                    site = ("read", [(first_op[gid] + b, i)])
+                sites.append(((gid, "in", i, b if len(nets) > 1 else None), site))
+
+    sites.sort(key=lambda fs: fs[0][0])     # fautes voisines dans le même mot : cônes communs
+    return [(f + (v,), site) for f, site in sites for v in (0, 1)]
+
+
+def _forces(group, count):
+    """Masques de collage d'un mot de fautes, rangés par point d'injection.
+
+    La faute j occupe les bits j*count … j*count + count - 1 (un par vecteur).
+    """
+    block = (1 << count) - 1
+    net_force, read_force, out_force = {}, {}, {}
+    for j, (fault, site) in enumerate(group):
+        if site[0] == "net":
+            targets = [(net_force, site[1])]
+        elif site[0] == "out":
+            targets = [(out_force, site[1])]
+        else:
+            targets = [(read_force.setdefault(k, {}), pos) for k, pos in site[1]]
+        for table, key in targets:
+            force = table.setdefault(key, [0, 0])    # [collage à 0, collage à 1]
+            force[fault[4]] |= block << (j * count)
+    return net_force, read_force, out_force
+
+
+class _Fanout:
+    """Lecteurs de chaque net, limités aux nets qui atteignent une sortie."""
+    __slots__ = ('c', 'readers', 'driver_op', 'live')
+
+    def __init__(self, c: netlist.CompiledCircuit):
+        self.c = c
+        self.driver_op = driver_op = {dst: k for k, (_, dst, _) in enumerate(c.program)}
+        # Nets qui atteignent une sortie : une faute ailleurs ne peut rien révéler
+        self.live = set()
+        stack = list(c.output_nets)
+        while stack:
+            n = stack.pop()
+            if n not in self.live:
+                self.live.add(n)
+                k = driver_op.get(n)
+                if k is not None:
+                    stack.extend(c.program[k][2])
+        self.readers = {}
+        for k, (_, dst, srcs) in enumerate(c.program):
+            if dst in self.live:
+                for s in srcs:
+                    self.readers.setdefault(s, []).append(k)
+
+    def observable(self, site):
+        if site[0] == "net":
+            return site[1] in self.live
+        if site[0] == "read":
+            return any(self.c.program[k][1] in self.live for k, _ in site[1])
+        return True
+
+
+def _run_word(fanout, group, count, good_val, good_known):
+    """Simule un mot de fautes sur un paquet de `count` vecteurs : masque des fautes détectées.
+
+    Un seul entier par net porte les len(group) circuits fautifs × count
+    vecteurs. Propagation par événements : seuls les nets dont la valeur
+    diffère du circuit sans faute sont recalculés.
+    """
+    c = fanout.c
+    program = c.program
+    readers = fanout.readers
+    block = (1 << count) - 1
+    rep = 0                  # recopie un mot du circuit sans faute dans chaque bloc
+    for j in range(len(group)):
+        rep |= 1 << (j * count)
+    full = block * rep
+    net_force, read_force, out_force = _forces(group, count)
+    ops = netlist.BIT_OPS
+
+    diff = {}                # net -> (valeurs, connus) des circuits fautifs, si ≠ sans faute
+    pending = sorted(read_force)
+    for net, (s0, s1) in net_force.items():
+        k = fanout.driver_op.get(net)
+        if k is not None:
+            pending.append(k)
+            continue
+        v, kn = good_val[net] * rep, good_known[net] * rep          # entrée du circuit
+        fv, fk = (v | s1) & ~s0, kn | s0 | s1
+        if (fv, fk) != (v, kn):
+            diff[net] = (fv, fk)
+            pending.extend(readers.get(net, ()))
+    heapq.heapify(pending)
+
+    done = -1
+    while pending:
+        k = heapq.heappop(pending)
+        if k == done:
+            continue             # ordre topologique : les doublons sortent à la suite
+        done = k
+        op, dst, srcs = program[k]
+        tv = []
+        tk = []
+        for s in srcs:
+            d = diff.get(s)
+            if d is None:
+                tv.append(good_val[s] * rep)
+                tk.append(good_known[s] * rep)
+            else:
+                tv.append(d[0])
+                tk.append(d[1])
+        fr = read_force.get(k)
+        if fr is not None:
+            for pos, (s0, s1) in fr.items():
+                tv[pos] = (tv[pos] | s1) & ~s0
+                tk[pos] |= s0 | s1
+        kn = full
+        for x in tk:
+            kn &= x
+        v = ops[op](tv, range(len(srcs)), full) & kn
+        f = net_force.get(dst)
+        if f is not None:
+            v = (v | f[1]) & ~f[0]
+            kn |= f[0] | f[1]
+        if v != good_val[dst] * rep or kn != good_known[dst] * rep:
+            diff[dst] = (v, kn)
+            for u in readers.get(dst, ()):
+                heapq.heappush(pending, u)
+
+    # Détection : sortie connue des deux côtés et différente du circuit sans faute
+    seen = 0
+    for o, net in enumerate(c.output_nets):
+        gv, gk = good_val[net] * rep, good_known[net] * rep
+        v, kn = diff.get(net, (gv, gk))
+        f = out_force.get(o)
+        if f is not None:
+            v = (v | f[1]) & ~f[0]
+            kn |= f[0] | f[1]
+        seen |= gk & kn & (v ^ gv)
+    detected = 0
+    for j in range(len(group)):
+        if (seen >> (j * count)) & block:
+            detected |= 1 << j
+    return detected
+
+
+def exhaustive_vectors(n):
+    """Table complète, par paquets : [(nb de vecteurs, mots d'entrée)]."""
+    return [(count, words) for _, count, _, words in netlist.exhaustive_chunks(n)]
+
+
+def random_vectors(n, count=RANDOM_VECTORS, seed=0):
+    return [(k, words) for k, _, words, _ in simulation.random_batches(n, count, seed)]
+
+
+def _blocks(batches):
+    """Redécoupe les paquets en blocs d'au plus BLOCK vecteurs."""
+    for count, words in batches:
+        for start in range(0, count, BLOCK):
+            k = min(BLOCK, count - start)
+            yield k, [(w >> start) & ((1 << k) - 1) for w in words]
+
+
+def run(data: dict, batches=None, base_dir=None):
+    """Couverture des fautes de collage de toutes les pins.
+
+    `batches` : [(nb de vecteurs, mots d'entrée)], un bit par vecteur ; par défaut
+    la table complète (jusqu'à MAX_EXHAUSTIVE entrées), sinon RANDOM_VECTORS
+    vecteurs aléatoires.
+    """
+    c = netlist.compile_circuit(data, base_dir)
+    if batches is None:
+        n = c.n_inputs
+        batches = exhaustive_vectors(n) if n <= MAX_EXHAUSTIVE else random_vectors(n)
+
+    report = FaultReport()
+    report.labels = {gd["gid"]: (gd.get("name") or "").strip() or f"{gd['type']} #{gd['gid']}"
+                     for gd in data.get("gates", [])}
+    report.vectors = sum(count for count, _ in batches)
+    start = time.perf_counter()
+
+    sites = fault_sites(data, c)
+    report.faults = len(sites)
+    fanout = _Fanout(c)
+    # Après chaque bloc, les fautes détectées sont retirées et les autres
+    # regroupées par mots de WORD : les derniers blocs ne coûtent presque rien.
+    # Une faute sans chemin vers une sortie n'est pas simulée.
+    remaining = [fs for fs in sites if fanout.observable(fs[1])]
+    missed = {fault for fault, site in sites if not fanout.observable(site)}
+    for count, words in _blocks(batches):
+        if not remaining:
+            break
+        good_val, good_known = c.evaluate(words, (1 << count) - 1)   # une fois par bloc
+        left = []
+        for i in range(0, len(remaining), WORD):
+            group = remaining[i:i + WORD]
+            detected = _run_word(fanout, group, count, good_val, good_known)
+            report.passes += 1
+            left.extend(fs for j, fs in enumerate(group) if not (detected >> j) & 1)
+        remaining = left
+    missed.update(fault for fault, _ in remaining)
+    report.detected = report.faults - len(missed)
+    report.undetected = [fault for fault, _ in sites if fault in missed]
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+def main(argv):
+    usage = "Usage : python fautes.py circuit.json [--aleatoire N] [--graine G]"
+    args = list(argv)
+    count, seed = None, 0
+    try:
+        if "--aleatoire" in args:
+            i = args.index("--aleatoire")
+            count = int(args[i + 1])
+            del args[i:i + 2]
+        if "--graine" in args:
+            i = args.index("--graine")
+            seed = int(args[i + 1])
+            del args[i:i + 2]
+    except (IndexError, ValueError):
+        print(usage)
+        return 2
+    if len(args) != 1:
+        print(usage)
+        return 2
+
+    data = saveAndLoad.load(args[0])
+    base_dir = os.path.dirname(os.path.abspath(args[0]))
+    batches = None
+    if count is not None:
+        batches = random_vectors(netlist.compile_circuit(data, base_dir).n_inputs, count, seed)
+    print(run(data, batches, base_dir).describe())
+    return 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(main(sys.argv[1:]))
+    # A, B -> ET -> S : table complète, toutes les fautes détectées
+    data = {
+        "gates": [
+            {"gid": 1, "type": "SRC", "x": 0, "y": 0, "value": False, "name": "A"},
+            {"gid": 2, "type": "SRC", "x": 0, "y": 0, "value": False, "name": "B"},
+            {"gid": 3, "type": "AND", "x": 0, "y": 0, "value": None, "name": None},
+            {"gid": 4, "type": "OUT", "x": 0, "y": 0, "value": None, "name": "S"},
+        ],
+        "wires": [
+            {"src_gate": 1, "src_pin": 0, "dst_gate": 3, "dst_pin": 0},
+            {"src_gate": 2, "src_pin": 0, "dst_gate": 3, "dst_pin": 1},
+            {"src_gate": 3, "src_pin": 0, "dst_gate": 4, "dst_pin": 0},
+        ],
+    }
+    r = run(data)
+    assert r.faults == 12 and r.detected == 12
+    # Seul le vecteur A=1, B=1 : les collages à 1 des entrées ne sont pas vus
+    r = run(data, [(1, [1, 1])])
+    assert r.detected == 6 and all(f[4] == 1 for f in r.undetected)
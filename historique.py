@@ -0,0 +1,330 @@
+# historique.py
+# Annuler / rétablir par journal de commandes : chaque modification est une
+# petite commande (delta) qui sait s'appliquer et s'annuler sur l'App, sans
+# copie du circuit. Les commandes gardent une référence vers les objets
+# Gate/Wire concernés, réinsérés tels quels lors d'un rétablissement.
+
+from collections import deque
+
+
+MAX_HISTORY = 1000
+
+
+class Command:
+    __slots__ = ()
+
+    def apply(self, app):
+        raise NotImplementedError
+
+    def revert(self, app):
+        raise NotImplementedError
+
+    def as_dict(self):
+        """Description de la commande (journal de sauvegarde automatique)."""
+        raise NotImplementedError
+
+    def undo_dict(self):
+        """Description de l'opération inverse."""
+        raise NotImplementedError
+
+
+class AddGate(Command):
+    __slots__ = ('gate',)
+
+    def __init__(self, gate):
+        self.gate = gate
+
+    def apply(self, app):
+        app._insert_gate(self.gate)
+
+    def revert(self, app):
+        app._remove_gate(self.gate)
+
+    def as_dict(self):
+        return {"op": "add_gate", "gate": self.gate.as_dict()}
+
+    def undo_dict(self):
+        return {"op": "delete_gate", "gid": self.gate.gid}
+
+
+class DeleteGate(Command):
+    __slots__ = ('gate', 'wires')
+
+    def __init__(self, gate, wires):
+        self.gate = gate
+        self.wires = wires
+
+    def apply(self, app):
+        for w in self.wires:
+            app.delete_wire(w)
+        app._remove_gate(self.gate)
+
+    def revert(self, app):
+        app._insert_gate(self.gate)
+        for w in self.wires:
+            app._insert_wire(w)
+
+    def as_dict(self):
+        return {"op": "delete_gate", "gid": self.gate.gid}
+
+    def undo_dict(self):
+        return {"op": "batch", "commands": [{"op": "add_gate", "gate": self.gate.as_dict()}]
+                + [{"op": "add_wire", "wire": w.as_dict()} for w in self.wires]}
+
+
+class AddWire(Command):
+    __slots__ = ('wire',)
+
+    def __init__(self, wire):
+        self.wire = wire
+
+    def apply(self, app):
+        app._insert_wire(self.wire)
+
+    def revert(self, app):
+        app.delete_wire(self.wire)
+
+    def as_dict(self):
+        return {"op": "add_wire", "wire": self.wire.as_dict()}
+
+    def undo_dict(self):
+        return {"op": "delete_wire", "wire": self.wire.as_dict()}
+
+
+class DeleteWire(AddWire):
+    __slots__ = ()
+
+    def apply(self, app):
+        AddWire.revert(self, app)
+
+    def revert(self, app):
+        AddWire.apply(self, app)
+
+    def as_dict(self):
+        return AddWire.undo_dict(self)
+
+    def undo_dict(self):
+        return AddWire.as_dict(self)
+
+
+class MoveGate(Command):
+    __slots__ = ('gate', 'old', 'new')
+
+    def __init__(self, gate, old, new):
+        self.gate = gate
+        self.old = old
+        self.new = new
+
+    def apply(self, app):
+        app.move_gate(self.gate, *self.new)
+
+    def revert(self, app):
+        app.move_gate(self.gate, *self.old)
+
+    def as_dict(self):
+        return {"op": "move", "gid": self.gate.gid, "x": self.new[0], "y": self.new[1]}
+
+    def undo_dict(self):
+        return {"op": "move", "gid": self.gate.gid, "x": self.old[0], "y": self.old[1]}
+
+
+class MoveGates(Command):
+    """Déplacement groupé d'une sélection."""
+    __slots__ = ('gates', 'dx', 'dy')
+
+    def __init__(self, gates, dx, dy):
+        self.gates = list(gates)
+        self.dx = dx
+        self.dy = dy
+
+    def apply(self, app):
+        app.move_gates(self.gates, self.dx, self.dy)
+
+    def revert(self, app):
+        app.move_gates(self.gates, -self.dx, -self.dy)
+
+    def as_dict(self):
+        return {"op": "shift", "gids": [g.gid for g in self.gates], "dx": self.dx, "dy": self.dy}
+
+    def undo_dict(self):
+        return {"op": "shift", "gids": [g.gid for g in self.gates], "dx": -self.dx, "dy": -self.dy}
+
+
+class SetPositions(Command):
+    """Nouvelles positions pour plusieurs gates (disposition automatique)."""
+    __slots__ = ('moves',)
+
+    def __init__(self, moves):
+        self.moves = list(moves)    # (gate, ancienne position, nouvelle position)
+
+    def apply(self, app):
+        app.place_gates([(g, new) for g, _, new in self.moves])
+
+    def revert(self, app):
+        app.place_gates([(g, old) for g, old, _ in self.moves])
+
+    def as_dict(self):
+        return {"op": "batch", "commands": [{"op": "move", "gid": g.gid, "x": x, "y": y} for g, _, (x, y) in self.moves]}
+
+    def undo_dict(self):
+        return {"op": "batch", "commands": [{"op": "move", "gid": g.gid, "x": x, "y": y} for g, (x, y), _ in self.moves]}
+
+
+class DeleteGates(Command):
+    """Suppression groupée : les fils touchés sont retirés en un seul passage."""
+    __slots__ = ('gates', 'wires')
+
+    def __init__(self, gates, wires):
+        self.gates = list(gates)
+        self.wires = wires
+
+    def apply(self, app):
+        app.delete_gates(self.gates)
+
+    def revert(self, app):
+        for g in self.gates:
+            app._insert_gate(g)
+        for w in self.wires:
+            app._insert_wire(w)
+
+    def as_dict(self):
+        return {"op": "batch", "commands": [{"op": "delete_gate", "gid": g.gid} for g in self.gates]}
+
+    def undo_dict(self):
+        return {"op": "batch", "commands": [{"op": "add_gate", "gate": g.as_dict()} for g in self.gates]
+                + [{"op": "add_wire", "wire": w.as_dict()} for w in self.wires]}
+
+
+class SetValue(Command):
+    """Changement de valeur d'une entrée (bascule ou valeur de bus)."""
+    __slots__ = ('gate', 'old', 'new')
+
+    def __init__(self, gate, old, new):
+        self.gate = gate
+        self.old = old
+        self.new = new
+
+    def apply(self, app):
+        self.gate.value = self.new
+
+    def revert(self, app):
+        self.gate.value = self.old
+
+    def as_dict(self):
+        return {"op": "set_value", "gid": self.gate.gid, "value": self.new}
+
+    def undo_dict(self):
+        return {"op": "set_value", "gid": self.gate.gid, "value": self.old}
+
+
+class Rename(SetValue):
+    __slots__ = ()
+
+    def apply(self, app):
+        app.rename_gate(self.gate, self.new)
+
+    def revert(self, app):
+        app.rename_gate(self.gate, self.old)
+
+    def as_dict(self):
+        return {"op": "rename", "gid": self.gate.gid, "name": self.new}
+
+    def undo_dict(self):
+        return {"op": "rename", "gid": self.gate.gid, "name": self.old}
+
+
+class SetInputCount(Command):
+    __slots__ = ('gate', 'old', 'new', 'wires')
+
+    def __init__(self, gate, old, new, wires):
+        self.gate = gate
+        self.old = old
+        self.new = new
+        self.wires = wires      # fils retirés avec les pins supprimées
+
+    def apply(self, app):
+        for w in self.wires:
+            app.delete_wire(w)
+        app._resize_gate(self.gate, self.new)
+
+    def revert(self, app):
+        app._resize_gate(self.gate, self.old)
+        for w in self.wires:
+            app._insert_wire(w)
+
+    def as_dict(self):
+        return {"op": "set_inputs", "gid": self.gate.gid, "inputs": self.new}
+
+    def undo_dict(self):
+        return {"op": "batch", "commands": [{"op": "set_inputs", "gid": self.gate.gid, "inputs": self.old}]
+                + [{"op": "add_wire", "wire": w.as_dict()} for w in self.wires]}
+
+
+class Batch(Command):
+    """Plusieurs commandes annulées / rétablies d'un seul coup."""
+    __slots__ = ('commands',)
+
+    def __init__(self, commands):
+        self.commands = list(commands)
+
+    def apply(self, app):
+        for c in self.commands:
+            c.apply(app)
+
+    def revert(self, app):
+        for c in reversed(self.commands):
+            c.revert(app)
+
+    def as_dict(self):
+        return {"op": "batch", "commands": [c.as_dict() for c in self.commands]}
+
+    def undo_dict(self):
+        return {"op": "batch", "commands": [c.undo_dict() for c in reversed(self.commands)]}
+
+
+class History:
+    def __init__(self, app, max_len=MAX_HISTORY):
+        self.app = app
+        self.undo_stack = deque(maxlen=max_len)
+        self.redo_stack = []
+        self.listeners = []     # fonctions appelées avec (commande, sens) après chaque changement
+
+    def record(self, cmd: Command):
+        """Enregistre une commande déjà appliquée par l'interface."""
+        self.undo_stack.append(cmd)
+        self.redo_stack.clear()
+        self._notify(cmd, "do")
+
+    def execute(self, cmd: Command):
+        cmd.apply(self.app)
+        self.record(cmd)
+        self.app.simulate()
+
+    def undo(self):
+        if not self.undo_stack:
+            return False
+        cmd = self.undo_stack.pop()
+        cmd.revert(self.app)
+        self.redo_stack.append(cmd)
+        self.app.simulate()
+        self._notify(cmd, "undo")
+        return True
+
+    def redo(self):
+        if not self.redo_stack:
+            return False
+        cmd = self.redo_stack.pop()
+        cmd.apply(self.app)
+        self.undo_stack.append(cmd)
+        self.app.simulate()
+        self._notify(cmd, "redo")
+        return True
+
+    def clear(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self._notify(None, "clear")
+
+    def _notify(self, cmd, direction):
+        for f in self.listeners:
+            f(cmd, direction)
@@ -0,0 +1,214 @@
+# journal.py
+# Sauvegarde automatique : chaque modification (commande de l'historique) est
+# ajoutée en fin d'un journal JSON Lines placé à côté du fichier de travail.
+# La première ligne décrit l'état de départ (fichier d'origine ou instantané
+# complet) ; au repos, le journal est compacté en un seul instantané.
+# Le journal d'un circuit sans nom va dans le dossier de cache de l'utilisateur.
+# Si le journal ne peut pas être écrit (dossier en lecture seule, disque
+# plein…), la sauvegarde automatique est coupée au lieu d'interrompre l'édition.
+
+import json
+import os
+
+import cache
+import saveAndLoad
+
+
+UNTITLED = ".sans_titre.journal"
+
+
+def journal_path(path: str | None, base_dir: str | None = None) -> str:
+    """Journal associé au fichier de travail (ex: .additionneur.json.journal).
+
+    Circuit sans nom : dans `base_dir`, par défaut le dossier de cache de l'utilisateur.
+    """
+    if path is None:
+        return os.path.join(base_dir or cache.default_dir(), UNTITLED)
+    d, name = os.path.split(os.path.abspath(path))
+    return os.path.join(d, f".{name}.journal")
+
+
+def base_header(path: str) -> dict:
+    return {"op": "base", "path": os.path.abspath(path)}
+
+
+def snapshot_header(data: dict) -> dict:
+    return {"op": "snapshot", "data": data}
+
+
+class Journal:
+    __slots__ = ('path', 'header', 'f', 'count', 'failed')
+
+    def __init__(self, path: str, header: dict | None = None):
+        self.path = path
+        self.header = header or snapshot_header({})
+        self.f = None
+        self.count = 0      # opérations écrites depuis le dernier instantané
+        self.failed = False  # écriture impossible : sauvegarde automatique coupée jusqu'au prochain départ
+
+    @property
+    def dirty(self):
+        """Vrai si des modifications ont été faites depuis le dernier départ (journalisées ou non)."""
+        return self.f is not None or self.failed
+
+    def reset(self, path: str, header: dict):
+        """Repart d'un nouvel état de départ ; le fichier n'est créé qu'à la première modification."""
+        self.discard()
+        self.path = path
+        self.header = header
+        self.failed = False
+
+    def append(self, op: dict) -> bool:
+        """Note l'opération ; False si le journal ne peut pas être écrit."""
+        if self.failed:
+            return False
+        try:
+            if self.f is None:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                self.f = open(self.path, "w", encoding="utf-8")
+                self._write(self.header)
+            self._write(op)
+            self.f.flush()
+        except OSError:
+            self._fail()
+            return False
+        self.count += 1
+        return True
+
+    def compact(self, data: dict) -> bool:
+        """Remplace le journal par un instantané unique (écriture atomique) ; False en cas d'échec."""
+        if self.failed:
+            return False
+        self.header = snapshot_header(data)
+        tmp = self.path + ".tmp"
+        try:
+            self.close()
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(json.dumps(self.header, ensure_ascii=False) + "\n")
+            os.replace(tmp, self.path)
+            self.f = open(self.path, "a", encoding="utf-8")
+        except OSError:
+            self._fail()
+            return False
+        self.count = 0
+        return True
+
+    def _fail(self):
+        self.failed = True
+        try:
+            self.close()
+        except OSError:
+            self.f = None
+
+    def close(self):
+        if self.f is not None:
+            f, self.f = self.f, None
+            f.close()
+
+    def discard(self):
+        """Supprime le journal (circuit sauvegardé ou abandonné)."""
+        self.count = 0
+        try:
+            self.close()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+        except OSError:
+            pass             # journal jamais écrit ou dossier en lecture seule
+
+    def _write(self, entry):
+        self.f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+
+def read(path: str):
+    """(en-tête, opérations) ; une dernière ligne tronquée (plantage) est ignorée."""
+    entries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+    if not entries:
+        return None, []
+    return entries[0], entries[1:]
+
+
+class _State:
+    """Circuit au format JSON, indexé pour rejouer les opérations du journal."""
+    __slots__ = ('gates', 'wires', 'next_gid', 'meta')
+
+    def __init__(self, data):
+        self.gates = {gd["gid"]: dict(gd) for gd in data.get("gates", [])}
+        self.wires = {self._key(wd): wd for wd in data.get("wires", [])}
+        self.next_gid = data.get("next_gid", max(self.gates, default=0) + 1)
+        self.meta = data.get("meta")
+
+    @staticmethod
+    def _key(wd):
+        return wd["src_gate"], wd["src_pin"], wd["dst_gate"], wd["dst_pin"]
+
+    def apply(self, op):
+        kind = op["op"]
+        if kind == "batch":
+            for sub in op["commands"]:
+                self.apply(sub)
+        elif kind == "add_gate":
+            gd = dict(op["gate"])
+            self.gates[gd["gid"]] = gd
+            self.next_gid = max(self.next_gid, gd["gid"] + 1)
+        elif kind == "delete_gate":
+            gid = op["gid"]
+            self.gates.pop(gid, None)
+            for k in [k for k in self.wires if k[0] == gid or k[2] == gid]:
+                del self.wires[k]
+        elif kind == "add_wire":
+            self.wires[self._key(op["wire"])] = dict(op["wire"])
+        elif kind == "delete_wire":
+            self.wires.pop(self._key(op["wire"]), None)
+        elif kind == "move":
+            self.gates[op["gid"]].update(x=op["x"], y=op["y"])
+        elif kind == "shift":
+            for gid in op["gids"]:
+                gd = self.gates[gid]
+                gd.update(x=gd["x"] + op["dx"], y=gd["y"] + op["dy"])
+        elif kind == "set_value":
+            self.gates[op["gid"]]["value"] = op["value"]
+        elif kind == "rename":
+            self.gates[op["gid"]]["name"] = op["name"]
+        elif kind == "set_inputs":
+            gid, n = op["gid"], op["inputs"]
+            self.gates[gid]["inputs"] = n
+            for k in [k for k in self.wires if k[2] == gid and k[3] >= n]:
+                del self.wires[k]
+        else:
+            raise ValueError(f"Opération inconnue dans le journal : {kind}")
+
+    def to_data(self):
+        data = {"gates": list(self.gates.values()), "wires": list(self.wires.values()),
+                "next_gid": self.next_gid}
+        if self.meta:
+            data["meta"] = self.meta
+        return data
+
+
+def replay(header: dict, ops) -> dict:
+    """Reconstruit le circuit à partir de l'état de départ et des opérations."""
+    if header["op"] == "base":
+        data = saveAndLoad.load(header["path"])
+    else:
+        data = header["data"]
+    state = _State(data)
+    for op in ops:
+        state.apply(op)
+    return state.to_data()
+
+
+def recover(path: str):
+    """Circuit reconstruit depuis un journal, ou None s'il n'y a rien à récupérer."""
+    if not os.path.exists(path):
+        return None
+    header, ops = read(path)
+    if header is None or (not ops and (header["op"] == "base" or not header["data"].get("gates"))):
+        return None
+    return replay(header, ops)
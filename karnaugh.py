@@ -0,0 +1,94 @@
+# karnaugh.py
+# Tableau de Karnaugh (2 à 6 entrées) d'une sortie donnée par ses bitsets de
+# table de vérité (valeurs, connus), dans l'ordre des lignes de
+# netlist.exhaustive_chunks : l'entrée 0 est le bit de poids fort.
+# Les premières entrées numérotent les lignes du tableau, les suivantes les
+# colonnes, chacune en code de Gray ; les cases sont relues dans un bitset
+# réordonné une fois pour toutes (case i * largeur + j).
+# Les regroupements sont les cubes de minimisation.py (bit b du cube : entrée n-1-b).
+
+MIN_INPUTS = 2
+MAX_INPUTS = 6
+
+
+def gray(k):
+    """Codes de Gray sur k bits, dans l'ordre du tableau."""
+    return [i ^ (i >> 1) for i in range(1 << k)]
+
+
+def reorder(bits, order):
+    """Bitset dont le bit i est le bit order[i] de `bits`."""
+    out = 0
+    for i, r in enumerate(order):
+        out |= (bits >> r & 1) << i
+    return out
+
+
+def _runs(positions):
+    """Positions consécutives regroupées : [(première, dernière)]."""
+    runs = []
+    for p in positions:
+        if runs and runs[-1][1] == p - 1:
+            runs[-1][1] = p
+        else:
+            runs.append([p, p])
+    return [tuple(r) for r in runs]
+
+
+class KarnaughMap:
+    """Tableau d'une sortie : cases "0" / "1" / "?" et rectangles de chaque regroupement."""
+    __slots__ = ('row_names', 'col_names', 'row_codes', 'col_codes', 'cells', 'groups')
+
+    def __init__(self, names, val, known, cubes=()):
+        n = len(names)
+        if not MIN_INPUTS <= n <= MAX_INPUTS:
+            raise ValueError(f"Tableau de Karnaugh : {MIN_INPUTS} à {MAX_INPUTS} entrées.")
+        nr = n // 2
+        nc = n - nr
+        self.row_names = list(names[:nr])
+        self.col_names = list(names[nr:])
+        self.row_codes = gray(nr)
+        self.col_codes = gray(nc)
+        order = [(r << nc) | c for r in self.row_codes for c in self.col_codes]
+        g_val, g_known = reorder(val, order), reorder(known, order)
+        width = len(self.col_codes)
+        self.cells = [["?" if not g_known >> (i * width + j) & 1 else "01"[g_val >> (i * width + j) & 1]
+                       for j in range(width)] for i in range(len(self.row_codes))]
+        self.groups = [self.rectangles(nc, cube) for cube in cubes]
+
+    def rectangles(self, nc, cube):
+        """Rectangles (ligne 1, colonne 1, ligne 2, colonne 2) couverts par le cube.
+
+        Un cube couvre un produit (lignes x colonnes) ; les lignes ou colonnes
+        adjacentes par bouclage du tableau donnent plusieurs rectangles.
+        """
+        v, m = cube
+        fixed = ~m
+        col_mask = (1 << nc) - 1
+        rows = [i for i, r in enumerate(self.row_codes) if not ((r << nc) ^ v) & fixed & ~col_mask]
+        cols = [j for j, c in enumerate(self.col_codes) if not (c ^ v) & fixed & col_mask]
+        return [(r1, c1, r2, c2) for r1, r2 in _runs(rows) for c1, c2 in _runs(cols)]
+
+
+def bitsets(cells):
+    """(valeurs, connus) d'une colonne de la table de vérité ("0", "1", "?" par ligne)."""
+    val = sum(1 << r for r, c in enumerate(cells) if c == "1")
+    known = sum(1 << r for r, c in enumerate(cells) if c != "?")
+    return val, known
+
+
+def from_cells(names, cells, cubes=()):
+    return KarnaughMap(names, *bitsets(cells), cubes)
+
+
+if __name__ == "__main__":
+    assert gray(2) == [0, 1, 3, 2]
+    # S = A.!B + C sur (A, B, C) : lignes A, colonnes BC dans l'ordre 00 01 11 10
+    cells = ["0", "1", "0", "1", "1", "1", "0", "1"]
+    k = from_cells(["A", "B", "C"], cells, [(0b100, 0b001), (0b001, 0b110)])
+    assert k.cells == [["0", "1", "1", "0"], ["1", "1", "1", "0"]]
+    # A.!B : ligne 1, colonnes 00 et 01 ; C : les deux lignes, colonnes 01 et 11
+    assert k.groups == [[(1, 0, 1, 1)], [(0, 1, 1, 2)]]
+    # !C sur (A, B, C) : colonnes 00 et 10, séparées par le bouclage
+    k = from_cells(["A", "B", "C"], ["1", "0"] * 4, [(0, 0b110)])
+    assert k.groups == [[(0, 0, 1, 0), (0, 3, 1, 3)]]
@@ -0,0 +1,170 @@
+# layout.py
+# Disposition automatique en couches (à la Sugiyama) :
+#  1. colonnes = niveaux topologiques (plus long chemin depuis les entrées),
+#  2. ordre dans chaque colonne par barycentres (réduction des croisements),
+#  3. ordonnées compactes, chaque nœud au plus près de ses voisins.
+# Chaque étape est linéaire en nœuds + arêtes (à un tri par colonne près).
+# Les fils sont tracés en segments horizontaux / verticaux (orthogonal_route).
+
+from collections import deque
+
+
+X0, Y0 = 80, 80
+X_STEP = 160
+GAP = 30
+SWEEPS = 4
+ROUTE_MARGIN = 15
+
+
+def levels(nodes, edges, first=(), last=()):
+    """Niveau de chaque nœud ; `first` en colonne 0, `last` dans la dernière colonne."""
+    succ = {n: [] for n in nodes}
+    in_degree = {n: 0 for n in nodes}
+    for a, b in edges:
+        succ[a].append(b)
+        in_degree[b] += 1
+
+    level = {n: 0 for n in nodes}
+    queue = deque(n for n in nodes if in_degree[n] == 0)
+    while queue:
+        n = queue.popleft()
+        for m in succ[n]:
+            level[m] = max(level[m], level[n] + 1)
+            in_degree[m] -= 1
+            if in_degree[m] == 0:
+                queue.append(m)
+    # Nœuds pris dans une boucle : ils gardent le niveau atteint par leurs prédécesseurs hors boucle
+
+    for n in first:
+        level[n] = 0
+    inner = [level[n] for n in nodes if n not in last]
+    depth = max(inner, default=0) + 1
+    for n in last:
+        level[n] = depth
+    # Pas de colonne vide entre deux couches
+    used = {lv: i for i, lv in enumerate(sorted(set(level.values())))}
+    return {n: used[lv] for n, lv in level.items()}
+
+
+def _barycenter_sweep(layers, neighbours, pos):
+    for layer in layers:
+        keys = {}
+        for n in layer:
+            ns = [pos[m] for m in neighbours[n] if m in pos]
+            keys[n] = sum(ns) / len(ns) if ns else pos[n]
+        layer.sort(key=keys.__getitem__)
+        size = max(len(layer) - 1, 1)
+        for i, n in enumerate(layer):
+            pos[n] = i / size      # position normalisée : colonnes de tailles différentes
+
+
+def order_layers(nodes, edges, level, sweeps=SWEEPS):
+    """Colonnes ordonnées (listes de nœuds) après balayages par barycentres."""
+    depth = max(level.values(), default=-1) + 1
+    layers = [[] for _ in range(depth)]
+    for n in nodes:
+        layers[level[n]].append(n)
+
+    preds = {n: [] for n in nodes}
+    succs = {n: [] for n in nodes}
+    for a, b in edges:
+        preds[b].append(a)
+        succs[a].append(b)
+
+    pos = {}
+    for layer in layers:
+        size = max(len(layer) - 1, 1)
+        for i, n in enumerate(layer):
+            pos[n] = i / size
+    for _ in range(sweeps):
+        _barycenter_sweep(layers[1:], preds, pos)
+        _barycenter_sweep(layers[-2:0:-1], succs, pos)   # la colonne des entrées garde son ordre
+    _barycenter_sweep(layers[1:], preds, pos)
+    return layers
+
+
+def _pack(layer, want, heights, gap):
+    """Ordonnées sans chevauchement, au plus près des ordonnées souhaitées.
+
+    Moyenne d'un tassement vers le bas et d'un tassement vers le haut : chacun
+    respecte les écarts minimaux, donc leur moyenne aussi.
+    """
+    k = len(layer)
+    down = [0.0] * k
+    for i, n in enumerate(layer):
+        down[i] = want[n] if i == 0 else max(want[n], down[i - 1] + heights[layer[i - 1]] + gap)
+    up = [0.0] * k
+    for i in range(k - 1, -1, -1):
+        n = layer[i]
+        up[i] = want[n] if i == k - 1 else min(want[n], up[i + 1] - gap - heights[n])
+    return [(d + u) / 2 for d, u in zip(down, up)]
+
+
+def positions(nodes, edges, heights, first=(), last=(), x0=X0, y0=Y0, x_step=X_STEP, gap=GAP, sweeps=SWEEPS):
+    """Positions {nœud: (x, y)} pour des nœuds de hauteurs données."""
+    nodes = list(nodes)
+    edges = [(a, b) for a, b in edges if a != b]
+    level = levels(nodes, edges, first, last)
+    layers = order_layers(nodes, edges, level, sweeps)
+
+    preds = {n: [] for n in nodes}
+    for a, b in edges:
+        if level[a] < level[b]:
+            preds[b].append(a)
+
+    y_mid = {}
+    out = {}
+    for layer in layers:
+        want = {}
+        y = y0
+        for n in layer:
+            ps = [y_mid[p] for p in preds[n] if p in y_mid]
+            want[n] = sum(ps) / len(ps) - heights[n] / 2 if ps else y
+            y = want[n] + heights[n] + gap
+        for n, y in zip(layer, _pack(layer, want, heights, gap)):
+            out[n] = y
+            y_mid[n] = y + heights[n] / 2
+
+    shift = y0 - min(out.values(), default=y0)
+    return {n: (x0 + level[n] * x_step, round(y + shift)) for n, y in out.items()}
+
+
+def orthogonal_route(x1, y1, x2, y2, margin=ROUTE_MARGIN):
+    """Tracé orthogonal d'une sortie (x1, y1) vers une entrée (x2, y2) : liste de points."""
+    if y1 == y2 and x2 >= x1:
+        return [(x1, y1), (x2, y2)]
+    if x2 - x1 >= 2 * margin:
+        xm = (x1 + x2) // 2
+        return [(x1, y1), (xm, y1), (xm, y2), (x2, y2)]
+    # Fil qui revient vers la gauche : contournement par l'ordonnée moyenne
+    ym = (y1 + y2) // 2
+    return [(x1, y1), (x1 + margin, y1), (x1 + margin, ym), (x2 - margin, ym), (x2 - margin, y2), (x2, y2)]
+
+
+def layout_data(data: dict, gate_height=60):
+    """Dispose en place les gates d'un circuit au format JSON (import, génération)."""
+    gates = data.get("gates", [])
+    nodes = [gd["gid"] for gd in gates]
+    edges = [(wd["src_gate"], wd["dst_gate"]) for wd in data.get("wires", [])]
+    first = [gd["gid"] for gd in gates if gd["type"] == "SRC"]
+    last = [gd["gid"] for gd in gates if gd["type"] == "OUT"]
+    pos = positions(nodes, edges, {n: gate_height for n in nodes}, first, last)
+    for gd in gates:
+        gd["x"], gd["y"] = pos[gd["gid"]]
+    return data
+
+
+if __name__ == "__main__":
+    # A, B -> ET -> S ; A -> NON -> S2
+    nodes = ["A", "B", "and", "not", "S", "S2"]
+    edges = [("A", "and"), ("B", "and"), ("A", "not"), ("and", "S"), ("not", "S2")]
+    lv = levels(nodes, edges, first=["A", "B"], last=["S", "S2"])
+    assert lv == {"A": 0, "B": 0, "and": 1, "not": 1, "S": 2, "S2": 2}
+    pos = positions(nodes, edges, {n: 60 for n in nodes}, ["A", "B"], ["S", "S2"])
+    assert pos["and"][0] == pos["not"][0] and abs(pos["and"][1] - pos["not"][1]) >= 60 + GAP
+    # Croisement supprimé : les colonnes suivent l'ordre des entrées
+    nodes = ["A", "B", "x", "y"]
+    layers = order_layers(nodes, [("A", "y"), ("B", "x")], {"A": 0, "B": 0, "x": 1, "y": 1})
+    assert layers == [["A", "B"], ["y", "x"]]
+    assert orthogonal_route(0, 0, 100, 40) == [(0, 0), (50, 0), (50, 40), (100, 40)]
+    assert len(orthogonal_route(100, 0, 0, 40)) == 6
@@ -1,12 +1,59 @@
 from tkinter import *
-from tkinter import filedialog, messagebox, simpledialog, ttk
-from itertools import product
 from collections import deque
+import importlib
 import math
 import os
+import threading
 
 import portes
 import saveAndLoad
+import historique
+import journal
+import cache
+import spatial
+import layout
+
+
+class _Lazy:
+    """Module importé au premier accès à l'un de ses attributs (démarrage plus rapide)."""
+    __slots__ = ('_name', '_module')
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        if attr in _Lazy.__slots__:
+            object.__setattr__(self, attr, value)
+        else:
+            setattr(self._load(), attr, value)
+
+
+# Boîtes de dialogue et outils d'analyse : inutiles avant la première action
+filedialog = _Lazy("tkinter.filedialog")
+messagebox = _Lazy("tkinter.messagebox")
+simpledialog = _Lazy("tkinter.simpledialog")
+ttk = _Lazy("tkinter.ttk")
+blocs = _Lazy("blocs")
+netlist = _Lazy("netlist")
+analyse = _Lazy("analyse")
+bdd = _Lazy("bdd")
+echange = _Lazy("echange")
+equivalence = _Lazy("equivalence")
+fautes = _Lazy("fautes")
+tables = _Lazy("tables")
+empreinte = _Lazy("empreinte")
+minimisation = _Lazy("minimisation")
+karnaugh = _Lazy("karnaugh")
+verification = _Lazy("verification")
 
 
 PIN_R = 6
@@ -15,27 +62,55 @@ GATE_W, GATE_H = 90, 60
 COLOR_UNDEF = "#888888"
 COLOR_0 = "#000000"
 COLOR_1 = "#cc0000"
+COLOR_SEL = "#1e6fd9"
+COLOR_PATH = "#e08000"     # chemin critique (analyse)
+COLOR_LINT = "#b000b0"     # gates signalées par la vérification
 
 INVERT_R = 6
 INVERT_OFFSET = 14
 
+PIN_STEP = 20
+WIRE_HIT = 8      # tolérance (pixels) pour cliquer sur un fil
+
+# En dessous de ce zoom (vue d'ensemble), chaque gate n'est plus qu'un rectangle
+LOD_SCALE = 0.5
+MAX_BUS_WIDTH = 32
+
+PASTE_OFFSET = 30
+
+KMAP_CELL = 48          # côté d'une case du tableau de Karnaugh (pixels)
+KMAP_COLORS = ("#1e6fd9", "#e08000", "#2a9d3a", "#b03ab0", "#c0392b", "#16a0a0", "#7a5a00", "#555555")
+
+AUTOSAVE_IDLE_MS = 3000   # compactage du journal après ce délai sans modification
+
+EXPORT_POLL_MS = 200      # suivi d'un export de table de vérité en cours
+EXPORT_PROCESSES = max(1, min(4, (os.cpu_count() or 1) - 1))   # un cœur reste à l'interface
+
 
 def bool_to_color(v):
     return COLOR_1 if v else COLOR_0 if v is not None else COLOR_UNDEF
 
 
+def format_value(v, width=1):
+    if v is None:
+        return "?"
+    return str(int(v)) if width > 1 else ("1" if v else "0")
+
+
 class Pin:
-    __slots__ = ('owner', 'kind', 'index', 'x', 'y', 'value', 'canvas_id', 'label_id')
+    __slots__ = ('owner', 'kind', 'index', 'x', 'y', 'width', 'value', 'canvas_id', 'label_id', 'wires')
     
-    def __init__(self, owner, kind: str, index: int, x: int, y: int):
+    def __init__(self, owner, kind: str, index: int, x: int, y: int, width: int = 1):
         self.owner = owner
         self.kind = kind
         self.index = index
         self.x = x
         self.y = y
+        self.width = width      # nombre de bits (bus si > 1) ; value est alors un entier
         self.value = None
         self.canvas_id = None
         self.label_id = None
+        self.wires = []         # fils branchés sur cette pin
 
     def hit_test(self, mx, my):
         dx, dy = mx - self.x, my - self.y
@@ -43,13 +118,22 @@ class Pin:
 
 
 class Wire:
-    __slots__ = ('src', 'dst', 'value', 'canvas_id')
+    __slots__ = ('src', 'dst', 'value', 'canvas_id', 'route')
     
     def __init__(self, src_pin: Pin, dst_pin: Pin):
         self.src = src_pin
         self.dst = dst_pin
         self.value = None
         self.canvas_id = None
+        self.route = None       # tracé orthogonal en cache (coordonnées monde), None si à recalculer
+
+    def attach(self):
+        self.src.wires.append(self)
+        self.dst.wires.append(self)
+
+    def detach(self):
+        self.src.wires.remove(self)
+        self.dst.wires.remove(self)
 
     def as_dict(self):
         return {
@@ -61,7 +145,7 @@ class Wire:
 
 
 class Gate:
-    __slots__ = ('gid', 'gtype', 'x', 'y', 'name', 'inputs', 'outputs', 'value',
+    __slots__ = ('gid', 'gtype', 'x', 'y', 'h', 'name', 'ref', 'block', 'n_in', 'width', 'inputs', 'outputs', 'value',
                  'rect_id', 'text_id', 'led_id', 'value_text_id', 'invert_id')
     
     # Configuration statique des pins par type
@@ -70,19 +154,18 @@ class Gate:
         'OUT': {'in': 1, 'out': 0},
         'NOT': {'in': 1, 'out': 1, 'invert': True},
         'NOR': {'in': 2, 'out': 1, 'invert': True},
+        'NAND': {'in': 2, 'out': 1, 'invert': True},
+        'XNOR': {'in': 2, 'out': 1, 'invert': True},
         'AND': {'in': 2, 'out': 1},
         'OR': {'in': 2, 'out': 1},
         'XOR': {'in': 2, 'out': 1},
     }
-    
-    # Fonctions de calcul par type
-    COMPUTE_FUNCS = {
-        'NOT': lambda ins: portes.non(ins[0]),
-        'AND': lambda ins: portes.et(ins[0], ins[1]),
-        'OR': lambda ins: portes.ou(ins[0], ins[1]),
-        'XOR': lambda ins: portes.xor(ins[0], ins[1]),
-        'NOR': lambda ins: portes.nor(ins[0], ins[1]),
-    }
+
+    # Types acceptant une largeur de bus (SPLIT/MERGE : une pin par bit côté "fils")
+    BUS_TYPES = ('SRC', 'OUT', 'NOT', 'AND', 'OR', 'XOR', 'NAND', 'NOR', 'XNOR', 'SPLIT', 'MERGE')
+
+    # Types dont le nombre d'entrées est réglable (2 à portes.MAX_INPUTS)
+    NARY = ('AND', 'OR', 'XOR', 'NAND', 'NOR', 'XNOR')
     
     # Titres des gates
     TITLES = {
@@ -90,19 +173,31 @@ class Gate:
         'AND': '&',
         'OR': '≥1',
         'XOR': '=1',
+        'NAND': '&',
         'NOR': '≥1',
+        'XNOR': '=1',
+        'SPLIT': 'Séparer',
+        'MERGE': 'Regrouper',
         'OUT': 'S',
     }
 
-    def __init__(self, gid: int, gtype: str, x: int, y: int, name: str | None = None):
+    def __init__(self, gid: int, gtype: str, x: int, y: int, name: str | None = None,
+                 ref: str | None = None, n_inputs: int | None = None, width: int | None = None,
+                 base_dir: str | None = None):
         self.gid = gid
         self.gtype = gtype
         self.x = x
         self.y = y
         self.name = name
+        self.n_in = n_inputs if gtype in self.NARY and n_inputs else None
+        self.width = width if gtype in self.BUS_TYPES and width else 1
+
+        # Sous-circuit : définition partagée entre toutes les instances
+        self.ref = ref
+        self.block = blocs.load_block(ref, base_dir) if gtype == "BLOCK" else None
         self.inputs = []
         self.outputs = []
-        self.value = False if gtype == "SRC" else None
+        self.value = (False if self.width == 1 else 0) if gtype == "SRC" else None
         
         # Canvas IDs
         self.rect_id = None
@@ -113,43 +208,59 @@ class Gate:
         
         self._build_pins()
 
-    def _build_pins(self):
+    def _config(self):
+        if self.block:
+            return {'in': len(self.block.input_names), 'out': len(self.block.output_names)}
+        if self.gtype == "SPLIT":
+            return {'in': 1, 'out': self.width}
+        if self.gtype == "MERGE":
+            return {'in': self.width, 'out': 1}
         config = self.PIN_CONFIGS.get(self.gtype, {'in': 2, 'out': 1})
+        if self.n_in:
+            config = dict(config, **{'in': self.n_in})
+        return config
+
+    def _build_pins(self):
+        config = self._config()
         n_in = config['in']
         n_out = config['out']
-        
-        # Créer les inputs
-        if n_in == 1:
-            self.inputs = [Pin(self, "in", 0, self.x, self.y + GATE_H // 2)]
-        elif n_in == 2:
-            self.inputs = [
-                Pin(self, "in", 0, self.x, self.y + GATE_H // 3),
-                Pin(self, "in", 1, self.x, self.y + 2 * GATE_H // 3)
-            ]
-        
-        # Créer les outputs
-        if n_out == 1:
-            offset = INVERT_OFFSET if config.get('invert') else 0
-            self.outputs = [Pin(self, "out", 0, self.x + GATE_W + offset, self.y + GATE_H // 2)]
+        self.h = max(GATE_H, PIN_STEP * (max(n_in, n_out) + 1))
+
+        # Les pins existantes sont conservées (les fils qui y sont reliés restent valides)
+        self.inputs = self.inputs[:n_in] + [Pin(self, "in", i, 0, 0) for i in range(len(self.inputs), n_in)]
+        self.outputs = self.outputs[:n_out] + [Pin(self, "out", i, 0, 0) for i in range(len(self.outputs), n_out)]
+
+        bus = 1 if self.block else self.width
+        for p in self.inputs:
+            p.width = 1 if self.gtype == "MERGE" else bus
+        for p in self.outputs:
+            p.width = 1 if self.gtype == "SPLIT" else bus
+        self.update_pin_positions()
+
+    def set_input_count(self, n: int):
+        self.n_in = n
+        self._build_pins()
 
     def update_pin_positions(self):
-        config = self.PIN_CONFIGS.get(self.gtype, {'in': 2, 'out': 1})
-        
-        # Update inputs
-        if len(self.inputs) == 1:
-            self.inputs[0].x = self.x
-            self.inputs[0].y = self.y + GATE_H // 2
-        elif len(self.inputs) == 2:
-            self.inputs[0].x = self.x
-            self.inputs[0].y = self.y + GATE_H // 3
-            self.inputs[1].x = self.x
-            self.inputs[1].y = self.y + 2 * GATE_H // 3
-        
-        # Update outputs
-        if self.outputs:
-            offset = INVERT_OFFSET if config.get('invert') else 0
-            self.outputs[0].x = self.x + GATE_W + offset
-            self.outputs[0].y = self.y + GATE_H // 2
+        config = self._config()
+
+        # Pins réparties régulièrement sur la hauteur (1 pin : milieu ; 2 pins : tiers)
+        for i, p in enumerate(self.inputs):
+            p.x = self.x
+            p.y = self.y + (i + 1) * self.h // (len(self.inputs) + 1)
+
+        offset = INVERT_OFFSET if config.get('invert') else 0
+        for i, p in enumerate(self.outputs):
+            p.x = self.x + GATE_W + offset
+            p.y = self.y + (i + 1) * self.h // (len(self.outputs) + 1)
+
+    def is_inverting(self):
+        return bool(self._config().get('invert'))
+
+    def bbox(self):
+        """Boîte englobante (pins et bulle comprises), pour l'index spatial."""
+        r = PIN_R + 3
+        return self.x - r, self.y, self.x + GATE_W + INVERT_OFFSET + r, self.y + self.h
 
     def compute(self):
         if self.gtype == "SRC":
@@ -161,19 +272,37 @@ class Gate:
         if None in ins:
             return None
         
-        compute_func = self.COMPUTE_FUNCS.get(self.gtype)
-        return compute_func(ins) if compute_func else None
+        if self.gtype not in portes.BASES:
+            return None
+        if self.width > 1:
+            return portes.evaluer_mot(self.gtype, ins, self.width)
+        return portes.evaluer(self.gtype, ins)
+
+    def compute_outputs(self):
+        if self.block:
+            return self.block.evaluate_pins([p.value for p in self.inputs])
+        if self.gtype == "SPLIT":
+            v = self.inputs[0].value
+            return [None if v is None else bool(v >> j & 1) for j in range(self.width)]
+        if self.gtype == "MERGE":
+            bits = [p.value for p in self.inputs]
+            return [None if None in bits else sum(int(b) << j for j, b in enumerate(bits))]
+        return [self.compute()] if self.outputs else []
 
     def title(self):
+        if self.gtype in ("SRC", "OUT") and self.width > 1:
+            return f"{self.name or ''}[{self.width - 1}:0]"
         if self.gtype == "SRC":
             return f"{self.name}" if self.name else "Entrée"
         if self.gtype == "OUT":
             return f"{self.name}" if self.name else "Sortie"
+        if self.block:
+            return self.block.title
 
         return self.TITLES.get(self.gtype, self.gtype)
 
     def as_dict(self):
-        return {
+        d = {
             "gid": self.gid,
             "type": self.gtype,
             "x": self.x,
@@ -181,6 +310,45 @@ class Gate:
             "value": self.value if self.gtype == "SRC" else None,
             "name": self.name if self.gtype in ("SRC", "OUT") else None,
         }
+        if self.block:
+            d["ref"] = self.ref
+        if self.gtype in self.NARY:
+            d["inputs"] = len(self.inputs)
+        if self.width > 1:
+            d["width"] = self.width
+        return d
+
+
+class TruthView:
+    """Fenêtre de table de vérité ouverte, mise à jour colonne par colonne."""
+    __slots__ = ('win', 'tree', 'expr_text', 'note', 'known', 'col_ids', 'keys', 'rows', 'exprs', 'job')
+
+    def __init__(self, win, tree, expr_text, note, known):
+        self.win = win
+        self.tree = tree
+        self.expr_text = expr_text
+        self.note = note
+        self.known = known       # empreinte de pin -> (expression, cases)
+        self.col_ids = []
+        self.keys = {}           # id de colonne -> empreinte affichée
+        self.rows = []           # ids des lignes du Treeview
+        self.exprs = None
+        self.job = None
+
+
+class KarnaughView:
+    """Fenêtre du tableau de Karnaugh ouverte, redessinée à chaque modification."""
+    __slots__ = ('win', 'canvas', 'combo', 'expr', 'known', 'outputs', 'selected', 'job')
+
+    def __init__(self, win, canvas, combo, expr, known):
+        self.win = win
+        self.canvas = canvas
+        self.combo = combo
+        self.expr = expr
+        self.known = known       # comme TruthView.known
+        self.outputs = []        # gids des OUT, dans l'ordre de la liste
+        self.selected = None     # gid de la sortie affichée
+        self.job = None
 
 
 class App:
@@ -203,6 +371,7 @@ class App:
         # État
         self.mode = StringVar(value="select")
         self.pending_wire_src = None
+        self.pending_block_ref = None
         self.gates = []
         self.wires = []
         self.next_gid = 1
@@ -210,10 +379,52 @@ class App:
         # Cache pour optimisation
         self.gate_by_gid = {}
         self.topo_order = []
+        self.topo_pos = {}
         self.topo_dirty = True
 
+        self.gate_index = spatial.GridIndex()
+        self.wire_index = spatial.GridIndex()     # segments des fils : (fil, n° du segment)
+
+        # Sélection multiple et presse-papiers (sous-circuit au format JSON)
+        self.selection = set()
+        self.clipboard = None
+        self.paste_count = 0
+        self.band_start = None
+        self.band_id = None
+        self.drag_group = None
+
+        self.history = historique.History(self)
+
+        # Sauvegarde automatique (journal à côté du fichier de travail, dans le cache pour un circuit sans nom)
+        self.current_path = None
+        # Dossier du fichier chargé : les sous-circuits y sont cherchés avant circuits/
+        self.doc_dir = None
+        self.journal = journal.Journal(journal.journal_path(None))
+        self._compact_job = None
+        self.history.listeners.append(self._journal_command)
+
+        # Résultats (tables de vérité, minimisations…) déjà calculés, par empreinte structurelle
+        self.results = cache.ResultCache()
+
+        # Analyse (profondeur, chemin critique) superposée au canvas, recalculée à chaque modification
+        self.analysis_shown = False
+        self.history.listeners.append(lambda cmd, direction: self._draw_analysis())
+
+        # Vérification (entrées libres, boucles…) tenue à jour commande par commande
+        self.checker = None
+        self.history.listeners.append(self._lint_command)
+
+        # Table de vérité et tableau de Karnaugh ouverts : mis à jour à chaque modification
+        self.truth_view = None
+        self.karnaugh_view = None
+        self.history.listeners.append(lambda cmd, direction: self._schedule_truth_refresh())
+
+        # Export de table de vérité en cours (thread de calcul)
+        self.export_thread = None
+
         # Drag & pan
         self.drag_gate = None
+        self.drag_start = (0, 0)
         self.drag_dx = 0
         self.drag_dy = 0
         self.panning = False
@@ -223,13 +434,15 @@ class App:
 
         # Zoom & caméra
         self.scale = 1.0
-        self.scale_min = 0.5
+        self.scale_min = 0.15
         self.scale_max = 3.0
         self.cam_x = 0.0
         self.cam_y = 0.0
 
         self._build_left_panel()
         self._bind_canvas()
+        self.root.protocol("WM_DELETE_WINDOW", self.quit)
+        self.root.after_idle(self.offer_recovery)
 
     def _build_left_panel(self):
         Label(self.left, text="Circuits logiques", font=("Arial", 14, "bold")).pack(anchor="w")
@@ -242,15 +455,49 @@ class App:
 
         # Composants
         Label(self.left, text="Composants", font=("Arial", 12, "bold")).pack(anchor="w", pady=(10, 0))
-        for text, gtype in [("Entrée", "SRC"), ("NON", "NOT"), ("ET", "AND"), 
-                            ("OU", "OR"), ("XOR", "XOR"), ("NOR", "NOR"), ("Sortie (LED)", "OUT")]:
-            Button(self.left, text=text, command=lambda g=gtype: self.set_mode(f"place:{g}")).pack(fill=X, pady=(6 if text == "Entrée" else 4, 0))
+        Button(self.left, text="Entrée", command=lambda: self.set_mode("place:SRC")).pack(fill=X, pady=(6, 0))
+
+        # Portes logiques sur deux colonnes
+        grid = Frame(self.left)
+        grid.pack(fill=X, pady=(4, 0))
+        grid.columnconfigure((0, 1), weight=1, uniform="portes")
+        for i, (text, gtype) in enumerate([("NON", "NOT"), ("ET", "AND"), ("OU", "OR"), ("XOR", "XOR"),
+                                           ("NON-ET", "NAND"), ("NOR", "NOR"), ("XNOR", "XNOR")]):
+            Button(grid, text=text, command=lambda g=gtype: self.set_mode(f"place:{g}")).grid(row=i // 2, column=i % 2, sticky="ew", pady=(0, 4))
+
+        row = Frame(self.left)
+        row.pack(fill=X)
+        Label(row, text="Entrées :").pack(side=LEFT)
+        self.n_inputs = IntVar(value=2)
+        Spinbox(row, from_=2, to=portes.MAX_INPUTS, width=2, textvariable=self.n_inputs, state="readonly").pack(side=LEFT, padx=(4, 0))
+        self.bus_width = IntVar(value=1)
+        Spinbox(row, from_=1, to=MAX_BUS_WIDTH, width=2, textvariable=self.bus_width, state="readonly").pack(side=RIGHT)
+        Label(row, text="Bits :").pack(side=RIGHT, padx=(0, 4))
+
+        bus = Frame(self.left)
+        bus.pack(fill=X, pady=(4, 0))
+        bus.columnconfigure((0, 1), weight=1, uniform="bus")
+        Button(bus, text="Séparer", command=lambda: self.set_mode("place:SPLIT")).grid(row=0, column=0, sticky="ew")
+        Button(bus, text="Regrouper", command=lambda: self.set_mode("place:MERGE")).grid(row=0, column=1, sticky="ew")
+
+        Button(self.left, text="Sortie (LED)", command=lambda: self.set_mode("place:OUT")).pack(fill=X, pady=(4, 0))
+        Button(self.left, text="Bloc (sous-circuit)…", command=self.choose_block).pack(fill=X, pady=(4, 0))
 
         # Actions
         Label(self.left, text="Actions", font=("Arial", 12, "bold")).pack(anchor="w", pady=(10, 0))
+        hist = Frame(self.left)
+        hist.pack(fill=X, pady=(4, 0))
+        hist.columnconfigure((0, 1), weight=1, uniform="hist")
+        Button(hist, text="Annuler", command=self.undo).grid(row=0, column=0, sticky="ew")
+        Button(hist, text="Rétablir", command=self.redo).grid(row=0, column=1, sticky="ew")
         actions = [
             ("Table de vérité", self.show_truth_table),
+            ("Tableau de Karnaugh", self.show_karnaugh),
+            ("Analyse (profondeur)", self.show_analysis),
+            ("Vérifier le circuit", self.show_lint),
             ("Expression → Circuit", self.expression_to_circuit),
+            ("Disposition automatique", self.auto_layout),
+            ("Comparer à…", self.compare_dialog),
             ("Sauvegarder…", self.save_file),
             ("Nouveau (vierge)", self.new_circuit),
             ("Charger…", self.load_dialog),
@@ -293,6 +540,16 @@ class App:
         self.root.bind("<Control-equal>", lambda e: self.on_zoom(1))
         self.root.bind("<Control-0>", self.on_zoom_reset)
 
+        # Historique
+        self.root.bind("<Control-z>", lambda e: self.undo())
+        self.root.bind("<Control-y>", lambda e: self.redo())
+        self.root.bind("<Control-Z>", lambda e: self.redo())
+
+        # Sélection
+        self.root.bind("<Delete>", lambda e: self.delete_selection())
+        self.root.bind("<Control-c>", lambda e: self.copy_selection())
+        self.root.bind("<Control-v>", lambda e: self.paste())
+
         # Pan
         self.root.bind("<KeyPress-space>", lambda e: self._set_space(True))
         self.root.bind("<KeyRelease-space>", lambda e: self._set_space(False))
@@ -301,7 +558,21 @@ class App:
         self.root.bind("<Up>", lambda e: self._pan_key(0, -40))
         self.root.bind("<Down>", lambda e: self._pan_key(0, 40))
 
-    def add_gate(self, gtype: str, x: int, y: int, name=None, ask_name=True):
+    def choose_block(self):
+        path = filedialog.askopenfilename(initialdir=self.circuits_dir, filetypes=[("Circuit JSON", "*.json")])
+        if not path:
+            return
+        ref = blocs.ref_for(path)
+        try:
+            block = blocs.load_block(ref, self.doc_dir)
+        except Exception as e:
+            messagebox.showerror("Erreur", f"Sous-circuit invalide :\n{e}")
+            return
+        self.pending_block_ref = ref
+        self.set_mode("place:BLOCK")
+        self.status.config(text=f"Mode: placer le bloc {block.title} (clic sur le canvas)")
+
+    def add_gate(self, gtype: str, x: int, y: int, name=None, ask_name=True, ref=None, n_inputs=None, width=None):
         if gtype in ("SRC", "OUT"):
             if name is not None:
                 name = str(name).strip() or None
@@ -310,93 +581,329 @@ class App:
                 name = simpledialog.askstring(label, f"{label} (ex: A, B, S, LED1...) :")
                 name = name.strip() if name else None
 
-        g = Gate(self.next_gid, gtype, x, y, name=name)
-        self.next_gid += 1
+        g = Gate(self.next_gid, gtype, x, y, name=name, ref=ref, n_inputs=n_inputs, width=width, base_dir=self.doc_dir)
+        self._insert_gate(g)
+        return g
+
+    # Opérations élémentaires, appliquées incrémentalement au modèle, à l'ordre
+    # topologique et au canvas (utilisées aussi par l'historique)
+
+    def _insert_gate(self, g: Gate):
         self.gates.append(g)
         self.gate_by_gid[g.gid] = g
-        self.topo_dirty = True
+        self.next_gid = max(self.next_gid, g.gid + 1)
+        if not self.topo_dirty and g.gid not in self.topo_pos:
+            self.topo_pos[g.gid] = len(self.topo_order)
+            self.topo_order.append(g.gid)
+        self.gate_index.insert(g, g.bbox())
         self.draw_gate(g)
-        return g
+
+    def _remove_gate(self, g: Gate):
+        """Retire une gate supposée sans fils ; l'ordre topologique reste valide."""
+        self.canvas.delete(f"g{g.gid}")
+        if g in self.gates:
+            self.gates.remove(g)
+        self.gate_by_gid.pop(g.gid, None)
+        self.gate_index.remove(g)
+        self.selection.discard(g)
+        if self.pending_wire_src and self.pending_wire_src.owner == g:
+            self.pending_wire_src = None
+
+    def _insert_wire(self, w: Wire):
+        self.wires.append(w)
+        w.attach()
+        self.draw_wire(w)
+        # L'ordre reste valide si la source précède déjà la destination
+        s, d = w.src.owner.gid, w.dst.owner.gid
+        if not self.topo_pos.get(s, len(self.topo_pos)) < self.topo_pos.get(d, -1):
+            self.topo_dirty = True
+
+    def _attach_new(self, w: Wire):
+        """Ajoute un fil sans le dessiner (construction en bloc suivie d'un redraw_all)."""
+        self.wires.append(w)
+        w.attach()
+
+    def _route_wire(self, w: Wire):
+        """(Re)calcule le tracé du fil et range ses segments dans l'index spatial."""
+        self._unroute_wire(w)
+        w.route = layout.orthogonal_route(w.src.x, w.src.y, w.dst.x, w.dst.y)
+        pad = WIRE_HIT / LOD_SCALE
+        for i, ((ax, ay), (bx, by)) in enumerate(zip(w.route, w.route[1:])):
+            self.wire_index.insert((w, i), (min(ax, bx) - pad, min(ay, by) - pad, max(ax, bx) + pad, max(ay, by) + pad))
+
+    def _unroute_wire(self, w: Wire):
+        if w.route is not None:
+            for i in range(len(w.route) - 1):
+                self.wire_index.remove((w, i))
+            w.route = None
+
+    def _wire_coords(self, w: Wire):
+        return [c for p in w.route for c in self.w2c(*p)]
+
+    def _update_wire(self, w: Wire):
+        self._route_wire(w)
+        if self.is_overview():
+            self._draw_net(w.src)
+        else:
+            self.canvas.coords(w.canvas_id, *self._wire_coords(w))
+
+    def _wires_of(self, gates):
+        """Fils touchant les gates, sans doublon, sans parcourir tout le circuit."""
+        return list(dict.fromkeys(w for g in gates for p in g.inputs + g.outputs for w in p.wires))
+
+    def _refresh_wires_of(self, g: Gate):
+        for w in self._wires_of((g,)):
+            self._update_wire(w)
+
+    def move_gate(self, g: Gate, x, y):
+        dx, dy = x - g.x, y - g.y
+        g.x, g.y = x, y
+        g.update_pin_positions()
+        self.gate_index.update(g, g.bbox())
+        self.canvas.move(f"g{g.gid}", dx * self.scale, dy * self.scale)
+        self._refresh_wires_of(g)
+
+    def _begin_group(self, gates):
+        """Regroupe sous le tag "grp" les éléments du canvas à déplacer.
+
+        Renvoie (fils frontières, fils internes) : seuls les premiers sont
+        retracés pendant le déplacement.
+        """
+        group = set(gates)
+        for g in group:
+            self.canvas.addtag_withtag("grp", f"g{g.gid}")
+        boundary, internal = [], []
+        for w in self._wires_of(group):
+            # En vue d'ensemble, un tracé regroupe plusieurs fils : tout est retracé
+            if w.src.owner in group and w.dst.owner in group and not self.is_overview():
+                self.canvas.addtag_withtag("grp", w.canvas_id)
+                internal.append(w)
+            else:
+                boundary.append(w)
+        return boundary, internal
+
+    def _shift_group(self, gates, boundary, dx, dy):
+        for g in gates:
+            g.x += dx
+            g.y += dy
+            g.update_pin_positions()
+        self.canvas.move("grp", dx * self.scale, dy * self.scale)
+        for w in boundary:
+            self._update_wire(w)
+
+    def _end_group(self, gates, internal):
+        self.canvas.dtag("grp", "grp")
+        for g in gates:
+            self.gate_index.update(g, g.bbox())
+        for w in internal:
+            self._route_wire(w)     # tracé déjà déplacé sur le canvas : mise à jour du cache seulement
+
+    def move_gates(self, gates, dx, dy):
+        """Déplacement groupé : un seul canvas.move, seuls les fils frontières sont recalculés."""
+        boundary, internal = self._begin_group(gates)
+        self._shift_group(gates, boundary, dx, dy)
+        self._end_group(gates, internal)
+
+    def place_gates(self, placements):
+        """Repositionne des gates ((gate, (x, y)) ...) puis redessine tout."""
+        for g, (x, y) in placements:
+            g.x, g.y = x, y
+            g.update_pin_positions()
+            self.gate_index.update(g, g.bbox())
+        for w in self._wires_of([g for g, _ in placements]):
+            self._unroute_wire(w)
+        self.redraw_all()
+
+    def _layout_positions(self):
+        return layout.positions(
+            [g.gid for g in self.gates],
+            [(w.src.owner.gid, w.dst.owner.gid) for w in self.wires],
+            {g.gid: g.h for g in self.gates},
+            first=[g.gid for g in self.gates if g.gtype == "SRC"],
+            last=[g.gid for g in self.gates if g.gtype == "OUT"],
+        )
+
+    def auto_layout(self):
+        pos = self._layout_positions()
+        moves = [(g, (g.x, g.y), pos[g.gid]) for g in self.gates if (g.x, g.y) != pos[g.gid]]
+        if moves:
+            self.history.execute(historique.SetPositions(moves))
+
+    def _resize_gate(self, g: Gate, n: int):
+        g.set_input_count(n)
+        self.gate_index.update(g, g.bbox())
+        self.canvas.delete(f"g{g.gid}")
+        self.draw_gate(g)
+        self._refresh_wires_of(g)
+
+    def rename_gate(self, g: Gate, name):
+        g.name = name
+        if g.text_id:
+            self.canvas.itemconfig(g.text_id, text=g.title())
+
+    def undo(self):
+        if not self.history.undo():
+            self.status.config(text="Rien à annuler")
+
+    def redo(self):
+        if not self.history.redo():
+            self.status.config(text="Rien à rétablir")
+
+    def is_overview(self):
+        return self.scale < LOD_SCALE
 
     def draw_gate(self, g: Gate):
+        tag = f"g{g.gid}"     # tous les éléments de la gate : déplacement / suppression groupés
         x1, y1 = self.w2c(g.x, g.y)
-        x2, y2 = self.w2c(g.x + GATE_W, g.y + GATE_H)
+        x2, y2 = self.w2c(g.x + GATE_W, g.y + g.h)
 
-        g.rect_id = self.canvas.create_rectangle(x1, y1, x2, y2, outline="#333", width=2, fill="#f7f7f7")
-        g.text_id = self.canvas.create_text((x1 + x2) / 2, (y1 + y2) / 2, text=g.title(), font=("Arial", 12, "bold"), fill="black")
+        if self.is_overview():
+            # Vue d'ensemble : un seul élément par gate (ni texte, ni pins, ni LED)
+            g.rect_id = self.canvas.create_rectangle(x1, y1, x2, y2, outline="#555", width=1, fill="#f7f7f7", tags=tag)
+            g.text_id = g.led_id = g.value_text_id = g.invert_id = None
+            for p in g.inputs + g.outputs:
+                if p.kind == "out" and p.canvas_id:
+                    self.canvas.delete(p.canvas_id)     # tracé du net : redessiné par l'appelant
+                p.canvas_id = p.label_id = None
+            if g in self.selection:
+                self._draw_selection(g)
+            return
+
+        g.rect_id = self.canvas.create_rectangle(x1, y1, x2, y2, outline="#333", width=2, fill="#f7f7f7", tags=tag)
+        if g.block:
+            # Bloc : une seule boîte, titre en haut et noms des ports le long des bords
+            g.text_id = self.canvas.create_text((x1 + x2) / 2, y1 + 8 * self.scale, text=g.title()[:12], font=("Arial", 9, "bold"), fill="black", tags=tag)
+            for p, port in zip(g.inputs + g.outputs, g.block.input_names + g.block.output_names):
+                dx = 10 if p.kind == "in" else -10
+                lx, ly = self.w2c(p.x + dx, p.y)
+                p.label_id = self.canvas.create_text(lx, ly, text=port, font=("Arial", 8), anchor="w" if p.kind == "in" else "e", tags=tag)
+        else:
+            g.text_id = self.canvas.create_text((x1 + x2) / 2, (y1 + y2) / 2, text=g.title(), font=("Arial", 12, "bold"), fill="black", tags=tag)
 
         # Bulle inversion
-        if g.gtype in ("NOT", "NOR"):
+        if g.is_inverting():
             cxw = g.x + GATE_W + INVERT_R
-            cyw = g.y + GATE_H // 2
+            cyw = g.y + g.h // 2
             cx, cy = self.w2c(cxw, cyw)
             r = INVERT_R * self.scale
-            g.invert_id = self.canvas.create_oval(cx - r, cy - r, cx + r, cy + r, outline="black", width=2, fill="white")
+            g.invert_id = self.canvas.create_oval(cx - r, cy - r, cx + r, cy + r, outline="black", width=2, fill="white", tags=tag)
 
         # Pins
         for p in g.inputs + g.outputs:
             cx, cy = self.w2c(p.x, p.y)
             r = PIN_R * self.scale
-            p.canvas_id = self.canvas.create_oval(cx - r, cy - r, cx + r, cy + r, outline="#222", width=2, fill=bool_to_color(p.value))
+            p.canvas_id = self.canvas.create_oval(cx - r, cy - r, cx + r, cy + r, outline="#222", width=2, fill=bool_to_color(p.value), tags=tag)
 
         # Textes/LED spécifiques
         if g.gtype == "SRC":
             tx, ty = self.w2c(g.x + GATE_W // 2, g.y + GATE_H - 12)
-            g.value_text_id = self.canvas.create_text(tx, ty, text="0", font=("Arial", 11), fill="black")
+            g.value_text_id = self.canvas.create_text(tx, ty, text="0", font=("Arial", 11), fill="black", tags=tag)
         elif g.gtype == "OUT":
             cxw, cyw = g.x + GATE_W - 18, g.y + GATE_H // 2
             cx, cy = self.w2c(cxw, cyw)
             rr = 10 * self.scale
-            g.led_id = self.canvas.create_oval(cx - rr, cy - rr, cx + rr, cy + rr, width=2)
+            g.led_id = self.canvas.create_oval(cx - rr, cy - rr, cx + rr, cy + rr, width=2, tags=tag)
             tx, ty = self.w2c(g.x + 20, g.y + GATE_H - 12)
-            g.value_text_id = self.canvas.create_text(tx, ty, text="?", font=("Arial", 11), fill="black")
+            g.value_text_id = self.canvas.create_text(tx, ty, text="?", font=("Arial", 11), fill="black", tags=tag)
+
+        if g in self.selection:
+            self._draw_selection(g)
+
+    def _draw_selection(self, g: Gate):
+        x1, y1 = self.w2c(g.x - 4, g.y - 4)
+        x2, y2 = self.w2c(g.x + GATE_W + 4, g.y + g.h + 4)
+        self.canvas.create_rectangle(x1, y1, x2, y2, outline=COLOR_SEL, width=2, dash=(4, 2), tags=(f"g{g.gid}", "sel"))
+
+    def set_selection(self, gates):
+        self.canvas.delete("sel")
+        self.selection = set(gates)
+        for g in self.selection:
+            self._draw_selection(g)
 
     def redraw_all(self):
         self.canvas.delete("all")
         for g in self.gates:
             g.update_pin_positions()
             self.draw_gate(g)
-        for w in self.wires:
-            self.draw_wire(w)
+        if self.is_overview():
+            for g in self.gates:
+                for p in g.outputs:
+                    self._draw_net(p)
+        else:
+            for w in self.wires:
+                self.draw_wire(w)
         self.update_colors()
+        self._draw_analysis()
+        self._draw_lint()
+
+    def _draw_net(self, pin: Pin):
+        """Vue d'ensemble : tous les fils d'une sortie en un seul tracé (allers-retours depuis la source).
+
+        L'identifiant du tracé est gardé dans `pin.canvas_id` (la pin elle-même n'est pas dessinée).
+        """
+        if pin.canvas_id:
+            self.canvas.delete(pin.canvas_id)
+            pin.canvas_id = None
+        pts = []
+        for w in pin.wires:
+            if w.src is pin:
+                if w.route is None:
+                    self._route_wire(w)
+                pts.extend(w.route)
+                pts.extend(w.route[-2::-1])
+        if len(pts) < 2:
+            return
+        pin.canvas_id = self.canvas.create_line(*[c for p in pts for c in self.w2c(*p)], width=1, fill=bool_to_color(pin.value))
+        for w in pin.wires:
+            if w.src is pin:
+                w.canvas_id = pin.canvas_id
 
     def draw_wire(self, w: Wire):
-        x1, y1 = self.w2c(w.src.x, w.src.y)
-        x2, y2 = self.w2c(w.dst.x, w.dst.y)
-        width = max(1, int(3 * self.scale))
-        w.canvas_id = self.canvas.create_line(x1, y1, x2, y2, width=width, fill=bool_to_color(w.value))
+        if self.is_overview():
+            self._draw_net(w.src)
+            return
+        if w.route is None:
+            self._route_wire(w)
+        width = max(1, int((6 if w.src.width > 1 else 3) * self.scale))
+        w.canvas_id = self.canvas.create_line(*self._wire_coords(w), width=width, fill=bool_to_color(w.value))
 
     def update_colors(self):
-        for g in self.gates:
-            for p in g.inputs + g.outputs:
-                self.canvas.itemconfig(p.canvas_id, fill=bool_to_color(p.value))
-            
-            if g.gtype == "SRC" and g.value_text_id:
-                self.canvas.itemconfig(g.value_text_id, text="1" if g.value else "0", fill="black")
-            elif g.gtype == "OUT":
-                v = g.inputs[0].value
-                self.canvas.itemconfig(g.value_text_id, text="?" if v is None else ("1" if v else "0"))
-                self.canvas.itemconfig(g.led_id, outline=bool_to_color(v), fill=bool_to_color(v))
-            
-            if g.gtype in ("NOT", "NOR") and g.invert_id:
-                v = g.outputs[0].value
-                self.canvas.itemconfig(g.invert_id, outline=bool_to_color(v))
+        if self.is_overview():
+            # Vue d'ensemble : seules les entrées / sorties restent colorées (remplissage du rectangle)
+            for g in self.gates:
+                if g.gtype == "SRC":
+                    self.canvas.itemconfig(g.rect_id, fill=bool_to_color(g.value))
+                elif g.gtype == "OUT":
+                    self.canvas.itemconfig(g.rect_id, fill=bool_to_color(g.inputs[0].value))
+        else:
+            for g in self.gates:
+                for p in g.inputs + g.outputs:
+                    self.canvas.itemconfig(p.canvas_id, fill=bool_to_color(p.value))
+
+                if g.gtype == "SRC" and g.value_text_id:
+                    self.canvas.itemconfig(g.value_text_id, text=format_value(g.value, g.width), fill="black")
+                elif g.gtype == "OUT":
+                    v = g.inputs[0].value
+                    self.canvas.itemconfig(g.value_text_id, text=format_value(v, g.width))
+                    self.canvas.itemconfig(g.led_id, outline=bool_to_color(v), fill=bool_to_color(v))
+
+                if g.invert_id:
+                    v = g.outputs[0].value
+                    self.canvas.itemconfig(g.invert_id, outline=bool_to_color(v))
 
         for w in self.wires:
             self.canvas.itemconfig(w.canvas_id, fill=bool_to_color(w.value))
 
     def find_pin_at(self, x, y):
-        for g in reversed(self.gates):
+        for g in sorted(self.gate_index.query_point(x, y), key=lambda g: -g.gid):
             for p in g.inputs + g.outputs:
                 if p.hit_test(x, y):
                     return p
         return None
 
     def find_gate_at(self, x, y):
-        for g in reversed(self.gates):
-            if g.x <= x <= g.x + GATE_W and g.y <= y <= g.y + GATE_H:
-                return g
-        return None
+        hits = [g for g in self.gate_index.query_point(x, y) if g.x <= x <= g.x + GATE_W and g.y <= y <= g.y + g.h]
+        return max(hits, key=lambda g: g.gid, default=None)
 
     def on_click(self, event):
         m = self.mode.get()
@@ -406,17 +913,27 @@ class App:
             w = self.find_wire_at(wx, wy)
             if w:
                 self.delete_wire(w)
+                self.history.record(historique.DeleteWire(w))
                 self.simulate()
                 return
             g = self.find_gate_at(wx, wy)
             if g:
-                self.delete_gate(g)
+                wires = self.delete_gate(g)
+                self.history.record(historique.DeleteGate(g, wires))
                 self.simulate()
             return
 
         if m.startswith("place:"):
             gtype = m.split(":", 1)[1]
-            self.add_gate(gtype, wx, wy)
+            if gtype == "BLOCK":
+                g = self.add_gate(gtype, wx, wy, ref=self.pending_block_ref)
+            else:
+                n_inputs = self.n_inputs.get() if gtype in Gate.NARY else None
+                width = self.bus_width.get()
+                if gtype in ("SPLIT", "MERGE"):
+                    width = max(width, 2)
+                g = self.add_gate(gtype, wx, wy, n_inputs=n_inputs, width=width)
+            self.history.record(historique.AddGate(g))
             self.simulate()
             return
 
@@ -430,27 +947,44 @@ class App:
                     self.pending_wire_src = pin
                     self.status.config(text="Fil: maintenant clique une entrée")
             else:
-                if pin.kind == "in":
+                if pin.kind == "in" and pin.width != self.pending_wire_src.width:
+                    self.status.config(text=f"Fil: largeurs incompatibles ({self.pending_wire_src.width} → {pin.width} bits)")
+                elif pin.kind == "in":
+                    already = any(w.dst is pin for w in pin.wires)
                     w = Wire(self.pending_wire_src, pin)
-                    self.wires.append(w)
-                    self.draw_wire(w)
+                    self._insert_wire(w)
+                    self.history.record(historique.AddWire(w))
                     self.pending_wire_src = None
-                    self.topo_dirty = True
-                    self.status.config(text="Mode: fil (clic sortie → clic entrée)")
+                    self.status.config(text="Attention : entrée déjà reliée, elle a maintenant plusieurs fils" if already
+                                       else "Mode: fil (clic sortie → clic entrée)")
                     self.simulate()
 
     def on_double_click(self, event):
         wx, wy = self.c2w(event.x, event.y)
         g = self.find_gate_at(wx, wy)
-        if g and g.gtype == "SRC":
-            g.value = not g.value
-            self.simulate()
+        if g and g.gtype == "SRC" and g.width > 1:
+            v = simpledialog.askinteger("Valeur du bus", f"Valeur (0 à {(1 << g.width) - 1}) :", initialvalue=g.value,
+                                        minvalue=0, maxvalue=(1 << g.width) - 1)
+            if v is not None:
+                self.history.execute(historique.SetValue(g, g.value, v))
+
+        elif g and g.gtype == "SRC":
+            self.history.execute(historique.SetValue(g, g.value, not g.value))
 
         elif g and g.gtype == "OUT":
             name = simpledialog.askstring("Nom de la sortie", "Nom de la sortie :")
             if name:
-                g.name = name.strip()
-                self.redraw_all()
+                self.history.execute(historique.Rename(g, g.name, name.strip()))
+
+        elif g and g.gtype in Gate.NARY:
+            n = simpledialog.askinteger("Nombre d'entrées", "Nombre d'entrées :", initialvalue=len(g.inputs),
+                                        minvalue=2, maxvalue=portes.MAX_INPUTS)
+            if n and n != len(g.inputs):
+                self.set_input_count(g, n)
+
+    def set_input_count(self, g: Gate, n: int):
+        wires = [w for p in g.inputs[n:] for w in p.wires]
+        self.history.execute(historique.SetInputCount(g, len(g.inputs), n, wires))
 
     def _build_topo_order(self):
         """Construit un ordre topologique des gates pour simulation optimisée"""
@@ -487,6 +1021,7 @@ class App:
             order.extend(remaining)
         
         self.topo_order = order
+        self.topo_pos = {gid: i for i, gid in enumerate(order)}
         self.topo_dirty = False
 
     def simulate(self):
@@ -523,62 +1058,197 @@ class App:
                 if not g or g.gtype in ("SRC", "OUT"):
                     continue
                 
-                out = g.compute()
-                if g.outputs and g.outputs[0].value != out:
-                    g.outputs[0].value = out
-                    changed = True
+                for p, out in zip(g.outputs, g.compute_outputs()):
+                    if p.value != out:
+                        p.value = out
+                        changed = True
 
             if not changed:
                 break
 
         self.update_colors()
 
-    def save_file(self):
-        path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("Circuit JSON", "*.json")])
-        if not path:
-            return
-        
-        data = {
+    def circuit_data(self):
+        return {
             "gates": [g.as_dict() for g in self.gates],
             "wires": [w.as_dict() for w in self.wires],
             "next_gid": self.next_gid,
         }
-        saveAndLoad.save(path, data)
+
+    def save_file(self):
+        path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("Circuit JSON", "*.json"),
+                                                                                 ("Verilog structurel", "*.v"),
+                                                                                 ("Netlist BLIF", "*.blif")])
+        if not path:
+            return
+
+        ext = os.path.splitext(path)[1].lower()
+        if ext in (".v", ".blif"):
+            # Export : le fichier de travail (et son journal) ne change pas
+            module = os.path.splitext(os.path.basename(path))[0]
+            try:
+                (echange.save_verilog if ext == ".v" else echange.save_blif)(path, self.circuit_data(), module)
+            except Exception as e:
+                messagebox.showerror("Export", f"Export impossible :\n{e}")
+                return
+            messagebox.showinfo("Export", "Circuit exporté.")
+            return
+
+        saveAndLoad.save(path, self.circuit_data())
+        self._start_journal(path)
         messagebox.showinfo("Sauvegarde", "Circuit sauvegardé.")
 
     def load_file(self):
-        path = filedialog.askopenfilename(filetypes=[("Circuit JSON", "*.json")])
+        path = filedialog.askopenfilename(filetypes=[("Circuit JSON", "*.json"), ("Netlist BLIF", "*.blif")])
         if not path:
             return
-        self.load_from_path(path)
+        if path.lower().endswith(".blif"):
+            self.import_blif(path)
+            return
+        try:
+            self.load_from_path(path)
+        except (ValueError, OSError) as e:
+            messagebox.showerror("Erreur", f"Impossible de charger ce circuit :\n{e}")
+
+    def import_blif(self, path: str):
+        """Importe une netlist BLIF comme nouveau circuit sans nom (disposé automatiquement)."""
+        try:
+            data = echange.read_blif(path)
+            self.load_from_data(data)
+        except (ValueError, OSError) as e:
+            messagebox.showerror("Import BLIF", f"Fichier illisible :\n{e}")
+            return
+        self._start_journal(None)
+
+    def _gate_from_dict(self, gd: dict, gid=None, dx=0, dy=0):
+        g = Gate(gd["gid"] if gid is None else gid, gd["type"], gd.get("x", 0) + dx, gd.get("y", 0) + dy, name=gd.get("name"),
+                 ref=gd.get("ref"), n_inputs=gd.get("inputs"), width=gd.get("width"), base_dir=self.doc_dir)
+        if g.gtype == "SRC":
+            g.value = bool(gd.get("value", False)) if g.width == 1 else int(gd.get("value") or 0)
+        return g
+
+    def load_from_data(self, data: dict, base_dir: str | None = None):
+        """Remplace le circuit affiché ; ValueError (liste des erreurs) si `data` est incohérent.
+
+        `base_dir` : dossier du fichier, pour les sous-circuits à chemin relatif.
+        """
+        checker = verification.Checker(data, base_dir)
+        report = checker.report()
+        if report.errors:
+            raise ValueError(report.describe())
+        self.doc_dir = base_dir
 
-    def load_from_data(self, data: dict):
         self.gates = []
         self.wires = []
         self.gate_by_gid = {}
+        self.gate_index.clear()
+        self.wire_index.clear()
+        self.selection = set()
         self.next_gid = data.get("next_gid", 1)
         self.topo_dirty = True
+        self.history.clear()
 
         for gd in data.get("gates", []):
-            g = Gate(gd["gid"], gd["type"], gd["x"], gd["y"], name=gd.get("name"))
-            if g.gtype == "SRC":
-                g.value = bool(gd.get("value", False))
+            g = self._gate_from_dict(gd)
             self.gates.append(g)
             self.gate_by_gid[g.gid] = g
+            self.gate_index.insert(g, g.bbox())
 
         for wd in data.get("wires", []):
             sg = self.gate_by_gid[wd["src_gate"]]
             dg = self.gate_by_gid[wd["dst_gate"]]
             src_pin = sg.outputs[wd["src_pin"]]
             dst_pin = dg.inputs[wd["dst_pin"]]
-            self.wires.append(Wire(src_pin, dst_pin))
+            self._attach_new(Wire(src_pin, dst_pin))
 
-        self.redraw_all()
+        # Netlist importée sans coordonnées : disposition automatique
+        if any("x" not in gd or "y" not in gd for gd in data.get("gates", [])):
+            pos = self._layout_positions()
+            self.place_gates([(g, pos[g.gid]) for g in self.gates])
+        else:
+            self.redraw_all()
         self.simulate()
+        self.checker = checker
+        self._draw_lint()
+        if report.issues:
+            self.status.config(text=f"Vérification : {len(report.issues)} problème(s) (gates encadrées)")
 
     def load_from_path(self, path: str):
+        if self.offer_recovery(path):
+            return
         data = saveAndLoad.load(path)
-        self.load_from_data(data)
+        self.load_from_data(data, os.path.dirname(os.path.abspath(path)))
+        self._start_journal(path)
+
+    # --- Sauvegarde automatique ---
+    def _start_journal(self, path=None, header=None):
+        """Nouveau journal pour le fichier de travail `path` (None = circuit sans nom)."""
+        self.current_path = path
+        if header is None:
+            header = journal.base_header(path) if path else journal.snapshot_header(self.circuit_data())
+        self._cancel_compaction()
+        self.journal.reset(journal.journal_path(path), header)
+
+    def _journal_command(self, cmd, direction):
+        if cmd is None:
+            return
+        failed = self.journal.failed
+        if not self.journal.append(cmd.undo_dict() if direction == "undo" else cmd.as_dict()):
+            if not failed:
+                self._journal_failed()
+            return
+        self._cancel_compaction()
+        self._compact_job = self.root.after(AUTOSAVE_IDLE_MS, self._compact_journal)
+
+    def _journal_failed(self):
+        self.status.config(text="Sauvegarde automatique désactivée : impossible d'écrire le journal "
+                                f"({os.path.dirname(self.journal.path)})")
+
+    def _cancel_compaction(self):
+        if self._compact_job is not None:
+            self.root.after_cancel(self._compact_job)
+            self._compact_job = None
+
+    def _compact_journal(self):
+        self._compact_job = None
+        if self.journal.count and not self.journal.compact(self.circuit_data()):
+            self._journal_failed()
+
+    def _snapshot_journal(self):
+        """Écrit tout de suite un instantané (circuit généré hors historique)."""
+        self._cancel_compaction()
+        if not self.journal.failed and not self.journal.compact(self.circuit_data()):
+            self._journal_failed()
+
+    def offer_recovery(self, path=None):
+        """Propose de reprendre les modifications d'une session interrompue."""
+        jpath = journal.journal_path(path)
+        try:
+            data = journal.recover(jpath)
+        except Exception:
+            data = None
+        if data is None:
+            return False
+        name = os.path.basename(path) if path else "circuit sans nom"
+        if not messagebox.askyesno("Récupération",
+                                   f"Des modifications non sauvegardées ({name}) ont été trouvées.\nLes récupérer ?"):
+            try:
+                os.remove(jpath)
+            except OSError:
+                pass
+            return False
+        self.load_from_data(data, os.path.dirname(os.path.abspath(path)) if path else None)
+        self._start_journal(path, journal.snapshot_header(data))
+        self._snapshot_journal()
+        return True
+
+    def quit(self):
+        if self.journal.dirty and not messagebox.askyesno(
+                "Quitter", "Quitter sans sauvegarder ?\nLes modifications non sauvegardées seront perdues."):
+            return
+        self._cancel_compaction()
+        self.journal.discard()
+        self.root.destroy()
 
     def load_dialog(self):
 
@@ -710,12 +1380,11 @@ class App:
         return {(w.dst.owner.gid, w.dst.index): (w.src.owner.gid, w.src.index) for w in self.wires}
 
     def _var_names(self, n):
-        letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
-        return list(letters[:n]) if n <= len(letters) else [f"A{i}" for i in range(n)]
+        return netlist.var_names(n)
 
-    def _expr_for_gate_out(self, gate_gid, dst_to_src, gid_map, src_name_by_gid, visiting, memo):
-        if gate_gid in memo:
-            return memo[gate_gid]
+    def _expr_for_gate_out(self, gate_gid, dst_to_src, gid_map, src_name_by_gid, visiting, memo, pin=0):
+        if (gate_gid, pin) in memo:
+            return memo[(gate_gid, pin)]
         if gate_gid in visiting:
             return ("?", 0)
 
@@ -729,71 +1398,41 @@ class App:
                 key = (gate_gid, i)
                 if key not in dst_to_src:
                     return ("Ø", 3)
-                src_gid, _ = dst_to_src[key]
-                return self._expr_for_gate_out(src_gid, dst_to_src, gid_map, src_name_by_gid, visiting, memo)
+                src_gid, src_pin = dst_to_src[key]
+                return self._expr_for_gate_out(src_gid, dst_to_src, gid_map, src_name_by_gid, visiting, memo, src_pin)
 
-            if g.gtype == "NOT":
+            if g.block:
+                args = ", ".join(get(i)[0] for i in range(len(g.inputs)))
+                e = (f"{g.block.title}.{g.block.output_names[pin]}({args})", 3)
+            elif g.gtype == "NOT":
                 a, pa = get(0)
                 a = f"({a})" if pa < 3 else a
                 e = (self.overline(a), 3)
-            elif g.gtype == "AND":
-                (a, pa), (b, pb) = get(0), get(1)
-                a = f"({a})" if pa < 2 else a
-                b = f"({b})" if pb < 2 else b
-                e = (f"{a}.{b}", 2)
-            elif g.gtype == "OR":
-                (a, pa), (b, pb) = get(0), get(1)
-                a = f"({a})" if pa < 1 else a
-                b = f"({b})" if pb < 1 else b
-                e = (f"{a} + {b}", 1)
-            elif g.gtype == "XOR":
-                (a, pa), (b, pb) = get(0), get(1)
-                a = f"({a})" if pa < 1 else a
-                b = f"({b})" if pb < 1 else b
-                e = (f"{a} ⊕ {b}", 1)
-            elif g.gtype == "NOR":
-                (a, pa), (b, pb) = get(0), get(1)
-                inner = f"{a} + {b}"
-                if pa < 1 or pb < 1:
-                    inner = f"({inner})"
-                e = (self.overline(inner), 3)
+            elif g.gtype == "SPLIT":
+                a, pa = get(0)
+                a = f"({a})" if pa < 3 else a
+                e = (f"{a}[{pin}]", 3)
+            elif g.gtype == "MERGE":
+                # Concaténation, bit de poids fort en premier
+                e = ("{" + ", ".join(get(i)[0] for i in reversed(range(len(g.inputs)))) + "}", 3)
+            elif g.gtype in Gate.NARY:
+                # ET/NON-ET : ".", OU/NOR : "+", XOR/XNOR : "⊕" ; inversion = surlignage
+                sep, prec = {"AND": (".", 2), "NAND": (".", 2), "OR": (" + ", 1), "NOR": (" + ", 1),
+                             "XOR": (" ⊕ ", 1), "XNOR": (" ⊕ ", 1)}[g.gtype]
+                terms = []
+                for i in range(len(g.inputs)):
+                    a, pa = get(i)
+                    terms.append(f"({a})" if pa < prec else a)
+                e = (sep.join(terms), prec)
+                if g.is_inverting():
+                    e = (self.overline(e[0]), 3)
             else:
                 e = ("?", 0)
 
-        memo[gate_gid] = e
+        memo[(gate_gid, pin)] = e
         visiting.remove(gate_gid)
         return e
 
-    def _value_for_gate_out(self, gate_gid, assignment_by_gid, dst_to_src, gid_map, visiting, memo):
-        if gate_gid in memo:
-            return memo[gate_gid]
-        if gate_gid in visiting:
-            return None
-
-        visiting.add(gate_gid)
-        g = gid_map[gate_gid]
-
-        if g.gtype == "SRC":
-            v = assignment_by_gid.get(gate_gid, False)
-        else:
-            def val_of_input(i):
-                key = (gate_gid, i)
-                if key not in dst_to_src:
-                    return None
-                src_gid, _ = dst_to_src[key]
-                return self._value_for_gate_out(src_gid, assignment_by_gid, dst_to_src, gid_map, visiting, memo)
-
-            compute_func = Gate.COMPUTE_FUNCS.get(g.gtype)
-            if compute_func:
-                inputs = [val_of_input(i) for i in range(len(g.inputs))]
-                v = None if None in inputs else compute_func(inputs)
-            else:
-                v = None
-
-        memo[gate_gid] = v
-        visiting.remove(gate_gid)
-        return v
-
     def show_truth_table(self):
         srcs, outs = self._get_io()
         if not srcs:
@@ -802,36 +1441,28 @@ class App:
         if not outs:
             messagebox.showwarning("Table de vérité", "Aucune sortie (OUT) dans le circuit.")
             return
-        if len(srcs) > 8:
-            messagebox.showwarning("Table de vérité", "Trop d'entrées (SRC) pour afficher une table complète (max conseillé : 8).")
+        data = self.circuit_data()
+        key, pin_keys = empreinte.structural_hashes(data, self.doc_dir)
+        if sum(g.width for g in srcs) > 8:
+            # Table complète illisible : résumé calculé par BDD, sans énumérer les combinaisons
+            summary = self.results.get("bdd", key)
+            if summary is None:
+                summary = bdd.summary(netlist.compile_circuit(data, self.doc_dir))
+                self.results.put("bdd", key, summary)
+            n = sum(g.width for g in srcs)
+            if messagebox.askyesno("Table de vérité", "Trop d'entrées (SRC) pour afficher une table complète (max conseillé : 8 bits).\n\n"
+                                   + "\n".join(summary) + f"\n\nExporter la table complète ({1 << n} lignes) en CSV ou en binaire ?"):
+                self.export_truth_table(data)
+            return
+        if self.truth_view is not None:
+            self.truth_view.win.lift()
             return
 
-        gid_map = self.gate_by_gid
-        dst_to_src = self._build_dst_to_src()
-        order = self._topological_gates(dst_to_src, gid_map)
-
-        fallback = self._var_names(len(srcs))
-        var_names = [(g.name or "").strip() or fallback[i] for i, g in enumerate(srcs)]
-        src_name_by_gid = {srcs[i].gid: var_names[i] for i in range(len(srcs))}
-
-        intermediate = []
-        for gid in order:
-            g = gid_map[gid]
-            if g.gtype not in ("SRC", "OUT"):
-                expr, _ = self._expr_for_gate_out(gid, dst_to_src, gid_map, src_name_by_gid, set(), {})
-                intermediate.append((gid, expr))
-
-        single_output = len(outs) == 1
-        out_exprs = []
-        for i, outg in enumerate(outs):
-            out_name = outg.name or ("S" if single_output else f"{outg.gid}")
-            key = (outg.gid, 0)
-            if key not in dst_to_src:
-                out_exprs.append((out_name, "Ø"))
-            else:
-                src_gid, _ = dst_to_src[key]
-                expr, _ = self._expr_for_gate_out(src_gid, dst_to_src, gid_map, src_name_by_gid, set(), {})
-                out_exprs.append((out_name, expr))
+        # Colonnes déjà calculées pour cette structure : {empreinte de pin: (expression, cases)}
+        table = self.results.get("table", key)
+        known = {}
+        if table is not None:
+            known = {h: (e, table["cells"][h]) for h, e in table["exprs"].items() if h in table["cells"]}
 
         # Fenêtre
         win = Toplevel(self.root)
@@ -842,44 +1473,558 @@ class App:
         expr_frame.pack(fill=X)
         Label(expr_frame, text="Expression(s) booléenne(s) :", font=("Arial", 12, "bold")).pack(anchor="w")
         
-        expr_text = Text(expr_frame, height=min(6, 2 + len(out_exprs)), wrap="word")
+        expr_text = Text(expr_frame, height=min(6, 2 + len(outs)), wrap="word")
         expr_text.pack(fill=X, pady=(6, 0))
-        expr_text.insert("end", "\n".join([f"{name} = {expr}" for name, expr in out_exprs]))
-        expr_text.config(state="disabled")
+        note = Label(expr_frame, text="", fg="#a00")
+        note.pack(anchor="w")
+
+        buttons = Frame(expr_frame)
+        buttons.pack(anchor="w", pady=(6, 0))
+        Button(buttons, text="Minimiser…", command=self.show_minimized).pack(side=LEFT)
+        Button(buttons, text="Karnaugh…", command=self.show_karnaugh).pack(side=LEFT, padx=(6, 0))
+        Button(buttons, text="Exporter…", command=lambda: self.export_truth_table(self.circuit_data(), intermediates=True)
+               ).pack(side=LEFT, padx=(6, 0))
 
         table_frame = Frame(win, padx=10, pady=10)
         table_frame.pack(fill=BOTH, expand=True)
 
-        cols = var_names + [expr for _, expr in intermediate] + [name for name, _ in out_exprs]
-        tree = ttk.Treeview(table_frame, columns=cols, show="headings")
+        tree = ttk.Treeview(table_frame, columns=(), show="headings")
         tree.pack(side=LEFT, fill=BOTH, expand=True)
 
-        for c in cols:
-            tree.heading(c, text=c)
-            tree.column(c, width=70, anchor="center")
-
         scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=tree.yview)
         scrollbar.pack(side=RIGHT, fill=Y)
         tree.configure(yscrollcommand=scrollbar.set)
 
-        for bits in product([0, 1], repeat=len(srcs)):
-            assignment_by_gid = {srcs[i].gid: bool(bits[i]) for i in range(len(srcs))}
-            row = list(bits)
+        def close():
+            if self.truth_view.job is not None:
+                self.root.after_cancel(self.truth_view.job)
+            self.truth_view = None
+            win.destroy()
 
-            for gid, _ in intermediate:
-                v = self._value_for_gate_out(gid, assignment_by_gid, dst_to_src, gid_map, set(), {})
-                row.append("?" if v is None else ("1" if v else "0"))
+        win.protocol("WM_DELETE_WINDOW", close)
+        self.truth_view = TruthView(win, tree, expr_text, note, known)
+        self._refresh_truth_view(data, pin_keys)
+        if table is None:
+            self.results.put("table", key, {"exprs": {h: e for h, (e, _) in self.truth_view.known.items()},
+                                            "cells": {h: c for h, (_, c) in self.truth_view.known.items()}})
+
+    def _schedule_truth_refresh(self):
+        for view, refresh in ((self.truth_view, self._refresh_truth_view),
+                              (self.karnaugh_view, self._refresh_karnaugh)):
+            if view is not None and view.job is None:
+                view.job = self.root.after_idle(refresh)
+
+    def _truth_columns(self, data, pin_keys, known):
+        """Colonnes de la table, [(id, titre, empreinte, cases)], et expressions des sorties.
+
+        Seules les pins dont l'empreinte (celle de leur cône) est absente de `known`
+        sont recalculées, sur leur cône seulement ; `known` est complété.
+        """
+        srcs, outs = self._get_io()
+        gid_map = self.gate_by_gid
+        dst_to_src = self._build_dst_to_src()
+        order = self._topological_gates(dst_to_src, gid_map)
 
-            for outg in outs:
-                key = (outg.gid, 0)
-                if key not in dst_to_src:
-                    row.append("?")
+        fallback = self._var_names(len(srcs))
+        var_names = [(g.name or "").strip() or fallback[i] for i, g in enumerate(srcs)]
+        src_name_by_gid = {srcs[i].gid: var_names[i] for i in range(len(srcs))}
+
+        pins = [(gid, pin) for gid in order if gid_map[gid].gtype not in ("SRC", "OUT")
+                for pin in range(len(gid_map[gid].outputs))]
+        src_pins = [(g.gid, 0) for g in srcs]
+        out_pins = [(g.gid, 0) for g in outs]     # empreinte de la sortie elle-même
+        keys = {p: pin_keys.get(p) for p in src_pins + pins + out_pins}
+        # Pin dans une boucle : pas d'empreinte, toujours recalculée
+        missing = [p for p, h in keys.items() if h is None or h not in known]
+
+        src_set, out_set = set(src_pins), set(out_pins)
+        if missing:
+            compiled = netlist.compile_circuit(data, self.doc_dir)
+            nets = {p: compiled.out_nets_of[p[0]] if p in out_set else compiled.net_of[p] for p in missing}
+            (_, _, mask, words), = netlist.exhaustive_chunks(compiled.n_inputs, compiled.n_inputs)
+            val, bits_known = compiled.evaluate(words, mask, ops=compiled.cone([n for ns in nets.values() for n in ns]))
+            for p in missing:
+                if p in src_set:
+                    expr = src_name_by_gid[p[0]]
+                elif p in out_set:
+                    if p not in dst_to_src:
+                        expr = "Ø"
+                    else:
+                        src_gid, src_pin = dst_to_src[p]
+                        expr = self._expr_for_gate_out(src_gid, dst_to_src, gid_map, src_name_by_gid, set(), {}, src_pin)[0]
                 else:
-                    src_gid, _ = dst_to_src[key]
-                    v = self._value_for_gate_out(src_gid, assignment_by_gid, dst_to_src, gid_map, set(), {})
-                    row.append("?" if v is None else ("1" if v else "0"))
+                    expr = self._expr_for_gate_out(p[0], dst_to_src, gid_map, src_name_by_gid, set(), {}, p[1])[0]
+                # Bus : valeur entière, "?" si un de ses bits est indéfini
+                col = []
+                for r in range(mask.bit_length()):
+                    if all((bits_known[n] >> r) & 1 for n in nets[p]):
+                        col.append(format_value(sum(((val[n] >> r) & 1) << b for b, n in enumerate(nets[p])), len(nets[p])))
+                    else:
+                        col.append("?")
+                known[keys[p] or p] = (expr, col)
+
+        single_output = len(outs) == 1
+        out_names = [g.name or ("S" if single_output else f"{g.gid}") for g in outs]
+        entry = lambda p: known[keys[p] or p]
+        columns = [(f"e{p[0]}", src_name_by_gid[p[0]], keys[p], entry(p)[1]) for p in src_pins]
+        columns += [(f"g{p[0]}_{p[1]}", entry(p)[0], keys[p], entry(p)[1]) for p in pins]
+        columns += [(f"s{p[0]}", name, keys[p], entry(p)[1]) for p, name in zip(out_pins, out_names)]
+        out_exprs = [(name, entry(p)[0]) for p, name in zip(out_pins, out_names)]
+        # Pins hors empreinte : recalculées à chaque fois, inutile de les garder
+        for p in src_pins + pins + out_pins:
+            if keys[p] is None:
+                known.pop(p, None)
+        return columns, out_exprs
+
+    def _truth_table_problem(self):
+        srcs, outs = self._get_io()
+        if not srcs:
+            return "Aucune entrée (SRC) dans le circuit."
+        if not outs:
+            return "Aucune sortie (OUT) dans le circuit."
+        if sum(g.width for g in srcs) > 8:
+            return "Trop d'entrées (SRC) pour une table complète (max conseillé : 8 bits)."
+        return None
+
+    def _refresh_truth_view(self, data=None, pin_keys=None):
+        """Met la table à jour après une modification : seules les colonnes dont le cône a changé sont réécrites."""
+        view = self.truth_view
+        if view is None:
+            return
+        view.job = None
+        tree = view.tree
+        problem = self._truth_table_problem()
+        view.note.config(text=problem or "")
+        if problem:
+            tree.delete(*view.rows)
+            view.rows = []
+            view.keys = {}
+            return
+
+        if data is None:
+            data = self.circuit_data()
+            pin_keys = empreinte.structural_hashes(data, self.doc_dir)[1]
+        columns, out_exprs = self._truth_columns(data, pin_keys, view.known)
+        ids = [cid for cid, _, _, _ in columns]
+        n_rows = len(columns[0][3])
+
+        if ids != view.col_ids:
+            # Colonnes ajoutées, retirées ou déplacées : toutes les lignes sont réécrites
+            tree.configure(columns=ids)
+            for cid, title, _, _ in columns:
+                tree.heading(cid, text=title)
+                tree.column(cid, width=70, anchor="center")
+            view.col_ids = ids
+            changed = columns
+        else:
+            changed = [col for col in columns if col[2] is None or view.keys.get(col[0]) != col[2]]
+            for cid, title, _, _ in changed:
+                tree.heading(cid, text=title)
+
+        if n_rows != len(view.rows) or changed is columns:
+            # Nombre de lignes changé (entrées) ou colonnes changées : lignes entières
+            tree.delete(*view.rows)
+            view.rows = [tree.insert("", "end", values=row) for row in zip(*(col[3] for col in columns))]
+        else:
+            for cid, _, _, cells in changed:
+                for iid, v in zip(view.rows, cells):
+                    tree.set(iid, cid, v)
+        view.keys = {cid: h for cid, _, h, _ in columns}
+
+        # Colonnes disparues : leurs résultats ne servent plus
+        current = set(view.keys.values())
+        view.known = {h: v for h, v in view.known.items() if h in current}
+
+        text = "\n".join(f"{name} = {expr}" for name, expr in out_exprs)
+        if text != view.exprs:
+            view.exprs = text
+            view.expr_text.config(state="normal")
+            view.expr_text.delete("1.0", "end")
+            view.expr_text.insert("end", text)
+            view.expr_text.config(state="disabled")
+
+    def _karnaugh_problem(self):
+        srcs, outs = self._get_io()
+        if not srcs:
+            return "Aucune entrée (SRC) dans le circuit."
+        if not outs:
+            return "Aucune sortie (OUT) dans le circuit."
+        if any(g.width > 1 for g in srcs + outs):
+            return "Tableau de Karnaugh : entrées et sorties d'un bit seulement."
+        if not karnaugh.MIN_INPUTS <= len(srcs) <= karnaugh.MAX_INPUTS:
+            return f"Tableau de Karnaugh : {karnaugh.MIN_INPUTS} à {karnaugh.MAX_INPUTS} entrées."
+        return None
+
+    def show_karnaugh(self):
+        problem = self._karnaugh_problem()
+        if problem:
+            messagebox.showwarning("Tableau de Karnaugh", problem)
+            return
+        if self.karnaugh_view is not None:
+            self.karnaugh_view.win.lift()
+            return
+
+        # Colonnes de sortie déjà calculées (table ouverte ou cache) : rien à réévaluer
+        data = self.circuit_data()
+        key, pin_keys = empreinte.structural_hashes(data, self.doc_dir)
+        known = dict(self.truth_view.known) if self.truth_view is not None else {}
+        table = self.results.get("table", key)
+        if table is not None:
+            known.update((h, (e, table["cells"][h])) for h, e in table["exprs"].items() if h in table["cells"])
+
+        win = Toplevel(self.root)
+        win.title("Tableau de Karnaugh")
+
+        top = Frame(win, padx=10, pady=10)
+        top.pack(fill=X)
+        Label(top, text="Sortie :", font=("Arial", 12, "bold")).pack(side=LEFT)
+        combo = ttk.Combobox(top, state="readonly", width=14)
+        combo.pack(side=LEFT, padx=(6, 0))
+        expr = Label(win, text="", justify="left", anchor="w", padx=10)
+        expr.pack(fill=X)
+        canvas = Canvas(win, bg="white", highlightthickness=0)
+        canvas.pack(padx=10, pady=10)
+
+        def select(event=None):
+            view = self.karnaugh_view
+            view.selected = view.outputs[combo.current()]
+            self._refresh_karnaugh()
+
+        def close():
+            if self.karnaugh_view.job is not None:
+                self.root.after_cancel(self.karnaugh_view.job)
+            self.karnaugh_view = None
+            win.destroy()
+
+        combo.bind("<<ComboboxSelected>>", select)
+        win.protocol("WM_DELETE_WINDOW", close)
+        self.karnaugh_view = KarnaughView(win, canvas, combo, expr, known)
+        self._refresh_karnaugh(data, key, pin_keys)
+
+    def _refresh_karnaugh(self, data=None, key=None, pin_keys=None):
+        """Redessine le tableau à partir des colonnes de la table de vérité (recalculées si leur cône a changé)."""
+        view = self.karnaugh_view
+        if view is None:
+            return
+        view.job = None
+        problem = self._karnaugh_problem()
+        if problem:
+            view.canvas.delete("all")
+            view.expr.config(text=problem, fg="#a00")
+            view.combo.configure(values=())
+            view.combo.set("")
+            view.outputs = []
+            return
+
+        if data is None:
+            data = self.circuit_data()
+            key, pin_keys = empreinte.structural_hashes(data, self.doc_dir)
+        columns, _ = self._truth_columns(data, pin_keys, view.known)
+        current = {h for _, _, h, _ in columns}
+        view.known = {h: v for h, v in view.known.items() if h in current}
+
+        srcs, outs = self._get_io()
+        names = [title for cid, title, _, _ in columns if cid[0] == "e"]
+        cells = [col for cid, _, _, col in columns if cid[0] == "s"]
+        single_output = len(outs) == 1
+        out_names = [(g.name or "").strip() or ("S" if single_output else f"{g.gid}") for g in outs]
+
+        # Regroupements : cubes de la minimisation (mis en cache comme pour « Minimiser… »)
+        cubes = self.results.get("minimisation", key) if key else None
+        if cubes is None:
+            n = len(names)
+            cubes = []
+            for name, col in zip(out_names, cells):
+                val, bits_known = karnaugh.bitsets(col)
+                dc = ((1 << len(col)) - 1) & ~bits_known
+                cubes.append((name, minimisation.minimize(n, val, dc), minimisation.minimize(n, bits_known & ~val, dc)))
+            if key:
+                self.results.put("minimisation", key, cubes)
+
+        view.outputs = [g.gid for g in outs]
+        if view.selected not in view.outputs:
+            view.selected = view.outputs[0]
+        i = view.outputs.index(view.selected)
+        view.combo.configure(values=out_names)
+        view.combo.current(i)
+
+        sop = [tuple(c) for c in cubes[i][1]]
+        kmap = karnaugh.from_cells(names, cells[i], sop)
+        view.expr.config(text=f"{out_names[i]} = {minimisation.sop_expression(sop, names)}", fg="#000")
+        self._draw_karnaugh(view.canvas, kmap, [minimisation.sop_expression([c], names) for c in sop])
+
+    def _draw_karnaugh(self, canvas, kmap, terms):
+        """Tableau (cases en code de Gray), regroupements encadrés en couleur, termes en légende."""
+        canvas.delete("all")
+        cell = KMAP_CELL
+        n_rows, n_cols = len(kmap.row_codes), len(kmap.col_codes)
+        x0, y0 = 70, 40
+        canvas.create_text(x0 - 8, y0 - 8, text=f"{' '.join(kmap.row_names)} \\ {' '.join(kmap.col_names)}",
+                           anchor="se", font=("Arial", 10, "bold"))
+        for j, code in enumerate(kmap.col_codes):
+            canvas.create_text(x0 + (j + 0.5) * cell, y0 - 10, text=format(code, f"0{len(kmap.col_names)}b"), font=("Arial", 10))
+        for i, code in enumerate(kmap.row_codes):
+            canvas.create_text(x0 - 10, y0 + (i + 0.5) * cell, text=format(code, f"0{len(kmap.row_names)}b"),
+                               anchor="e", font=("Arial", 10))
+            for j, v in enumerate(kmap.cells[i]):
+                x, y = x0 + j * cell, y0 + i * cell
+                canvas.create_rectangle(x, y, x + cell, y + cell, outline="#999")
+                canvas.create_text(x + cell / 2, y + cell / 2, text=v, font=("Arial", 12),
+                                   fill=COLOR_1 if v == "1" else COLOR_UNDEF if v == "?" else COLOR_0)
+
+        # Regroupements emboîtés : retrait différent pour rester visibles
+        for k, rects in enumerate(kmap.groups):
+            color = KMAP_COLORS[k % len(KMAP_COLORS)]
+            inset = 4 + 3 * (k % 4)
+            for r1, c1, r2, c2 in rects:
+                canvas.create_rectangle(x0 + c1 * cell + inset, y0 + r1 * cell + inset,
+                                        x0 + (c2 + 1) * cell - inset, y0 + (r2 + 1) * cell - inset,
+                                        outline=color, width=2)
+
+        y = y0 + n_rows * cell + 16
+        for k, term in enumerate(terms):
+            canvas.create_text(x0, y + 18 * k, text=term, anchor="w", fill=KMAP_COLORS[k % len(KMAP_COLORS)],
+                               font=("Arial", 11, "bold"))
+        canvas.configure(width=x0 + n_cols * cell + 20, height=y + 18 * len(terms) + 4)
+
+    def _analysis(self):
+        self._build_topo_order()
+        return analyse.analyze(
+            {g.gid: g.gtype for g in self.gates},
+            [(w.src.owner.gid, w.src.index, w.dst.owner.gid) for w in self.wires],
+            [gid for gid in self.topo_order if gid in self.gate_by_gid],   # gates retirées : restent dans l'ordre
+            {g.gid: analyse.block_depth(g.block) for g in self.gates if g.block},
+        )
+
+    def _draw_analysis(self):
+        """Superposition : profondeur au-dessus de chaque gate, chemin critique en couleur."""
+        self.canvas.delete("analyse")
+        if not self.analysis_shown:
+            return
+        a = self._analysis()
+        on_path = set(a.critical_path)
+        pairs = set(zip(a.critical_path, a.critical_path[1:]))
+        for g in self.gates:
+            tags = ("analyse", f"g{g.gid}")
+            color = COLOR_PATH if g.gid in on_path else "#666"
+            if g.gid in on_path:
+                x1, y1 = self.w2c(g.x - 2, g.y - 2)
+                x2, y2 = self.w2c(g.x + GATE_W + 2, g.y + g.h + 2)
+                self.canvas.create_rectangle(x1, y1, x2, y2, outline=COLOR_PATH, width=3, tags=tags)
+            if not self.is_overview():
+                x, y = self.w2c(g.x + GATE_W / 2, g.y - 8)
+                self.canvas.create_text(x, y, text=f"p={a.depth[g.gid]}", fill=color, font=("Arial", 9), tags=tags)
+        for gid in a.critical_path:
+            for p in self.gate_by_gid[gid].outputs:
+                for w in p.wires:
+                    if w.src is p and (gid, w.dst.owner.gid) in pairs:
+                        self.canvas.create_line(*self._wire_coords(w), fill=COLOR_PATH, width=3, tags="analyse")
+        return a
+
+    def _lint_command(self, cmd, direction):
+        """Revérifie les gates touchées par la commande (mêmes opérations que le journal)."""
+        if cmd is None:
+            return
+        if self.checker is None:
+            self._reset_lint()
+            return
+        self.checker.apply(cmd.undo_dict() if direction == "undo" else cmd.as_dict())
+        self._draw_lint()
+
+    def _reset_lint(self):
+        self.checker = verification.Checker(self.circuit_data(), self.doc_dir)
+        self._draw_lint()
+
+    def _draw_lint(self):
+        """Superposition : cadre pointillé autour des gates signalées par la vérification."""
+        self.canvas.delete("lint")
+        if self.checker is None:
+            return None
+        report = self.checker.report()
+        for gid in report.gids():
+            g = self.gate_by_gid.get(gid)
+            if g is None:
+                continue
+            x1, y1 = self.w2c(g.x - 5, g.y - 5)
+            x2, y2 = self.w2c(g.x + GATE_W + 5, g.y + g.h + 5)
+            self.canvas.create_rectangle(x1, y1, x2, y2, outline=COLOR_LINT, width=2, dash=(4, 3), tags=("lint", f"g{gid}"))
+        return report
+
+    def show_lint(self):
+        if self.checker is None:
+            self._reset_lint()
+        report = self.checker.report()
+        labels = {g.gid: f"{g.name or (g.title() if g.block else g.gtype)} (#{g.gid})" for g in self.gates}
+
+        win = Toplevel(self.root)
+        win.title("Vérification du circuit")
+        frm = Frame(win, padx=10, pady=10)
+        frm.pack(fill=BOTH, expand=True)
+        text = Text(frm, height=14, width=80, wrap="word")
+        text.pack(fill=BOTH, expand=True)
+        text.insert("end", report.describe(limit=500))
+        if report.issues:
+            text.insert("end", "\n\nGates concernées : " + ", ".join(labels.get(gid, str(gid)) for gid in sorted(report.gids())[:50]))
+        text.config(state="disabled")
+        Label(frm, text="Les gates signalées sont encadrées sur le circuit (mis à jour à chaque modification).",
+              fg="#444").pack(anchor="w", pady=(6, 0))
+        Button(frm, text="Fermer", command=win.destroy).pack(side=RIGHT, pady=(6, 0))
+
+    def export_truth_table(self, data, intermediates=False):
+        """Table complète écrite au fil du calcul, en CSV ou en binaire par colonnes (.tvb).
+
+        Le calcul tourne dans un thread : l'interface reste utilisable et suit
+        l'avancement par root.after (seul le thread Tk touche aux widgets).
+        """
+        if self.export_thread is not None:
+            self.status.config(text="Un export de table de vérité est déjà en cours.")
+            return
+        path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("Table CSV", "*.csv"),
+                                                                                ("Table binaire en colonnes", "*.tvb")])
+        if not path:
+            return
+        write = tables.write_bits if path.lower().endswith(".tvb") else tables.write_csv
+        base_dir = self.doc_dir
+        state = {"done": 0, "total": 0, "error": None}
+
+        def progress(done, total):
+            state["done"], state["total"] = done, total
+
+        def run():
+            try:
+                write(netlist.compile_circuit(data, base_dir), path, processes=EXPORT_PROCESSES,
+                      progress=progress, intermediates=intermediates)
+            except Exception as e:
+                state["error"] = e
+
+        self.export_thread = threading.Thread(target=run, daemon=True)
+        self.export_thread.start()
+        self.status.config(text="Table de vérité : export en cours…")
+        self.root.after(EXPORT_POLL_MS, self._poll_export, path, state)
+
+    def _poll_export(self, path, state):
+        if self.export_thread.is_alive():
+            if state["total"]:
+                self.status.config(text=f"Table de vérité : {state['done']}/{state['total']} lignes")
+            self.root.after(EXPORT_POLL_MS, self._poll_export, path, state)
+            return
+        self.export_thread = None
+        if state["error"] is not None:
+            messagebox.showerror("Erreur", f"Export impossible :\n{state['error']}")
+            return
+        self.status.config(text=f"Table de vérité exportée : {os.path.basename(path)}")
+
+    def show_analysis(self):
+        self.analysis_shown = True
+        a = self._draw_analysis()
+        labels = {g.gid: f"{g.name or (g.title() if g.block else g.gtype)} (#{g.gid})" for g in self.gates}
+
+        win = Toplevel(self.root)
+        win.title("Analyse du circuit")
+        frm = Frame(win, padx=10, pady=10)
+        frm.pack(fill=BOTH, expand=True)
+        text = Text(frm, height=10, width=80, wrap="word")
+        text.pack(fill=BOTH, expand=True)
+        text.insert("end", a.describe(labels))
+        text.config(state="disabled")
+
+        def close():
+            self.analysis_shown = False
+            self.canvas.delete("analyse")
+            win.destroy()
+
+        def faults():
+            try:
+                report = fautes.run(self.circuit_data(), base_dir=self.doc_dir)
+            except Exception as e:
+                messagebox.showerror("Erreur", f"Simulation de fautes impossible :\n{e}")
+                return
+            text.config(state="normal")
+            text.insert("end", "\n\n" + report.describe())
+            text.config(state="disabled")
+            text.see("end")
+
+        Label(frm, text="Profondeurs et chemin critique affichés sur le circuit (mis à jour à chaque modification).",
+              fg="#444").pack(anchor="w", pady=(6, 0))
+        Button(frm, text="Fermer", command=close).pack(side=RIGHT, pady=(6, 0))
+        Button(frm, text="Couverture de fautes", command=faults).pack(side=RIGHT, padx=(0, 6), pady=(6, 0))
+        win.protocol("WM_DELETE_WINDOW", close)
+
+    def compare_dialog(self):
+        if not self.gates:
+            messagebox.showwarning("Comparer", "Le circuit est vide.")
+            return
+        path = filedialog.askopenfilename(initialdir=self.circuits_dir, filetypes=[("Circuit JSON", "*.json")])
+        if not path:
+            return
+        try:
+            res = equivalence.cached_check(saveAndLoad.load(path), self.circuit_data(), self.results,
+                                           base_dir_a=os.path.dirname(os.path.abspath(path)), base_dir_b=self.doc_dir)
+        except Exception as e:
+            messagebox.showerror("Erreur", f"Impossible de comparer :\n{e}")
+            return
 
-            tree.insert("", "end", values=row)
+        title = f"Comparaison avec {os.path.basename(path)}"
+        if res.equivalent:
+            messagebox.showinfo(title, res.describe())
+        else:
+            messagebox.showwarning(title, res.describe())
+
+    def show_minimized(self):
+        data = self.circuit_data()
+        c = netlist.compile_circuit(data, self.doc_dir)
+        if not c.n_inputs or not c.output_names:
+            messagebox.showwarning("Minimisation", "Il faut au moins une entrée et une sortie.")
+            return
+        key = empreinte.circuit_hash(data, self.doc_dir)
+        cubes = self.results.get("minimisation", key)
+        if cubes is not None:
+            results = [minimisation.Minimized(name, sop, pos, c.input_names) for name, sop, pos in cubes]
+        else:
+            try:
+                results = minimisation.minimize_circuit(c)
+            except ValueError as e:
+                messagebox.showwarning("Minimisation", str(e))
+                return
+            self.results.put("minimisation", key, [(r.name, r.sop_cubes, r.pos_cubes) for r in results])
+
+        win = Toplevel(self.root)
+        win.title("Expressions minimales")
+
+        frm = Frame(win, padx=10, pady=10)
+        frm.pack(fill=BOTH, expand=True)
+
+        Label(frm, text="Somme de produits (SOP) :", font=("Arial", 12, "bold")).pack(anchor="w")
+        sop_text = Text(frm, height=min(8, 1 + len(results)), width=80, wrap="word")
+        sop_text.pack(fill=X, pady=(6, 10))
+        sop_text.insert("end", "\n".join(f"{r.name} = {r.sop}" for r in results))
+        sop_text.config(state="disabled")
+
+        Label(frm, text="Produit de sommes (POS) :", font=("Arial", 12, "bold")).pack(anchor="w")
+        pos_text = Text(frm, height=min(8, 1 + len(results)), width=80, wrap="word")
+        pos_text.pack(fill=X, pady=(6, 10))
+        pos_text.insert("end", "\n".join(f"{r.name} = {r.pos}" for r in results))
+        pos_text.config(state="disabled")
+
+        def rebuild(form):
+            outputs = []
+            try:
+                for r in results:
+                    expr = minimisation.constant_expression(r.constant == "1", c.input_names) if r.constant else getattr(r, form)
+                    outputs.append((r.name, self.parse_expression(expr)))
+            except ValueError as e:
+                messagebox.showerror("Erreur", f"Reconstruction impossible (noms d'entrées ?) :\n{e}")
+                return
+            if self.new_circuit() == -1:
+                return
+            win.destroy()
+            self.build_from_expressions(outputs, input_names=c.input_names)
+
+        bottom = Frame(frm)
+        bottom.pack(fill=X)
+        Button(bottom, text="Fermer", command=win.destroy).pack(side=RIGHT)
+        Button(bottom, text="Reconstruire (POS)", command=lambda: rebuild("pos")).pack(side=RIGHT, padx=(0, 8))
+        Button(bottom, text="Reconstruire (SOP)", command=lambda: rebuild("sop")).pack(side=RIGHT, padx=(0, 8))
 
     def _topological_gates(self, dst_to_src, gid_map):
         visited = set()
@@ -911,10 +2056,17 @@ class App:
         self.gates = []
         self.wires = []
         self.gate_by_gid = {}
+        self.gate_index.clear()
+        self.wire_index.clear()
+        self.selection = set()
         self.next_gid = 1
         self.pending_wire_src = None
         self.topo_dirty = True
+        self.history.clear()
+        self._start_journal(None)
         self.canvas.delete("all")
+        self.checker = None
+        self.doc_dir = None
         self.set_mode("select")
 
     def on_press(self, event):
@@ -929,8 +2081,16 @@ class App:
         if m == "select":
             pin = self.find_pin_at(wx, wy)
             g = self.find_gate_at(wx, wy)
+            shift = event.state & 0x0001
+
+            # Maj + glisser dans le vide : sélection rectangulaire
+            if shift and not self.space_down and pin is None and g is None:
+                self.band_start = (wx, wy)
+                self.band_id = self.canvas.create_rectangle(event.x, event.y, event.x, event.y, outline=COLOR_SEL, dash=(4, 2))
+                return
 
             if self.space_down or (pin is None and g is None):
+                self.set_selection(())
                 self.panning = True
                 self.pan_start = (event.x, event.y)
                 self.cam_start = (self.cam_x, self.cam_y)
@@ -940,11 +2100,25 @@ class App:
                 return
 
             if g:
+                if shift:
+                    self.set_selection(self.selection ^ {g})
+                    return
+                if g not in self.selection:
+                    self.set_selection((g,))
                 self.drag_gate = g
+                self.drag_start = (g.x, g.y)
                 self.drag_dx = wx - g.x
                 self.drag_dy = wy - g.y
+                if len(self.selection) > 1:
+                    gates = list(self.selection)
+                    self.drag_group = (gates, *self._begin_group(gates))
 
     def on_drag(self, event):
+        if self.band_id is not None:
+            x0, y0 = self.w2c(*self.band_start)
+            self.canvas.coords(self.band_id, x0, y0, event.x, event.y)
+            return
+
         if self.panning:
             dx_pix = event.x - self.pan_start[0]
             dy_pix = event.y - self.pan_start[1]
@@ -959,12 +2133,33 @@ class App:
             return
 
         wx, wy = self.c2w(event.x, event.y)
-        self.drag_gate.x = wx - self.drag_dx
-        self.drag_gate.y = wy - self.drag_dy
-        self.drag_gate.update_pin_positions()
-        self.redraw_all()
+        g = self.drag_gate
+        if self.drag_group:
+            gates, boundary, _ = self.drag_group
+            self._shift_group(gates, boundary, wx - self.drag_dx - g.x, wy - self.drag_dy - g.y)
+        else:
+            self.move_gate(g, wx - self.drag_dx, wy - self.drag_dy)
 
     def on_release(self, event):
+        if self.band_id is not None:
+            self.canvas.delete(self.band_id)
+            self.band_id = None
+            wx, wy = self.c2w(event.x, event.y)
+            hits = self.gate_index.query_rect(*self.band_start, wx, wy, inside=True)
+            self.set_selection(self.selection | set(hits))
+            self.status.config(text=f"{len(self.selection)} composant(s) sélectionné(s)")
+            return
+
+        g = self.drag_gate
+        moved = g and (g.x, g.y) != self.drag_start
+        if self.drag_group:
+            gates, _, internal = self.drag_group
+            self._end_group(gates, internal)
+            self.drag_group = None
+            if moved:
+                self.history.record(historique.MoveGates(gates, g.x - self.drag_start[0], g.y - self.drag_start[1]))
+        elif moved:
+            self.history.record(historique.MoveGate(g, self.drag_start, (g.x, g.y)))
         self.drag_gate = None
         self.panning = False
 
@@ -975,41 +2170,102 @@ class App:
         t = max(0.0, min(1.0, ((px - x1) * dx + (py - y1) * dy) / (dx * dx + dy * dy)))
         return math.hypot(px - (x1 + t * dx), py - (y1 + t * dy))
 
-    def find_wire_at(self, x, y, threshold=8):
-        threshold /= self.scale
-        for w in reversed(self.wires):
-            if self._dist_point_to_segment(x, y, w.src.x, w.src.y, w.dst.x, w.dst.y) <= threshold:
-                return w
-        return None
+    def find_wire_at(self, x, y, threshold=WIRE_HIT):
+        """Fil le plus proche, parmi les segments de l'index spatial autour du point."""
+        threshold = min(threshold / self.scale, WIRE_HIT / LOD_SCALE)
+        best = None
+        for w, i in self.wire_index.query_point(x, y):
+            (ax, ay), (bx, by) = w.route[i], w.route[i + 1]
+            d = self._dist_point_to_segment(x, y, ax, ay, bx, by)
+            if d <= threshold and (best is None or d < best[0]):
+                best = (d, w)
+        return best[1] if best else None
 
     def delete_wire(self, w: Wire):
+        # Retirer un fil ne rend jamais l'ordre topologique invalide
         if w.canvas_id:
             self.canvas.delete(w.canvas_id)
+        self._unroute_wire(w)
         if w in self.wires:
             self.wires.remove(w)
-        self.topo_dirty = True
+            w.detach()
+        if self.is_overview():
+            self._draw_net(w.src)
 
     def delete_gate(self, g: Gate):
-        for w in [w for w in self.wires if w.src.owner == g or w.dst.owner == g]:
+        """Supprime la gate et ses fils ; renvoie les fils supprimés."""
+        wires = self._wires_of((g,))
+        for w in wires:
             self.delete_wire(w)
+        self._remove_gate(g)
+        return wires
 
-        for item_id in [g.rect_id, g.text_id, g.invert_id, g.led_id, g.value_text_id]:
-            if item_id:
-                self.canvas.delete(item_id)
+    def delete_gates(self, gates):
+        """Suppression groupée : un seul passage sur les fils ; renvoie les fils supprimés."""
+        doomed = set(gates)
+        kept, removed = [], []
+        for w in self.wires:
+            (removed if w.src.owner in doomed or w.dst.owner in doomed else kept).append(w)
+        for w in removed:
+            if w.canvas_id:
+                self.canvas.delete(w.canvas_id)
+            self._unroute_wire(w)
+            w.detach()
+        self.wires = kept
+        if self.is_overview():
+            for p in {w.src for w in removed if w.src.owner not in doomed}:
+                self._draw_net(p)
+        self.gates = [g for g in self.gates if g not in doomed]
+        for g in doomed:
+            self.canvas.delete(f"g{g.gid}")
+            self.gate_by_gid.pop(g.gid, None)
+            self.gate_index.remove(g)
+        self.selection -= doomed
+        if self.pending_wire_src and self.pending_wire_src.owner in doomed:
+            self.pending_wire_src = None
+        return removed
 
-        for p in g.inputs + g.outputs:
-            if p.canvas_id:
-                self.canvas.delete(p.canvas_id)
+    def delete_selection(self):
+        if not self.selection:
+            return
+        gates = [g for g in self.gates if g in self.selection]
+        wires = self.delete_gates(gates)
+        self.history.record(historique.DeleteGates(gates, wires))
+        self.simulate()
 
-        if g in self.gates:
-            self.gates.remove(g)
-        if g.gid in self.gate_by_gid:
-            del self.gate_by_gid[g.gid]
+    def copy_selection(self):
+        """Copie la sélection et les fils internes (format JSON du fichier)."""
+        if not self.selection:
+            return
+        group = self.selection
+        self.clipboard = {
+            "gates": [g.as_dict() for g in self.gates if g in group],
+            "wires": [w.as_dict() for w in self.wires if w.src.owner in group and w.dst.owner in group],
+        }
+        self.paste_count = 0
+        self.status.config(text=f"{len(group)} composant(s) copié(s)")
 
-        if self.pending_wire_src and self.pending_wire_src.owner == g:
-            self.pending_wire_src = None
-        
-        self.topo_dirty = True
+    def paste(self):
+        """Colle le presse-papiers avec de nouveaux gid (à partir de next_gid), décalé."""
+        if not self.clipboard:
+            return
+        self.paste_count += 1
+        off = PASTE_OFFSET * self.paste_count
+        gid_map = {}
+        gates = []
+        for gd in self.clipboard["gates"]:
+            g = self._gate_from_dict(gd, gid=self.next_gid, dx=off, dy=off)
+            gid_map[gd["gid"]] = g
+            self._insert_gate(g)
+            gates.append(g)
+        wires = []
+        for wd in self.clipboard["wires"]:
+            w = Wire(gid_map[wd["src_gate"]].outputs[wd["src_pin"]], gid_map[wd["dst_gate"]].inputs[wd["dst_pin"]])
+            self._insert_wire(w)
+            wires.append(w)
+        self.history.record(historique.Batch([historique.AddGate(g) for g in gates] + [historique.AddWire(w) for w in wires]))
+        self.set_selection(gates)
+        self.simulate()
 
     def w2c(self, x, y):
         return (x - self.cam_x) * self.scale, (y - self.cam_y) * self.scale
@@ -1125,6 +2381,9 @@ class App:
             raise ValueError("Expression invalide")
         return st[0]
 
+    def parse_expression(self, expr: str):
+        return self._rpn_to_ast(self._to_rpn(self._tokenize_expr(expr)))
+
     def expression_to_circuit(self):
         if self.new_circuit() == -1:
             return
@@ -1134,55 +2393,69 @@ class App:
             return
 
         try:
-            tokens = self._tokenize_expr(expr)
-            rpn = self._to_rpn(tokens)
-            ast = self._rpn_to_ast(rpn)
+            ast = self.parse_expression(expr)
         except Exception as e:
             messagebox.showerror("Erreur", f"Expression invalide :\n{e}")
             return
 
         self.new_circuit()
+        self.build_from_expressions([(None, ast)])
+
+    def build_from_expressions(self, outputs, input_names=()):
+        """Construit sur le canvas un circuit avec une sortie par couple (nom, ast), disposé en couches.
+
+        Les entrées de même nom sont partagées ; `input_names` fixe leur ordre.
+        """
         src_by_name = {}
-        x0, y0 = 80, 80
-        y_step = 90
-        gate_x_step = 160
 
-        def get_src(name, x, y):
+        def get_src(name):
             if name not in src_by_name:
-                src_by_name[name] = self.add_gate("SRC", x, y, name=name, ask_name=False)
+                src_by_name[name] = self.add_gate("SRC", 0, 0, name=name, ask_name=False)
             return src_by_name[name]
 
-        def build(node, depth=0, y=0):
+        def build(node):
             kind = node[0]
             if kind == "ID":
-                return get_src(node[1], x0, y0 + y * y_step), y
+                return get_src(node[1])
 
             if kind == "NOT":
-                child_gate, cy = build(node[1], depth + 1, y)
-                g = self.add_gate("NOT", x0 + (depth + 1) * gate_x_step, y0 + cy * y_step - 20)
-                self.wires.append(Wire(child_gate.outputs[0], g.inputs[0]))
-                return g, cy
-
-            left, right = node[1], node[2]
-            gl, yl = build(left, depth + 1, y)
-            gr, yr = build(right, depth + 1, y + 1)
-            midy = (yl + yr) / 2.0
-            g = self.add_gate(kind, x0 + (depth + 1) * gate_x_step, y0 + midy * y_step - 20)
-            self.wires.append(Wire(gl.outputs[0], g.inputs[0]))
-            self.wires.append(Wire(gr.outputs[0], g.inputs[1]))
-            return g, midy
-
-        root_gate, midy = build(ast, depth=0, y=0)
-        out = self.add_gate("OUT", x0 + 4 * gate_x_step, y0 + midy * y_step - 20)
-        self.wires.append(Wire(root_gate.outputs[0], out.inputs[0]))
+                child_gate = build(node[1])
+                g = self.add_gate("NOT", 0, 0)
+                self._attach_new(Wire(child_gate.outputs[0], g.inputs[0]))
+                return g
+
+            # Chaînes associatives (A.B.C) regroupées en une seule porte à n entrées
+            ops = [node[1], node[2]]
+            i = 0
+            while i < len(ops) and len(ops) < portes.MAX_INPUTS:
+                if ops[i][0] == kind:
+                    ops[i:i + 1] = [ops[i][1], ops[i][2]]
+                else:
+                    i += 1
+
+            children = [build(op) for op in ops]
+            g = self.add_gate(kind, 0, 0, n_inputs=len(ops))
+            for i, child in enumerate(children):
+                self._attach_new(Wire(child.outputs[0], g.inputs[i]))
+            return g
+
+        for name in input_names:
+            get_src(name)
+
+        for out_name, ast in outputs:
+            root_gate = build(ast)
+            out = self.add_gate("OUT", 0, 0, name=out_name, ask_name=out_name is None)
+            self._attach_new(Wire(root_gate.outputs[0], out.inputs[0]))
         self.topo_dirty = True
-        self.redraw_all()
+        pos = self._layout_positions()
+        self.place_gates([(g, pos[g.gid]) for g in self.gates])
         self.simulate()
+        self._snapshot_journal()
+        self._reset_lint()
 
 
-def main_ui():
-    root = Tk()
-
+def _finish_ui(root):
+    """Thème ttk et icône : appliqués après l'affichage de la première fenêtre."""
     style = ttk.Style(root)
 
     # Liste des thèmes disponibles (debug éventuel)
@@ -1204,22 +2477,26 @@ def main_ui():
     style.map("TButton",
             background=[("active", "#d9d9d9")])
 
+    # Chemin absolu vers logo.png (dossier du script)
+    icon_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logo.png")
     try:
-        from PIL import Image, ImageTk
-        # Chemin du dossier où se trouve le script
-        base_dir = os.path.dirname(os.path.abspath(__file__))
+        # Tk 8.6 lit le PNG directement : PIL n'est chargé que pour les versions plus anciennes
+        photo = PhotoImage(master=root, file=icon_path)
+    except TclError:
+        try:
+            from PIL import Image, ImageTk
+            photo = ImageTk.PhotoImage(Image.open(icon_path))
+        except Exception:
+            return
+    root.wm_iconphoto(False, photo)
+    root._icon = photo      # garder une référence à l'image
 
-        # Chemin absolu vers logo.png
-        icon_path = os.path.join(base_dir, "logo.png")
-        
-        ico = Image.open(icon_path)
-        photo = ImageTk.PhotoImage(ico)
-        root.wm_iconphoto(False, photo)
-    except:
-        pass
 
+def main_ui():
+    root = Tk()
     root.geometry("1000x650")
     App(root)
+    root.after_idle(_finish_ui, root)
     root.mainloop()
 
 
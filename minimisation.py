@@ -0,0 +1,278 @@
+# minimisation.py
+# Minimisation booléenne à partir de la table de vérité : Quine–McCluskey exact
+# jusqu'à QM_LIMIT entrées, puis expansion/irredondance façon Espresso.
+# Un impliquant est un cube (valeur, tirets) : bit b à 1 dans `tirets` si la
+# variable de poids b est absente. Les couvertures sont des bitsets sur les
+# 2^n lignes de la table (même ordre que netlist.exhaustive_chunks).
+
+import netlist
+
+
+MAX_INPUTS = 16
+QM_LIMIT = 10      # au-delà, le nombre d'impliquants premiers peut exploser
+EXACT_LIMIT = 24   # au-delà, couverture gloutonne (au lieu d'une recherche exacte)
+
+
+def prime_implicants(n, on, dc=0):
+    """Impliquants premiers de la fonction (on, dc) donnée en bitsets de 2^n bits."""
+    care = on | dc
+    level = set()
+    r = care
+    while r:
+        low = r & -r
+        level.add((low.bit_length() - 1, 0))
+        r ^= low
+
+    primes = []
+    while level:
+        merged = set()
+        nxt = set()
+        for v, m in level:
+            for b in range(n):
+                bit = 1 << b
+                if m & bit or v & bit:
+                    continue
+                partner = (v | bit, m)
+                if partner in level:
+                    nxt.add((v, m | bit))
+                    merged.add((v, m))
+                    merged.add(partner)
+        primes.extend(level - merged)
+        level = nxt
+    return primes
+
+
+def cube_cover(n, cube):
+    """Bitset des lignes couvertes par le cube."""
+    v, m = cube
+    width = 1 << n
+    cover = (1 << width) - 1
+    for b in range(n):
+        if m >> b & 1:
+            continue
+        p = netlist._pattern(b, width)
+        cover &= p if v >> b & 1 else ~p
+    return cover & ((1 << width) - 1)
+
+
+def _literals(n, cube):
+    return n - bin(cube[1]).count("1")
+
+
+def _cube_key(n, cube):
+    # Ordre d'affichage : plus de littéraux d'abord, puis variables dans l'ordre des entrées
+    v, m = cube
+    return -_literals(n, cube), [2 if m >> b & 1 else v >> b & 1 for b in reversed(range(n))]
+
+
+def _select_cover(n, on, primes):
+    covers = [cube_cover(n, p) & on for p in primes]
+
+    # Impliquants essentiels : seuls à couvrir au moins une ligne
+    ones = twos = 0
+    for c in covers:
+        twos |= ones & c
+        ones |= c
+    unique = ones & ~twos
+
+    chosen = [i for i, c in enumerate(covers) if c & unique]
+    remaining = on
+    for i in chosen:
+        remaining &= ~covers[i]
+
+    candidates = [i for i, c in enumerate(covers) if c & remaining and i not in chosen]
+    if not remaining:
+        return chosen
+    if len(candidates) <= EXACT_LIMIT:
+        return chosen + _exact_cover(n, remaining, candidates, covers, primes)
+
+    while remaining:
+        best = max(candidates, key=lambda i: ((covers[i] & remaining).bit_count(), -_literals(n, primes[i])))
+        chosen.append(best)
+        remaining &= ~covers[best]
+    return chosen
+
+
+def _exact_cover(n, remaining, candidates, covers, primes):
+    """Recherche exacte (séparation et évaluation) : moins de termes, puis moins de littéraux."""
+    best = [None, (len(candidates) + 1, 0)]
+
+    def search(rem, picked, cost):
+        if cost >= best[1]:
+            return
+        if not rem:
+            best[0], best[1] = list(picked), cost
+            return
+        low = rem & -rem
+        # Branches : un des candidats qui couvre la plus petite ligne restante
+        for i in candidates:
+            if covers[i] & low:
+                picked.append(i)
+                search(rem & ~covers[i], picked, (cost[0] + 1, cost[1] + _literals(n, primes[i])))
+                picked.pop()
+
+    search(remaining, [], (0, 0))
+    return best[0]
+
+
+def _expand(n, cube, cover, off, remaining):
+    """Agrandit le cube jusqu'à un impliquant premier, en couvrant le plus de lignes restantes."""
+    v, m = cube
+    while True:
+        best = None
+        for b in range(n):
+            if m >> b & 1:
+                continue
+            shift = 1 << b
+            grown = cover | (cover >> shift if v >> b & 1 else cover << shift)
+            if grown & off:
+                continue
+            gain = (grown & remaining).bit_count()
+            if best is None or gain > best[0]:
+                best = (gain, b, grown)
+        if best is None:
+            return (v, m), cover
+        _, b, cover = best
+        v &= ~(1 << b)
+        m |= 1 << b
+
+
+def _minterms(cube):
+    """Lignes couvertes par le cube, une à une."""
+    v, m = cube
+    s = m
+    while True:
+        yield v | s
+        if not s:
+            return
+        s = (s - 1) & m
+
+
+def _irredundant(n, cubes, on):
+    """Retire les cubes entièrement couverts par les autres.
+
+    Nombre de cubes couvrant chaque ligne : retirer un cube ne coûte que ses
+    propres lignes. Un cube gardé couvre seul une ligne, ce qui reste vrai
+    après les retraits suivants : un seul passage, des plus petits aux plus grands.
+    """
+    count = [0] * (1 << n)
+    for cube in cubes:
+        for r in _minterms(cube):
+            count[r] += 1
+    kept = []
+    for cube in sorted(cubes, key=lambda c: c[1].bit_count()):
+        if any(count[r] == 1 and on >> r & 1 for r in _minterms(cube)):
+            kept.append(cube)
+        else:
+            for r in _minterms(cube):
+                count[r] -= 1
+    return kept
+
+
+def _heuristic_cover(n, on, dc):
+    off = ((1 << (1 << n)) - 1) & ~(on | dc)
+    remaining = on
+    cubes = []
+    while remaining:
+        low = remaining & -remaining
+        cube, cover = _expand(n, (low.bit_length() - 1, 0), low, off, remaining)
+        cubes.append(cube)
+        remaining &= ~cover
+    return _irredundant(n, cubes, on)
+
+
+def minimize(n, on, dc=0):
+    """Somme de produits minimale (exacte jusqu'à QM_LIMIT entrées) : liste de cubes."""
+    on &= ~dc
+    if not on:
+        return []
+    if n > QM_LIMIT:
+        cubes = _heuristic_cover(n, on, dc)
+    else:
+        primes = sorted(prime_implicants(n, on, dc), key=lambda c: (-c[1], c[0]))
+        cubes = [primes[i] for i in _select_cover(n, on, primes)]
+    return sorted(cubes, key=lambda c: _cube_key(n, c))
+
+
+def minimize_minterms(n, minterms, dont_cares=()):
+    on = sum(1 << r for r in set(minterms))
+    dc = sum(1 << r for r in set(dont_cares))
+    return minimize(n, on, dc)
+
+
+def _cube_literals(cube, names, negate=False):
+    n = len(names)
+    v, m = cube
+    lits = []
+    for i, name in enumerate(names):
+        b = n - 1 - i
+        if m >> b & 1:
+            continue
+        positive = bool(v >> b & 1) != negate
+        lits.append(name if positive else f"!{name}")
+    return lits
+
+
+def sop_expression(cubes, names):
+    """Écriture dans la syntaxe de « Expression → Circuit » (ex: !A.B + C)."""
+    if not cubes:
+        return "0"
+    if any(c[1] == (1 << len(names)) - 1 for c in cubes):
+        return "1"
+    return " + ".join(".".join(_cube_literals(c, names)) for c in cubes)
+
+
+def pos_expression(cubes_off, names):
+    """Produit de sommes à partir de la SOP minimale du complément."""
+    if not cubes_off:
+        return "1"
+    if any(c[1] == (1 << len(names)) - 1 for c in cubes_off):
+        return "0"
+    terms = []
+    for c in cubes_off:
+        lits = _cube_literals(c, names, negate=True)
+        terms.append(f"({' + '.join(lits)})" if len(lits) > 1 else lits[0])
+    return ".".join(terms)
+
+
+def constant_expression(value, names):
+    """Constante écrite avec une variable (le parseur n'a pas de littéraux 0/1)."""
+    a = names[0]
+    return f"{a} + !{a}" if value else f"{a}.!{a}"
+
+
+class Minimized:
+    __slots__ = ('name', 'sop', 'pos', 'sop_cubes', 'pos_cubes', 'constant')
+
+    def __init__(self, name, sop_cubes, pos_cubes, names):
+        self.name = name
+        self.sop_cubes = sop_cubes
+        self.pos_cubes = pos_cubes
+        self.sop = sop_expression(sop_cubes, names)
+        self.pos = pos_expression(pos_cubes, names)
+        self.constant = self.sop if self.sop in ("0", "1") else None
+
+
+def minimize_circuit(c: netlist.CompiledCircuit):
+    """Minimise chaque sortie ; les lignes "?" sont des indifférents."""
+    n = c.n_inputs
+    if n > MAX_INPUTS:
+        raise ValueError(f"Trop d'entrées pour la minimisation (max {MAX_INPUTS}).")
+    _, mask, outs = netlist.truth_table(c)
+    results = []
+    for name, (val, known) in zip(c.output_names, outs):
+        dc = mask & ~known
+        results.append(Minimized(name, minimize(n, val, dc), minimize(n, known & ~val, dc), c.input_names))
+    return results
+
+
+if __name__ == "__main__":
+    # f(A, B, C) = somme m(1, 3, 5, 7) = C
+    assert sop_expression(minimize_minterms(3, [1, 3, 5, 7]), ["A", "B", "C"]) == "C"
+    # XOR : rien à fusionner
+    assert sop_expression(minimize_minterms(2, [1, 2]), ["A", "B"]) == "!A.B + A.!B"
+    # Indifférents exploités : m(1) + d(3) sur 2 variables -> B
+    assert sop_expression(minimize_minterms(2, [1], [3]), ["A", "B"]) == "B"
+    # POS : on minimise les zéros (NOR : zéros m(1, 2, 3) ; NAND : zéro m(3))
+    assert pos_expression(minimize_minterms(2, [1, 2, 3]), ["A", "B"]) == "!A.!B"
+    assert pos_expression(minimize_minterms(2, [3]), ["A", "B"]) == "(!A + !B)"
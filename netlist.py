@@ -0,0 +1,317 @@
+# netlist.py
+# Compilation d'un circuit (format JSON de saveAndLoad) en programme levelisé,
+# évalué sans interface et en bit-parallèle : chaque net porte un entier
+# Python dont le bit r est la valeur du net pour la ligne r de la table.
+
+from collections import deque
+
+import blocs
+
+
+def _and(v, s, m):
+    r = m
+    for i in s:
+        r &= v[i]
+    return r
+
+
+def _or(v, s, m):
+    r = 0
+    for i in s:
+        r |= v[i]
+    return r
+
+
+def _xor(v, s, m):
+    r = 0
+    for i in s:
+        r ^= v[i]
+    return r
+
+
+# Opérations bit-parallèles à n entrées : (valeurs, nets sources, masque) -> mot
+BIT_OPS = {
+    'NOT': lambda v, s, m: ~v[s[0]] & m,
+    'AND': _and,
+    'OR': _or,
+    'XOR': _xor,
+    'NAND': lambda v, s, m: ~_and(v, s, m) & m,
+    'NOR': lambda v, s, m: ~_or(v, s, m) & m,
+    'XNOR': lambda v, s, m: ~_xor(v, s, m) & m,
+    'BUF': lambda v, s, m: v[s[0]],
+}
+
+# Nombre d'entrées par défaut (réglable via "inputs" sauf pour NOT)
+N_INPUTS = {'NOT': 1, 'AND': 2, 'OR': 2, 'XOR': 2, 'NAND': 2, 'NOR': 2, 'XNOR': 2}
+
+# Net 0 : net "non connecté", toujours indéfini
+NET_UNDEF = 0
+
+
+def var_names(n):
+    letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    return list(letters[:n]) if n <= len(letters) else [f"A{i}" for i in range(n)]
+
+
+def gate_inputs(gd: dict) -> int:
+    if gd["type"] == "NOT":
+        return 1
+    return gd.get("inputs") or N_INPUTS[gd["type"]]
+
+
+def pin_widths(gd: dict, block=None):
+    """Largeurs (en bits) des pins d'entrée et de sortie d'une gate."""
+    t = gd["type"]
+    w = gd.get("width") or 1
+    if t == "SRC":
+        return [], [w]
+    if t == "OUT":
+        return [w], []
+    if t == "SPLIT":
+        return [w], [1] * w
+    if t == "MERGE":
+        return [1] * w, [w]
+    if t == "BLOCK":
+        return [1] * len(block.input_names), [1] * len(block.output_names)
+    return [w] * gate_inputs(gd), [w]
+
+
+def bit_names(name, width):
+    """Noms des bits d'un bus, du poids fort au poids faible (A[3] … A[0])."""
+    return [name] if width == 1 else [f"{name}[{b}]" for b in reversed(range(width))]
+
+
+class CompiledCircuit:
+    __slots__ = ('input_names', 'output_names', 'input_gids', 'output_gids',
+                 'input_nets', 'output_nets', 'program', 'n_nets', 'net_of', 'out_nets_of',
+                 'in_nets_of', 'op_gids')
+
+    def __init__(self):
+        # Entrées/sorties au niveau du bit : un bus de n bits compte pour n
+        self.input_names = []
+        self.output_names = []
+        self.input_gids = []
+        self.output_gids = []
+        self.input_nets = []
+        self.output_nets = []
+        self.program = []        # (type, net destination, nets sources) en ordre topologique
+        self.n_nets = 1
+        self.net_of = {}         # (gid, index pin sortie) -> nets, bit de poids faible en premier
+        self.out_nets_of = {}    # gid d'une OUT -> nets affichés, bit de poids faible en premier
+        self.in_nets_of = {}     # gid -> nets lus sur chaque pin d'entrée, bit de poids faible en premier
+        self.op_gids = []        # gate (ou bloc) à l'origine de chaque opération du programme
+
+    @property
+    def n_inputs(self):
+        return len(self.input_nets)
+
+    def evaluate(self, words, mask, known_words=None, ops=None):
+        """Évalue le circuit pour des mots d'entrée (un bit par ligne).
+
+        Renvoie (valeurs, connus) : deux listes indexées par net. Un bit à 0
+        dans `connus` correspond au "?" de la table de vérité. `ops` : indices
+        des opérations à exécuter (voir cone), toutes par défaut.
+        """
+        val = [0] * self.n_nets
+        known = [0] * self.n_nets
+        for i, (net, w) in enumerate(zip(self.input_nets, words)):
+            known[net] = mask if known_words is None else known_words[i] & mask
+            val[net] = w & known[net]
+
+        for op, dst, srcs in (self.program if ops is None else (self.program[i] for i in ops)):
+            k = mask
+            for s in srcs:
+                k &= known[s]
+            val[dst] = BIT_OPS[op](val, srcs, mask) & k
+            known[dst] = k
+        return val, known
+
+    def cone(self, nets):
+        """Indices, dans l'ordre du programme, des opérations dont dépendent `nets`."""
+        driver = {dst: i for i, (_, dst, _) in enumerate(self.program)}
+        needed = set()
+        stack = list(nets)
+        while stack:
+            i = driver.get(stack.pop())
+            if i is not None and i not in needed:
+                needed.add(i)
+                stack.extend(self.program[i][2])
+        return sorted(needed)
+
+    def evaluate_outputs(self, words, mask):
+        val, known = self.evaluate(words, mask)
+        return [(val[n], known[n]) for n in self.output_nets]
+
+
+def compile_circuit(data: dict, base_dir: str | None = None) -> CompiledCircuit:
+    """Compile le circuit ; les bus sont éclatés en un net par bit."""
+    c = CompiledCircuit()
+    gates = data.get("gates", [])
+    blocks = {gd["gid"]: blocs.load_block(gd["ref"], base_dir) for gd in gates if gd["type"] == "BLOCK"}
+    widths = {gd["gid"]: pin_widths(gd, blocks.get(gd["gid"])) for gd in gates}
+
+    for gd in gates:
+        for j, w in enumerate(widths[gd["gid"]][1]):
+            c.net_of[(gd["gid"], j)] = list(range(c.n_nets, c.n_nets + w))
+            c.n_nets += w
+
+    driver = {}
+    for wd in data.get("wires", []):
+        src = c.net_of.get((wd["src_gate"], wd["src_pin"]))
+        if src is not None:
+            driver[(wd["dst_gate"], wd["dst_pin"])] = src
+
+    def fanin_of(gid, i, w):
+        nets = driver.get((gid, i))
+        return nets if nets is not None and len(nets) == w else [NET_UNDEF] * w
+
+    # Kahn sur les gates logiques ; les gates dans un cycle restent indéfinies
+    fanin = {}
+    for gd in gates:
+        if gd["type"] not in ("SRC", "OUT"):
+            fanin[gd["gid"]] = [fanin_of(gd["gid"], i, w) for i, w in enumerate(widths[gd["gid"]][0])]
+
+    gid_of_net = {net: gid for (gid, _), nets in c.net_of.items() for net in nets}
+    in_degree = {gid: 0 for gid in fanin}
+    users = {}
+    for gid, pins in fanin.items():
+        for nets in pins:
+            sg = gid_of_net.get(nets[0])
+            if sg in fanin:
+                in_degree[gid] += 1
+                users.setdefault(sg, []).append(gid)
+
+    by_gid = {gd["gid"]: gd for gd in gates}
+    queue = deque(gid for gid, deg in in_degree.items() if deg == 0)
+    while queue:
+        gid = queue.popleft()
+        t = by_gid[gid]["type"]
+        start = len(c.program)
+        if t == "BLOCK":
+            _inline_block(c, gid, blocks[gid].compiled, [nets[0] for nets in fanin[gid]])
+        elif t == "SPLIT":
+            for j, bit in enumerate(fanin[gid][0]):
+                c.program.append(('BUF', c.net_of[(gid, j)][0], (bit,)))
+        elif t == "MERGE":
+            for j, nets in enumerate(fanin[gid]):
+                c.program.append(('BUF', c.net_of[(gid, 0)][j], (nets[0],)))
+        else:
+            # Porte logique sur un bus : une opération par bit
+            for b, dst in enumerate(c.net_of[(gid, 0)]):
+                c.program.append((t, dst, tuple(nets[b] for nets in fanin[gid])))
+        c.op_gids.extend([gid] * (len(c.program) - start))
+        for u in users.get(gid, ()):
+            in_degree[u] -= 1
+            if in_degree[u] == 0:
+                queue.append(u)
+
+    srcs = sorted((gd for gd in gates if gd["type"] == "SRC"), key=lambda gd: gd["gid"])
+    outs = sorted((gd for gd in gates if gd["type"] == "OUT"), key=lambda gd: gd["gid"])
+
+    fallback = var_names(len(srcs))
+    for i, gd in enumerate(srcs):
+        nets = c.net_of[(gd["gid"], 0)]
+        c.input_names.extend(bit_names((gd.get("name") or "").strip() or fallback[i], len(nets)))
+        c.input_gids.extend([gd["gid"]] * len(nets))
+        c.input_nets.extend(reversed(nets))
+
+    c.in_nets_of.update(fanin)
+    single_output = len(outs) == 1
+    for gd in outs:
+        w = widths[gd["gid"]][0][0]
+        nets = fanin_of(gd["gid"], 0, w)
+        c.out_nets_of[gd["gid"]] = nets
+        c.in_nets_of[gd["gid"]] = [nets]
+        name = (gd.get("name") or "").strip() or ("S" if single_output else f"{gd['gid']}")
+        c.output_names.extend(bit_names(name, w))
+        c.output_gids.extend([gd["gid"]] * w)
+        c.output_nets.extend(reversed(nets))
+
+    return c
+
+
+def _inline_block(c, gid, sub, fanin):
+    """Recopie le programme (déjà aplati) d'un sous-circuit avec renumérotation des nets."""
+    base = c.n_nets
+    c.n_nets += sub.n_nets
+    remap = {NET_UNDEF: NET_UNDEF}
+    remap.update(zip(sub.input_nets, fanin))
+    net = lambda n: remap.get(n, base + n)
+
+    for op, dst, srcs in sub.program:
+        c.program.append((op, base + dst, tuple(net(s) for s in srcs)))
+    for j, out in enumerate(sub.output_nets):
+        c.program.append(('BUF', c.net_of[(gid, j)][0], (net(out),)))
+
+
+_pattern_cache = {}
+
+
+def _pattern(bit, width):
+    """Mot de `width` lignes dont le bit r vaut (r >> bit) & 1."""
+    key = (bit, width)
+    if key not in _pattern_cache:
+        half = 1 << bit
+        period = half << 1
+        block = ((1 << half) - 1) << half
+        _pattern_cache[key] = block * (((1 << width) - 1) // ((1 << period) - 1))
+    return _pattern_cache[key]
+
+
+def exhaustive_chunks(n, chunk_bits=12):
+    """Parcourt les 2^n lignes par blocs de 2^chunk_bits.
+
+    Produit (première ligne, nb de lignes, masque, mots d'entrée), dans l'ordre
+    de product([0, 1], repeat=n) : la première entrée est le bit de poids fort.
+    """
+    k = min(n, chunk_bits)
+    width = 1 << k
+    mask = (1 << width) - 1
+    for start in range(0, 1 << n, width):
+        yield start, width, mask, chunk_words(n, start, k)
+
+
+def chunk_words(n, start, k):
+    """Mots d'entrée des 2^k lignes à partir de `start` (multiple de 2^k)."""
+    width = 1 << k
+    mask = (1 << width) - 1
+    words = []
+    for i in range(n):
+        bit = n - 1 - i
+        if bit < k:
+            words.append(_pattern(bit, width))
+        else:
+            words.append(mask if (start >> bit) & 1 else 0)
+    return words
+
+
+def truth_table(c: CompiledCircuit):
+    """Table complète en un seul bloc : (mots d'entrée, masque, [(valeurs, connus)] par sortie)."""
+    (_, _, mask, words), = exhaustive_chunks(c.n_inputs, c.n_inputs)
+    return words, mask, c.evaluate_outputs(words, mask)
+
+
+def bits_at(words, r):
+    return [(w >> r) & 1 for w in words]
+
+
+if __name__ == "__main__":
+    data = {
+        "gates": [
+            {"gid": 1, "type": "SRC", "x": 0, "y": 0, "value": False, "name": "A"},
+            {"gid": 2, "type": "SRC", "x": 0, "y": 0, "value": False, "name": "B"},
+            {"gid": 3, "type": "XOR", "x": 0, "y": 0, "value": None, "name": None},
+            {"gid": 4, "type": "OUT", "x": 0, "y": 0, "value": None, "name": "S"},
+        ],
+        "wires": [
+            {"src_gate": 1, "src_pin": 0, "dst_gate": 3, "dst_pin": 0},
+            {"src_gate": 2, "src_pin": 0, "dst_gate": 3, "dst_pin": 1},
+            {"src_gate": 3, "src_pin": 0, "dst_gate": 4, "dst_pin": 0},
+        ],
+    }
+    c = compile_circuit(data)
+    (_, _, mask, words), = exhaustive_chunks(2)
+    assert words == [0b1100, 0b1010]
+    assert c.evaluate_outputs(words, mask) == [(0b0110, 0b1111)]
+    val, known = c.evaluate(words, mask, ops=c.cone(c.output_nets))
+    assert c.cone(c.input_nets) == [] and val[c.output_nets[0]] == 0b0110
@@ -15,6 +15,67 @@ def nor(a: bool, b: bool) -> bool:
 def xor(a: bool, b: bool) -> bool:
     return (a and not b) or (not a and b)
 
+def nand(a: bool, b: bool) -> bool:
+    return non(et(a, b))
+
+def xnor(a: bool, b: bool) -> bool:
+    return non(xor(a, b))
+
+
+# Portes à n entrées : réduction de la porte à 2 entrées, puis inversion éventuelle
+MAX_INPUTS = 8
+
+BASES = {
+    'NOT': (None, True),
+    'AND': (et, False),
+    'OR': (ou, False),
+    'XOR': (xor, False),
+    'NAND': (et, True),
+    'NOR': (ou, True),
+    'XNOR': (xor, True),
+}
+
+_tables = {}
+
+
+def table(gtype: str, n: int) -> int:
+    """Table de vérité (LUT) d'une porte : le bit i est la sortie pour les entrées
+    dont la k-ième vaut (i >> k) & 1."""
+    key = (gtype, n)
+    if key not in _tables:
+        base, invert = BASES[gtype]
+        lut = 0
+        for i in range(1 << n):
+            ins = [bool(i >> k & 1) for k in range(n)]
+            v = ins[0]
+            for b in ins[1:]:
+                v = base(v, b)
+            if invert:
+                v = non(v)
+            lut |= int(v) << i
+        _tables[key] = lut
+    return _tables[key]
+
+
+# Versions "mot" des portes de base : appliquées bit à bit sur des entiers
+MOTS = {et: lambda a, b: a & b, ou: lambda a, b: a | b, xor: lambda a, b: a ^ b}
+
+
+def evaluer_mot(gtype: str, ins: list, width: int) -> int:
+    """Porte appliquée bit à bit sur des bus (entiers de `width` bits)."""
+    base, invert = BASES[gtype]
+    v = ins[0]
+    for b in ins[1:]:
+        v = MOTS[base](v, b)
+    return ~v & ((1 << width) - 1) if invert else v
+
+
+def evaluer(gtype: str, ins: list) -> bool:
+    index = 0
+    for k, b in enumerate(ins):
+        index |= int(b) << k
+    return bool(table(gtype, len(ins)) >> index & 1)
+
 
 if __name__ == "__main__":
     assert non(False) is True
@@ -39,3 +100,22 @@ if __name__ == "__main__":
     assert xor(False, True) is True
     assert xor(True, False) is True
     assert xor(True, True) is False
+
+    assert nand(True, True) is False
+    assert nand(False, True) is True
+    assert xnor(True, True) is True
+    assert xnor(False, True) is False
+
+    assert evaluer('NOT', [False]) is True
+    assert evaluer('AND', [True, True, True]) is True
+    assert evaluer('AND', [True, False, True]) is False
+    assert evaluer('OR', [False, False, False, True]) is True
+    assert evaluer('XOR', [True, True, True]) is True
+    assert evaluer('NAND', [True, True, True]) is False
+    assert evaluer('NOR', [False, False, False]) is True
+    assert evaluer('XNOR', [True, False]) is False
+
+    assert evaluer_mot('AND', [0b1100, 0b1010], 4) == 0b1000
+    assert evaluer_mot('NOR', [0b1100, 0b1010], 4) == 0b0001
+    assert evaluer_mot('NOT', [0b0110], 4) == 0b1001
+    assert evaluer_mot('XOR', [0b1111, 0b0101, 0b0011], 4) == 0b1001
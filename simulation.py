@@ -0,0 +1,248 @@
+# simulation.py
+# Banc de test sans interface, pour les circuits trop grands pour une table
+# de vérité : vecteurs aléatoires (graine fixée) ou lus dans un fichier CSV,
+# évalués par paquets en bit-parallèle (un bit par vecteur dans chaque mot).
+# Mesure la couverture de bascule (chaque net a-t-il valu 0 et 1 ?) et vérifie
+# les sorties attendues quand elles sont fournies.
+
+import csv
+import os
+import random
+import sys
+import time
+
+import netlist
+import saveAndLoad
+
+
+BATCH_BITS = 12        # 4096 vecteurs par paquet
+MAX_FAILURES = 10      # contre-exemples conservés dans le rapport
+
+
+class Coverage:
+    """Couverture de bascule par net : bits vus à 0 / vus à 1."""
+    __slots__ = ('seen0', 'seen1')
+
+    def __init__(self, n_nets):
+        self.seen0 = [False] * n_nets
+        self.seen1 = [False] * n_nets
+
+    def update(self, val, known, mask):
+        seen0, seen1 = self.seen0, self.seen1
+        for n, (v, k) in enumerate(zip(val, known)):
+            if not seen1[n] and v & k:
+                seen1[n] = True
+            if not seen0[n] and ~v & k & mask:
+                seen0[n] = True
+
+    def toggled(self, n):
+        return self.seen0[n] and self.seen1[n]
+
+
+class SimulationReport:
+    __slots__ = ('vectors', 'seconds', 'checked', 'failures', 'n_failures',
+                 'nets', 'nets_toggled', 'untoggled_gates')
+
+    def __init__(self):
+        self.vectors = 0
+        self.seconds = 0.0
+        self.checked = 0            # vecteurs ayant au moins une sortie attendue
+        self.failures = []          # (n° du vecteur à partir de 1, entrées, {sortie: (obtenu, attendu)})
+        self.n_failures = 0
+        self.nets = 0
+        self.nets_toggled = 0
+        self.untoggled_gates = []   # gid des gates dont une sortie n'a pas basculé
+
+    @property
+    def vectors_per_second(self):
+        return self.vectors / self.seconds if self.seconds else float("inf")
+
+    @property
+    def coverage(self):
+        return self.nets_toggled / self.nets if self.nets else 1.0
+
+    def describe(self):
+        lines = [f"{self.vectors} vecteurs en {self.seconds:.3f} s ({self.vectors_per_second:,.0f} vecteurs/s)".replace(",", " "),
+                 f"Couverture de bascule : {self.nets_toggled}/{self.nets} nets ({100 * self.coverage:.1f} %)"]
+        if self.untoggled_gates:
+            shown = ", ".join(str(g) for g in self.untoggled_gates[:20])
+            more = "…" if len(self.untoggled_gates) > 20 else ""
+            lines.append(f"Gates jamais basculées (gid) : {shown}{more}")
+        if self.checked:
+            lines.append(f"Vérifications : {self.checked - self.n_failures}/{self.checked} vecteurs conformes")
+        fmt = lambda v: "?" if v is None else str(v)
+        for i, ins, outs in self.failures:
+            lines.append(f"  vecteur {i} : " + ", ".join(f"{k}={v}" for k, v in ins.items())
+                         + " -> " + ", ".join(f"{k}: {fmt(a)} au lieu de {b}" for k, (a, b) in outs.items()))
+        return "\n".join(lines)
+
+
+def random_batches(n_inputs, count, seed=0, batch_bits=BATCH_BITS):
+    """Paquets aléatoires reproductibles : (nb de vecteurs, masque, mots, None)."""
+    rng = random.Random(seed)
+    width = 1 << batch_bits
+    done = 0
+    while done < count:
+        k = min(width, count - done)
+        yield k, (1 << k) - 1, [rng.getrandbits(k) for _ in range(n_inputs)], None
+        done += k
+
+
+def _bit(s):
+    s = s.strip()
+    if s in ("", "-", "x", "X", "?"):
+        return None
+    return 1 if s == "1" else 0
+
+
+def csv_batches(path, c: netlist.CompiledCircuit, batch_bits=BATCH_BITS):
+    """Paquets lus dans un CSV : en-tête = noms d'entrées (tous), puis sorties attendues (facultatives).
+
+    Une case vide, "-" ou "x" dans une colonne de sortie signifie « sans importance » ;
+    les entrées valent 0 ou 1. ValueError (avec le numéro de ligne) sinon, ou
+    pour une ligne plus courte que l'en-tête.
+    """
+    width = 1 << batch_bits
+    with open(path, newline="", encoding="utf-8") as f:
+        first = f.readline()
+        f.seek(0)
+        reader = csv.reader(f, delimiter=";" if ";" in first else ",")
+        header = [h.strip() for h in next(reader)]
+        missing = [n for n in c.input_names if n not in header]
+        if missing:
+            raise ValueError(f"Colonnes d'entrée manquantes : {missing}")
+        unknown = [h for h in header if h not in c.input_names and h not in c.output_names]
+        if unknown:
+            raise ValueError(f"Colonnes inconnues : {unknown}")
+        in_cols = [header.index(n) for n in c.input_names]
+        out_cols = [(j, header.index(n)) for j, n in enumerate(c.output_names) if n in header]
+
+        def flush(rows):
+            words = [0] * len(in_cols)
+            exp_val = [0] * len(c.output_names)
+            exp_care = [0] * len(c.output_names)
+            for r, row in enumerate(rows):
+                bit = 1 << r
+                for i, col in enumerate(in_cols):
+                    if _bit(row[col]):
+                        words[i] |= bit
+                for j, col in out_cols:
+                    b = _bit(row[col])
+                    if b is not None:
+                        exp_care[j] |= bit
+                        if b:
+                            exp_val[j] |= bit
+            return len(rows), (1 << len(rows)) - 1, words, (exp_val, exp_care)
+
+        rows = []
+        for row in reader:
+            if not row or not "".join(row).strip():
+                continue
+            if len(row) < len(header):
+                raise ValueError(f"{path}, ligne {reader.line_num} : {len(row)} cases pour {len(header)} colonnes")
+            bad = [c.input_names[i] for i, col in enumerate(in_cols) if row[col].strip() not in ("0", "1")]
+            if bad:
+                raise ValueError(f"{path}, ligne {reader.line_num} : entrées sans valeur 0 ou 1 ({', '.join(bad)})")
+            rows.append(row)
+            if len(rows) == width:
+                yield flush(rows)
+                rows = []
+        if rows:
+            yield flush(rows)
+
+
+def _as_compiled(circuit, base_dir=None):
+    if isinstance(circuit, netlist.CompiledCircuit):
+        return circuit
+    if isinstance(circuit, str):
+        base_dir = base_dir or os.path.dirname(os.path.abspath(circuit))
+        circuit = saveAndLoad.load(circuit)
+    return netlist.compile_circuit(circuit, base_dir)
+
+
+def run(circuit, batches, max_failures=MAX_FAILURES, base_dir=None):
+    """Évalue les paquets, met à jour la couverture et vérifie les sorties attendues.
+
+    `base_dir` : dossier des sous-circuits à chemin relatif (circuit donné en JSON).
+    """
+    c = _as_compiled(circuit, base_dir)
+    report = SimulationReport()
+    cov = Coverage(c.n_nets)
+
+    start = time.perf_counter()
+    for count, mask, words, expected in batches:
+        val, known = c.evaluate(words, mask)
+        cov.update(val, known, mask)
+        if expected is not None:
+            exp_val, exp_care = expected
+            bad = 0
+            care_any = 0
+            for j, net in enumerate(c.output_nets):
+                care = exp_care[j]
+                care_any |= care
+                bad |= ((val[net] ^ exp_val[j]) | ~known[net]) & care
+            report.checked += care_any.bit_count()
+            report.n_failures += bad.bit_count()
+            while bad and len(report.failures) < max_failures:
+                r = (bad & -bad).bit_length() - 1
+                bad &= bad - 1
+                ins = dict(zip(c.input_names, netlist.bits_at(words, r)))
+                outs = {}
+                for j, net in enumerate(c.output_nets):
+                    if exp_care[j] >> r & 1:
+                        got = (val[net] >> r) & 1 if (known[net] >> r) & 1 else None
+                        want = (exp_val[j] >> r) & 1
+                        if got != want:
+                            outs[c.output_names[j]] = (got, want)
+                report.failures.append((report.vectors + r + 1, ins, outs))
+        report.vectors += count
+    report.seconds = time.perf_counter() - start
+
+    # Couverture limitée aux nets visibles du circuit (pins de sortie des gates)
+    untoggled = set()
+    for (gid, _), nets in c.net_of.items():
+        toggled = sum(cov.toggled(n) for n in nets)
+        report.nets += len(nets)
+        report.nets_toggled += toggled
+        if toggled < len(nets):
+            untoggled.add(gid)
+    report.untoggled_gates = sorted(untoggled)
+    return report
+
+
+def main(argv):
+    usage = "Usage : python simulation.py circuit.json [vecteurs.csv] [--aleatoire N] [--graine G]"
+    args = list(argv)
+    count, seed = None, 0
+    try:
+        if "--aleatoire" in args:
+            i = args.index("--aleatoire")
+            count = int(args[i + 1])
+            del args[i:i + 2]
+        if "--graine" in args:
+            i = args.index("--graine")
+            seed = int(args[i + 1])
+            del args[i:i + 2]
+    except (IndexError, ValueError):
+        print(usage)
+        return 2
+    if len(args) not in (1, 2):
+        print(usage)
+        return 2
+
+    try:
+        c = netlist.compile_circuit(saveAndLoad.load(args[0]), os.path.dirname(os.path.abspath(args[0])))
+        if len(args) == 2:
+            batches = csv_batches(args[1], c)
+        else:
+            batches = random_batches(c.n_inputs, count or 1 << 20, seed)
+        report = run(c, batches)
+    except (OSError, ValueError) as e:
+        print(f"Erreur : {e}")
+        return 1
+    print(report.describe())
+    return 1 if report.n_failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
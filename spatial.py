@@ -0,0 +1,100 @@
+# spatial.py
+# Index spatial en grille uniforme : chaque objet est rangé dans les cases
+# couvertes par sa boîte englobante. Une requête (point ou rectangle) ne
+# regarde que les cases concernées au lieu de parcourir tout le circuit.
+
+
+CELL = 128
+
+
+class GridIndex:
+    __slots__ = ('cell', 'cells', 'boxes')
+
+    def __init__(self, cell=CELL):
+        self.cell = cell
+        self.cells = {}     # (i, j) -> ensemble d'objets
+        self.boxes = {}     # objet -> (x1, y1, x2, y2)
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def _span(self, box):
+        c = self.cell
+        x1, y1, x2, y2 = box
+        return range(int(x1 // c), int(x2 // c) + 1), range(int(y1 // c), int(y2 // c) + 1)
+
+    def insert(self, item, box):
+        self.boxes[item] = box
+        xs, ys = self._span(box)
+        for i in xs:
+            for j in ys:
+                self.cells.setdefault((i, j), set()).add(item)
+
+    def remove(self, item):
+        box = self.boxes.pop(item, None)
+        if box is None:
+            return
+        xs, ys = self._span(box)
+        for i in xs:
+            for j in ys:
+                bucket = self.cells.get((i, j))
+                if bucket is not None:
+                    bucket.discard(item)
+                    if not bucket:
+                        del self.cells[(i, j)]
+
+    def update(self, item, box):
+        if self.boxes.get(item) != box:
+            self.remove(item)
+            self.insert(item, box)
+
+    def clear(self):
+        self.cells.clear()
+        self.boxes.clear()
+
+    def query_point(self, x, y):
+        """Objets dont la boîte contient le point."""
+        bucket = self.cells.get((int(x // self.cell), int(y // self.cell)), ())
+        out = []
+        for item in bucket:
+            x1, y1, x2, y2 = self.boxes[item]
+            if x1 <= x <= x2 and y1 <= y <= y2:
+                out.append(item)
+        return out
+
+    def query_rect(self, x1, y1, x2, y2, inside=False):
+        """Objets dont la boîte coupe le rectangle (ou y est entièrement contenue)."""
+        x1, x2 = min(x1, x2), max(x1, x2)
+        y1, y2 = min(y1, y2), max(y1, y2)
+        xs, ys = self._span((x1, y1, x2, y2))
+        if len(xs) * len(ys) > len(self.cells):
+            candidates = self.boxes          # grand rectangle : parcours direct
+        else:
+            candidates = set()
+            for i in xs:
+                for j in ys:
+                    candidates.update(self.cells.get((i, j), ()))
+        out = []
+        for item in candidates:
+            bx1, by1, bx2, by2 = self.boxes[item]
+            if inside:
+                hit = x1 <= bx1 and bx2 <= x2 and y1 <= by1 and by2 <= y2
+            else:
+                hit = bx1 <= x2 and x1 <= bx2 and by1 <= y2 and y1 <= by2
+            if hit:
+                out.append(item)
+        return out
+
+
+if __name__ == "__main__":
+    idx = GridIndex(cell=10)
+    idx.insert("a", (0, 0, 5, 5))
+    idx.insert("b", (8, 8, 25, 12))
+    assert idx.query_point(3, 3) == ["a"]
+    assert idx.query_point(20, 10) == ["b"]
+    assert sorted(idx.query_rect(-1, -1, 30, 30, inside=True)) == ["a", "b"]
+    assert idx.query_rect(0, 0, 9, 9, inside=True) == ["a"]
+    idx.update("a", (100, 100, 105, 105))
+    assert idx.query_point(3, 3) == [] and idx.query_point(101, 101) == ["a"]
+    idx.remove("b")
+    assert len(idx) == 1 and idx.query_rect(0, 0, 30, 30) == []
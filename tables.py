@@ -0,0 +1,299 @@
+# tables.py
+# Table de vérité complète des grands circuits, calculée sur plusieurs
+# processus. L'espace des entrées est découpé en tranches de 2^SHARD_BITS
+# lignes selon les bits de poids fort (préfixe). Chaque processus reçoit le
+# circuit compilé une seule fois, évalue ses tranches en bit-parallèle et
+# écrit le résultat dans un tampon partagé (fichier projeté en mémoire).
+# Les tranches sont relues dans l'ordre et écrites au fil de l'eau : la table
+# n'est jamais entière en mémoire. Les processus sont lancés par « spawn »,
+# jamais par fork : l'export part aussi de l'éditeur, dont le processus
+# porte l'interpréteur Tk.
+#
+# Deux formats : CSV, et binaire en colonnes (.tvb), organisé comme Parquet en
+# groupes de lignes. Après une ligne MAGIC et une ligne d'en-tête JSON (noms et
+# rôles des colonnes, nombre de lignes), chaque groupe de 2^k lignes contient,
+# colonne après colonne, le bitset des valeurs (bit r = ligne début + r, petit-
+# boutiste) puis, sauf pour les entrées, celui des bits connus ("?" à 0).
+# Colonnes : un bit d'entrée, de pin intermédiaire (« #gid » ou « #gid.pin »)
+# ou de sortie chacune.
+#
+#   python tables.py circuit.json table.csv|table.tvb [--processus N] [--intermediaires]
+#   python tables.py circuit.json [--processus N]      (calcul seul, débit)
+
+import csv
+import io
+import json
+import mmap
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from collections import deque
+
+import netlist
+import saveAndLoad
+
+
+SHARD_BITS = 16          # 65536 lignes par tranche
+SLOTS_PER_PROCESS = 4    # tranches calculées d'avance par processus
+MAGIC = b"CIRCUITS-FACILES TABLE 1\n"
+
+INPUT, INTERNAL, OUTPUT = "entrée", "intermédiaire", "sortie"
+
+
+def columns(c: netlist.CompiledCircuit, intermediates=False):
+    """Colonnes de la table, un bit chacune : [(nom, rôle, net)], entrées puis intermédiaires puis sorties."""
+    cols = [(name, INPUT, net) for name, net in zip(c.input_names, c.input_nets)]
+    if intermediates:
+        skip = set(c.input_gids)
+        pins = sorted(p for p in c.net_of if p[0] not in skip)
+        multi = {gid for gid, pin in pins if pin}
+        for gid, pin in pins:
+            nets = c.net_of[(gid, pin)]
+            name = f"#{gid}.{pin}" if gid in multi else f"#{gid}"
+            cols += [(bit, INTERNAL, net) for bit, net in zip(netlist.bit_names(name, len(nets)), reversed(nets))]
+    cols += [(name, OUTPUT, net) for name, net in zip(c.output_names, c.output_nets)]
+    return cols
+
+
+def _evaluate(c, nets, start, k):
+    """(valeurs, connus) des nets `nets` pour les 2^k lignes à partir de `start`."""
+    mask = (1 << (1 << k)) - 1
+    val, known = c.evaluate(netlist.chunk_words(c.n_inputs, start, k), mask)
+    return [(val[n], known[n]) for n in nets]
+
+
+def _packed(c, cols, start, k):
+    """Groupe de lignes en binaire : par colonne, valeurs puis bits connus (sauf entrées)."""
+    nbytes = ((1 << k) + 7) // 8
+    parts = []
+    for (_, role, _), (val, known) in zip(cols, _evaluate(c, [net for _, _, net in cols], start, k)):
+        parts.append(val.to_bytes(nbytes, "little"))
+        if role != INPUT:
+            parts.append(known.to_bytes(nbytes, "little"))
+    return b"".join(parts)
+
+
+def _packed_size(cols, k):
+    return ((1 << k) + 7) // 8 * sum(1 if role == INPUT else 2 for _, role, _ in cols)
+
+
+def _column(val, known, count):
+    """Cases "0" / "1" / "?" d'une colonne, ligne 0 en premier."""
+    bits = format(val, f"0{count}b")[::-1]
+    if known != (1 << count) - 1:
+        care = format(known, f"0{count}b")[::-1]
+        bits = "".join(b if k == "1" else "?" for b, k in zip(bits, care))
+    return bits
+
+
+def _csv_rows(c, cols, start, k):
+    """Tranche en lignes CSV : une case d'un caractère par colonne, donc des lignes de longueur fixe."""
+    count = 1 << k
+    texts = [_column(v, kn, count) for v, kn in _evaluate(c, [net for _, _, net in cols], start, k)]
+    # Colonne j : caractère 2j de chaque ligne, rempli d'un coup par tranche étendue
+    row = 2 * len(texts)
+    out = bytearray(b",") * (row * count)
+    for j, text in enumerate(texts):
+        out[2 * j::row] = text.encode("ascii")
+    out[row - 1::row] = b"\n" * count
+    return bytes(out)
+
+
+_FORMATS = {"bits": _packed, "csv": _csv_rows}
+
+# État d'un processus de calcul, fixé une fois pour toutes par _init
+_worker = {}
+
+
+def _init(c, cols, path, size):
+    with open(path, "r+b") as f:
+        _worker["buf"] = mmap.mmap(f.fileno(), size)
+    _worker["c"] = c
+    _worker["cols"] = cols
+
+
+def _work(task):
+    fmt, start, k, offset = task
+    data = _FORMATS[fmt](_worker["c"], _worker["cols"], start, k)
+    _worker["buf"][offset:offset + len(data)] = data
+    return start
+
+
+def _shards(c, cols, fmt, size, k, processes):
+    """Octets de chaque tranche de 2^k lignes (`size` octets au format `fmt`), dans l'ordre."""
+    starts = range(0, 1 << c.n_inputs, 1 << k)
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(starts) == 1 or not size:
+        for start in starts:
+            yield start, _FORMATS[fmt](c, cols, start, k)
+        return
+
+    slots = min(len(starts), processes * SLOTS_PER_PROCESS)
+    fd, path = tempfile.mkstemp(prefix="table-", suffix=".bin")
+    try:
+        with os.fdopen(fd, "r+b") as f:
+            f.truncate(size * slots)
+            with mmap.mmap(f.fileno(), size * slots) as buf, \
+                    multiprocessing.get_context("spawn").Pool(processes, _init, (c, cols, path, size * slots)) as pool:
+                tasks = iter(enumerate(starts))
+                pending = deque()
+
+                def submit():
+                    for i, start in tasks:
+                        s = i % slots
+                        pending.append((s, pool.apply_async(_work, ((fmt, start, k, s * size),))))
+                        return
+
+                for _ in range(slots):
+                    submit()
+                while pending:
+                    s, result = pending.popleft()
+                    start = result.get()
+                    data = buf[s * size:(s + 1) * size]
+                    submit()          # emplacement relu : il peut resservir
+                    yield start, data
+    finally:
+        os.remove(path)
+
+
+def blocks(c: netlist.CompiledCircuit, processes=None, shard_bits=SHARD_BITS):
+    """Table complète par tranches, dans l'ordre des lignes.
+
+    Produit (première ligne, nb de lignes, [(valeurs, connus)] par sortie).
+    """
+    k = min(c.n_inputs, shard_bits)
+    nbytes = ((1 << k) + 7) // 8
+    cols = columns(c)[c.n_inputs:]
+    for start, data in _shards(c, cols, "bits", _packed_size(cols, k), k, processes):
+        words = [int.from_bytes(data[j:j + nbytes], "little") for j in range(0, len(data), nbytes)]
+        yield start, 1 << k, list(zip(words[::2], words[1::2]))
+
+
+def write_csv(c: netlist.CompiledCircuit, path, processes=None, progress=None, shard_bits=SHARD_BITS,
+              intermediates=False):
+    """Écrit la table complète en CSV (en-tête : noms des colonnes) ; renvoie le nombre de lignes.
+
+    Les lignes sont mises en forme par les processus de calcul ; `progress(lignes
+    écrites, total)` est appelé après chaque tranche.
+    """
+    cols = columns(c, intermediates)
+    k = min(c.n_inputs, shard_bits)
+    total = 1 << c.n_inputs
+    header = io.StringIO()
+    csv.writer(header, lineterminator="\n").writerow(name for name, _, _ in cols)
+    with open(path, "wb") as f:
+        f.write(header.getvalue().encode("utf-8"))
+        for start, data in _shards(c, cols, "csv", (2 * len(cols)) << k, k, processes):
+            f.write(data)
+            if progress is not None:
+                progress(start + (1 << k), total)
+    return total
+
+
+def write_bits(c: netlist.CompiledCircuit, path, processes=None, progress=None, shard_bits=SHARD_BITS,
+               intermediates=False):
+    """Écrit la table complète au format binaire en colonnes (.tvb) ; renvoie le nombre de lignes."""
+    cols = columns(c, intermediates)
+    k = min(c.n_inputs, shard_bits)
+    total = 1 << c.n_inputs
+    header = {"rows": total, "group_rows": 1 << k,
+              "columns": [{"name": name, "role": role} for name, role, _ in cols]}
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(json.dumps(header, ensure_ascii=False).encode("utf-8") + b"\n")
+        for start, data in _shards(c, cols, "bits", _packed_size(cols, k), k, processes):
+            f.write(data)
+            if progress is not None:
+                progress(start + (1 << k), total)
+    return total
+
+
+def read_bits(path):
+    """Relit un fichier .tvb groupe par groupe : (en-tête, générateur de (début, nb de lignes, {nom: (valeurs, connus)}))."""
+    f = open(path, "rb")
+    if f.readline() != MAGIC:
+        f.close()
+        raise ValueError(f"{path} : pas une table binaire de circuitsFaciles")
+    header = json.loads(f.readline())
+
+    def groups():
+        with f:
+            count = header["group_rows"]
+            nbytes = (count + 7) // 8
+            mask = (1 << count) - 1
+            for start in range(0, header["rows"], count):
+                cols = {}
+                for col in header["columns"]:
+                    val = int.from_bytes(f.read(nbytes), "little")
+                    known = mask if col["role"] == INPUT else int.from_bytes(f.read(nbytes), "little")
+                    cols[col["name"]] = (val, known)
+                yield start, count, cols
+
+    return header, groups()
+
+
+def main(argv):
+    usage = "Usage : python tables.py circuit.json [table.csv|table.tvb] [--processus N] [--intermediaires]"
+    args = list(argv)
+    processes = None
+    intermediates = "--intermediaires" in args
+    if intermediates:
+        args.remove("--intermediaires")
+    try:
+        if "--processus" in args:
+            i = args.index("--processus")
+            processes = int(args[i + 1])
+            del args[i:i + 2]
+    except (IndexError, ValueError):
+        print(usage)
+        return 2
+    if len(args) not in (1, 2):
+        print(usage)
+        return 2
+
+    c = netlist.compile_circuit(saveAndLoad.load(args[0]), os.path.dirname(os.path.abspath(args[0])))
+    start = time.perf_counter()
+    if len(args) == 2:
+        write = write_bits if args[1].lower().endswith(".tvb") else write_csv
+        rows = write(c, args[1], processes, intermediates=intermediates)
+    else:
+        rows = sum(count for _, count, _ in blocks(c, processes))
+    seconds = time.perf_counter() - start
+    rate = f"{rows / max(seconds, 1e-9):,.0f}".replace(",", " ")
+    print(f"{rows} lignes en {seconds:.2f} s ({rate} lignes/s, {processes or os.cpu_count() or 1} processus)")
+    return 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(main(sys.argv[1:]))
+    # A, B -> XOR -> S : mêmes lignes en un ou plusieurs processus, tranches de 2 lignes
+    data = {
+        "gates": [
+            {"gid": 1, "type": "SRC", "x": 0, "y": 0, "value": False, "name": "A"},
+            {"gid": 2, "type": "SRC", "x": 0, "y": 0, "value": False, "name": "B"},
+            {"gid": 3, "type": "XOR", "x": 0, "y": 0, "value": None, "name": None},
+            {"gid": 4, "type": "OUT", "x": 0, "y": 0, "value": None, "name": "S"},
+        ],
+        "wires": [
+            {"src_gate": 1, "src_pin": 0, "dst_gate": 3, "dst_pin": 0},
+            {"src_gate": 2, "src_pin": 0, "dst_gate": 3, "dst_pin": 1},
+            {"src_gate": 3, "src_pin": 0, "dst_gate": 4, "dst_pin": 0},
+        ],
+    }
+    c = netlist.compile_circuit(data)
+    expected = [(0, 2, [(0b10, 0b11)]), (2, 2, [(0b01, 0b11)])]
+    assert list(blocks(c, 1, shard_bits=1)) == expected
+    assert list(blocks(c, 2, shard_bits=1)) == expected
+    path = os.path.join(tempfile.mkdtemp(), "xor.csv")
+    write_csv(c, path, 2, shard_bits=1)
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == "A,B,S\n0,0,0\n0,1,1\n1,0,1\n1,1,0\n"
+    # Binaire en colonnes, avec la pin intermédiaire du XOR (#3) : deux groupes de 2 lignes
+    path = os.path.join(os.path.dirname(path), "xor.tvb")
+    write_bits(c, path, 2, shard_bits=1, intermediates=True)
+    header, groups = read_bits(path)
+    assert [col["name"] for col in header["columns"]] == ["A", "B", "#3", "S"]
+    assert [cols["S"] for _, _, cols in groups] == [(0b10, 0b11), (0b01, 0b11)]
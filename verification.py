@@ -0,0 +1,411 @@
+# verification.py
+# Vérification d'un circuit (format JSON de saveAndLoad) : un seul passage sur
+# les gates puis sur les fils, indexés par gid et par pin, relève tous les
+# problèmes avec les gids concernés.
+#   - erreurs (le circuit ne peut pas être chargé) : champ manquant ou mal
+#     typé, gid en double, type inconnu, sous-circuit introuvable, fil vers une
+#     gate ou une pin inexistante ;
+#   - avertissements (valeurs "?") : entrée non connectée ou pilotée par
+#     plusieurs fils, largeurs de bus différentes, sortie inutilisée, boucle.
+# Le Checker se met à jour avec les opérations du journal (journal.py) : seules
+# les gates touchées sont revérifiées, les boucles ne sont recherchées qu'après
+# un changement de fil qui peut en créer ou en casser une.
+#
+#   python verification.py circuit.json [autre.json ...]
+
+import os
+import sys
+
+import blocs
+import netlist
+import saveAndLoad
+
+
+ERROR = "erreur"
+WARNING = "avertissement"
+
+KNOWN_TYPES = set(netlist.N_INPUTS) | {"SRC", "OUT", "SPLIT", "MERGE", "BLOCK"}
+
+
+class Issue:
+    __slots__ = ('level', 'kind', 'gids', 'message')
+
+    def __init__(self, level, kind, gids, message):
+        self.level = level
+        self.kind = kind
+        self.gids = gids          # gates concernées (à mettre en évidence)
+        self.message = message
+
+    def __repr__(self):
+        return f"Issue({self.level}, {self.kind}, {self.gids})"
+
+
+class Report:
+    __slots__ = ('issues',)
+
+    def __init__(self, issues):
+        self.issues = issues
+
+    @property
+    def errors(self):
+        return [i for i in self.issues if i.level == ERROR]
+
+    def gids(self, level=None):
+        return {g for i in self.issues if level is None or i.level == level for g in i.gids}
+
+    def describe(self, limit=50):
+        if not self.issues:
+            return "Aucun problème détecté."
+        n_err = len(self.errors)
+        lines = [f"{n_err} erreur(s), {len(self.issues) - n_err} avertissement(s) :"]
+        ordered = sorted(self.issues, key=lambda i: (i.level != ERROR, i.kind, i.gids))
+        lines += [f"  [{i.level}] {i.message}" for i in ordered[:limit]]
+        if len(ordered) > limit:
+            lines.append(f"  … et {len(ordered) - limit} autre(s)")
+        return "\n".join(lines)
+
+
+GATE_FIELDS = {"gid": int, "type": str}
+WIRE_FIELDS = {"src_gate": int, "src_pin": int, "dst_gate": int, "dst_pin": int}
+
+
+def _bad_fields(d, fields):
+    """Champs manquants ou mal typés de `d` (tous si `d` n'est pas un dictionnaire)."""
+    if not isinstance(d, dict):
+        return list(fields)
+    return [f for f, t in fields.items() if not isinstance(d.get(f), t) or isinstance(d.get(f), bool)]
+
+
+def _wire_key(wd):
+    return wd["src_gate"], wd["src_pin"], wd["dst_gate"], wd["dst_pin"]
+
+
+class Checker:
+    """Index du circuit et problèmes de chaque gate, tenus à jour opération par opération."""
+
+    def __init__(self, data: dict, base_dir: str | None = None):
+        self.base_dir = base_dir
+        self.gates = {}           # gid -> dict de la gate
+        self.widths = {}          # gid -> (largeurs des entrées, largeurs des sorties), None si inconnues
+        self.wires = {}           # clé -> nombre de fils identiques
+        self.by_gid = {}          # gid -> clés des fils qui le mentionnent
+        self.drivers = {}         # (gid, pin d'entrée) -> clés des fils valides
+        self.readers = {}         # (gid, pin de sortie) -> clés des fils valides
+        self.local = {}           # gid -> [Issue] (gate et fils qui y arrivent)
+        self.duplicates = []
+        self.malformed = []       # gates et fils illisibles (écartés de l'index)
+        self.cycles = []
+        self.in_cycle = set()     # gids pris dans une boucle signalée
+        self.cycles_dirty = True
+
+        for n, gd in enumerate(data.get("gates", [])):
+            bad = _bad_fields(gd, GATE_FIELDS)
+            if bad:
+                self._malformed("gate", n, bad)
+            elif gd["gid"] in self.gates:
+                self.duplicates.append(Issue(ERROR, "gid", [gd["gid"]], f"gid {gd['gid']} utilisé par plusieurs gates"))
+            else:
+                self._add_gate(gd)
+        for n, wd in enumerate(data.get("wires", [])):
+            bad = _bad_fields(wd, WIRE_FIELDS)
+            if bad:
+                self._malformed("fil", n, bad)
+            else:
+                self._add_wire(wd)
+        for gid in self.gates:
+            self._check(gid)
+
+    def _malformed(self, what, n, fields):
+        names = ", ".join(f"« {f} »" for f in fields)
+        self.malformed.append(Issue(ERROR, "format", [], f"{what} n° {n} : {names} manquant(s) ou invalide(s)"))
+
+    # --- Index ---
+    def _add_gate(self, gd):
+        gid = gd["gid"]
+        self.gates[gid] = gd
+        self.by_gid.setdefault(gid, set())
+        try:
+            block = blocs.load_block(gd["ref"], self.base_dir) if gd["type"] == "BLOCK" else None
+            self.widths[gid] = netlist.pin_widths(gd, block) if gd["type"] in KNOWN_TYPES else None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            self.widths[gid] = None
+            self.local[gid] = [Issue(ERROR, "bloc", [gid], f"gate {gid} : sous-circuit introuvable ({e})")]
+        # Fils arrivés avant la gate : redeviennent peut-être valides
+        for key in list(self.by_gid[gid]):
+            self._unlink(key)
+            self._link(key)
+
+    def _remove_gate(self, gid):
+        for key in list(self.by_gid.get(gid, ())):
+            self.wires[key] = 1
+            self._remove_wire(key)
+        self.gates.pop(gid, None)
+        self.widths.pop(gid, None)
+        self.by_gid.pop(gid, None)
+        self.local.pop(gid, None)
+
+    def _add_wire(self, wd):
+        key = _wire_key(wd)
+        n = self.wires.get(key, 0)
+        self.wires[key] = n + 1
+        if n:
+            return
+        for gid in (key[0], key[2]):
+            self.by_gid.setdefault(gid, set()).add(key)
+        self._link(key)
+
+    def _remove_wire(self, key):
+        n = self.wires.pop(key, 0)
+        if n > 1:
+            self.wires[key] = n - 1
+            return
+        self._unlink(key)
+        for gid in (key[0], key[2]):
+            keys = self.by_gid.get(gid)
+            if keys is not None:
+                keys.discard(key)
+                if not keys and gid not in self.gates:
+                    del self.by_gid[gid]
+
+    def _valid(self, key):
+        sg, sp, dg, dp = key
+        ws, wd = self.widths.get(sg), self.widths.get(dg)
+        return ws is not None and wd is not None and 0 <= sp < len(ws[1]) and 0 <= dp < len(wd[0])
+
+    def _link(self, key):
+        if self._valid(key):
+            self.readers.setdefault((key[0], key[1]), set()).add(key)
+            self.drivers.setdefault((key[2], key[3]), set()).add(key)
+            # Nouvelle boucle seulement si la source est atteignable depuis la destination
+            if not self.cycles_dirty and self._reaches(key[2], key[0]):
+                self.cycles_dirty = True
+
+    def _unlink(self, key):
+        for index, pin in ((self.readers, (key[0], key[1])), (self.drivers, (key[2], key[3]))):
+            keys = index.get(pin)
+            if keys is not None and key in keys:
+                keys.discard(key)
+                if not keys:
+                    del index[pin]
+                if key[0] in self.in_cycle and key[2] in self.in_cycle:
+                    self.cycles_dirty = True
+
+    # --- Vérifications locales ---
+    def _check(self, gid):
+        """Problèmes propres à la gate `gid` et aux fils qui la mentionnent."""
+        issues = [i for i in self.local.get(gid, ()) if i.kind == "bloc"]
+        gd = self.gates[gid]
+        widths = self.widths[gid]
+        if gd["type"] not in KNOWN_TYPES:
+            issues.append(Issue(ERROR, "type", [gid], f"gate {gid} : type inconnu « {gd['type']} »"))
+        for key in self.by_gid[gid]:
+            # Fil invalide : signalé une seule fois, par sa destination si elle existe
+            if self._valid(key) or gid != (key[2] if key[2] in self.gates else key[0]):
+                continue
+            present = [g for g in (key[0], key[2]) if g in self.gates]
+            if len(present) == 2 and (self.widths[key[0]] is None or self.widths[key[2]] is None):
+                continue       # type inconnu ou bloc introuvable : déjà signalé
+            missing = [g for g in (key[0], key[2]) if g not in self.gates]
+            what = f"gate {missing[0]} inexistante" if missing else "pin inexistante"
+            issues.append(Issue(ERROR, "fil", present, f"fil {key[0]}.{key[1]} → {key[2]}.{key[3]} : {what}"))
+        if widths is None:
+            self.local[gid] = issues
+            return
+
+        ins, outs = widths
+        for i, w in enumerate(ins):
+            keys = self.drivers.get((gid, i), ())
+            if not keys:
+                issues.append(Issue(WARNING, "non connectée", [gid], f"gate {gid} : entrée {i} non connectée"))
+            elif len(keys) > 1 or self.wires[next(iter(keys))] > 1:
+                srcs = sorted({k[0] for k in keys})
+                count = sum(self.wires[k] for k in keys)
+                issues.append(Issue(WARNING, "plusieurs fils", sorted({gid, *srcs}),
+                                    f"gate {gid} : entrée {i} pilotée par {count} fils (gates {', '.join(map(str, srcs))})"))
+            for sg, sp, _, _ in keys:
+                ws = self.widths[sg][1][sp]
+                if ws != w:
+                    issues.append(Issue(WARNING, "largeur", [sg, gid],
+                                        f"fil {sg}.{sp} → {gid}.{i} : largeurs différentes ({ws} et {w} bits)"))
+        for j in range(len(outs)):
+            if (gid, j) not in self.readers:
+                issues.append(Issue(WARNING, "inutilisée", [gid], f"gate {gid} : sortie {j} inutilisée"))
+        self.local[gid] = issues
+
+    def _successors(self, gid):
+        for j in range(len(self.widths[gid][1])):
+            for key in self.readers.get((gid, j), ()):
+                yield key[2]
+
+    def _reaches(self, start, target):
+        seen = {start}
+        stack = [start]
+        while stack:
+            gid = stack.pop()
+            if gid == target:
+                return True
+            for nxt in self._successors(gid):
+                if nxt not in seen:
+                    seen.add(nxt)
+                    stack.append(nxt)
+        return False
+
+    def _find_cycles(self):
+        """Composantes fortement connexes (Tarjan itératif) de plus d'une gate, ou bouclant sur elle-même."""
+        succs = {gid: [] for gid in self.gates}
+        for (sg, _), keys in self.readers.items():
+            succs[sg].extend(k[2] for k in keys)
+        index, low, on_stack, stack = {}, {}, set(), []
+        cycles = []
+        for root in succs:
+            if root in index:
+                continue
+            work = [(root, iter(succs[root]))]
+            index[root] = low[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                v, it = work[-1]
+                for w in it:
+                    if w not in index:
+                        index[w] = low[w] = len(index)
+                        stack.append(w)
+                        on_stack.add(w)
+                        work.append((w, iter(succs[w])))
+                        break
+                    if w in on_stack:
+                        low[v] = min(low[v], index[w])
+                else:
+                    work.pop()
+                    if work:
+                        low[work[-1][0]] = min(low[work[-1][0]], low[v])
+                    if low[v] == index[v]:
+                        comp = []
+                        while True:
+                            w = stack.pop()
+                            on_stack.discard(w)
+                            comp.append(w)
+                            if w == v:
+                                break
+                        if len(comp) > 1 or v in succs[v]:
+                            comp.sort()
+                            cycles.append(Issue(WARNING, "boucle", comp,
+                                                f"boucle entre les gates {', '.join(map(str, comp))}"))
+        self.cycles = cycles
+        self.in_cycle = {g for i in cycles for g in i.gids}
+        self.cycles_dirty = False
+
+    # --- Mise à jour incrémentale ---
+    def apply(self, op: dict):
+        """Applique une opération du journal ; renvoie les gids revérifiés."""
+        touched = set()
+        self._apply(op, touched)
+        for gid in touched:
+            if gid in self.gates:
+                self._check(gid)
+        return touched
+
+    def _apply(self, op, touched):
+        kind = op["op"]
+        if kind == "batch":
+            for sub in op["commands"]:
+                self._apply(sub, touched)
+        elif kind == "add_gate":
+            gid = op["gate"]["gid"]
+            self._remove_gate(gid)
+            self._add_gate(dict(op["gate"]))
+            touched.add(gid)
+            touched.update(g for k in self.by_gid[gid] for g in (k[0], k[2]))
+        elif kind == "delete_gate":
+            gid = op["gid"]
+            touched.update(g for k in self.by_gid.get(gid, ()) for g in (k[0], k[2]))
+            self._remove_gate(gid)
+        elif kind in ("add_wire", "delete_wire"):
+            key = _wire_key(op["wire"])
+            if kind == "add_wire":
+                self._add_wire(op["wire"])
+            elif key in self.wires:
+                self._remove_wire(key)
+            touched.update((key[0], key[2]))
+        elif kind == "set_inputs":
+            gid, n = op["gid"], op["inputs"]
+            for key in [k for k in self.by_gid.get(gid, ()) if k[2] == gid and k[3] >= n]:
+                self.wires[key] = 1
+                self._remove_wire(key)
+            gd = dict(self.gates[gid], inputs=n)
+            keys = self.by_gid[gid]
+            self.gates[gid] = gd
+            self.widths[gid] = netlist.pin_widths(gd)
+            for key in list(keys):
+                self._unlink(key)
+                self._link(key)
+            touched.add(gid)
+            touched.update(g for k in keys for g in (k[0], k[2]))
+        # Déplacements, valeurs et noms : rien à revérifier
+
+    def report(self) -> Report:
+        if self.cycles_dirty:
+            self._find_cycles()
+        return Report(self.malformed + self.duplicates + [i for issues in self.local.values() for i in issues] + self.cycles)
+
+
+def check(data: dict, base_dir: str | None = None) -> Report:
+    return Checker(data, base_dir).report()
+
+
+def main(argv):
+    if not argv:
+        print("Usage : python verification.py circuit.json [autre.json ...]")
+        return 2
+    status = 0
+    for path in argv:
+        try:
+            report = check(saveAndLoad.load(path), os.path.dirname(os.path.abspath(path)))
+        except (OSError, ValueError) as e:
+            print(f"{path} : illisible ({e})")
+            status = 1
+            continue
+        print(f"{path} : {report.describe()}")
+        if report.errors:
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(main(sys.argv[1:]))
+    # A -> NOT(3) -> OUT(4) ; AND(5) : une entrée pilotée deux fois, l'autre libre, sortie inutilisée
+    data = {
+        "gates": [
+            {"gid": 1, "type": "SRC", "x": 0, "y": 0, "value": False, "name": "A"},
+            {"gid": 3, "type": "NOT", "x": 0, "y": 0, "value": None, "name": None},
+            {"gid": 4, "type": "OUT", "x": 0, "y": 0, "value": None, "name": "S"},
+            {"gid": 5, "type": "AND", "x": 0, "y": 0, "value": None, "name": None, "inputs": 2},
+        ],
+        "wires": [
+            {"src_gate": 1, "src_pin": 0, "dst_gate": 3, "dst_pin": 0},
+            {"src_gate": 3, "src_pin": 0, "dst_gate": 4, "dst_pin": 0},
+            {"src_gate": 1, "src_pin": 0, "dst_gate": 5, "dst_pin": 0},
+            {"src_gate": 3, "src_pin": 0, "dst_gate": 5, "dst_pin": 0},
+        ],
+    }
+    c = Checker(data)
+    kinds = sorted((i.kind, tuple(i.gids)) for i in c.report().issues)
+    assert kinds == [("inutilisée", (5,)), ("non connectée", (5,)), ("plusieurs fils", (1, 3, 5))]
+    # Boucle AND(5) -> AND(5), puis retirée
+    loop = {"src_gate": 5, "src_pin": 0, "dst_gate": 5, "dst_pin": 1}
+    assert c.apply({"op": "add_wire", "wire": loop}) == {5}
+    assert [i.gids for i in c.report().issues if i.kind == "boucle"] == [[5]]
+    c.apply({"op": "delete_wire", "wire": loop})
+    assert sorted(i.kind for i in c.report().issues) == ["inutilisée", "non connectée", "plusieurs fils"]
+    # Références cassées : erreurs, sans exception
+    data["wires"].append({"src_gate": 9, "src_pin": 0, "dst_gate": 4, "dst_pin": 2})
+    data["gates"].append({"gid": 4, "type": "OUT", "x": 0, "y": 0, "value": None, "name": "T"})
+    assert sorted(i.kind for i in check(data).errors) == ["fil", "gid"]
+    # Champs manquants ou mal typés : erreurs avec le numéro de la gate ou du fil
+    data = {"gates": [{"type": "OUT", "x": 0, "y": 0}, {"gid": "2", "type": "OUT"}, "SRC"],
+            "wires": [{"src_gate": 1, "dst_gate": 4, "dst_pin": 0}]}
+    errors = check(data).errors
+    assert [i.kind for i in errors] == ["format"] * 4
+    assert [i.message.split(" :")[0] for i in errors] == ["gate n° 0", "gate n° 1", "gate n° 2", "fil n° 0"]
+    assert "src_pin" in errors[3].message